@@ -1,9 +1,14 @@
 import streamlit as st
 from lib import auth
+from utils.email_outbox import start_outbox_worker
+from utils import query_profiler
 
 # Global Config
 st.set_page_config(page_title="Timesheet App", layout="wide")
 
+# Background email sender (started once per process)
+start_outbox_worker()
+
 # --- Define All Available Pages ---
 login_page = st.Page("views/login.py", title="Login", icon="🔐")
 home_page = st.Page("views/employee_home.py", title="Home", icon="🏠")
@@ -40,4 +45,15 @@ else:
     if st.sidebar.button("Logout"):
         auth.logout_user()
 
-pg.run()
\ No newline at end of file
+    # Developer profiling (admins only): per-rerun SQL statements for the current page
+    if role == "admin":
+        st.sidebar.toggle("🔍 Query profiler", key="query_profiler_enabled")
+    else:
+        st.session_state.pop("query_profiler_enabled", None)
+
+pg.run()
+
+if st.session_state.get("query_profiler_enabled"):
+    run = st.session_state.get("query_profile_run")
+    query_profiler.finish_run(run)
+    query_profiler.render_panel(run)
@@ -0,0 +1,216 @@
+# ./benchmarks/plan_check.py
+"""
+Query-plan regression check for the hot read paths.
+
+Runs the query functions behind the employee week load, the approvals
+queue, the assignment list and the reports once, captures every SELECT
+they send, and asks the database for its estimated plan
+(SET SHOWPLAN_XML on SQL Server, EXPLAIN QUERY PLAN on the SQLite
+stand-in). A full scan of one of the large tables fails the check:
+
+    python -m benchmarks.plan_check                 # SQLite, bench_small.db
+    TIMESHEET_DB_BACKEND=mssql python -m benchmarks.plan_check
+
+Ordered scans of a nonclustered index (TOP n ... ORDER BY on an index
+key) are accepted; table scans and clustered index scans are not.
+"""
+import os
+
+os.environ.setdefault("TIMESHEET_DB_BACKEND", "sqlite")
+os.environ.setdefault("OUTBOX_WORKER_ENABLED", "0")
+
+import datetime
+import re
+import sys
+import xml.etree.ElementTree as ET
+from unittest import mock
+from utils import db, query_profiler, rollups, report_data
+from utils import manager_queries as mq
+from utils import timesheet_queries as tq
+from benchmarks import run_benchmarks
+
+# Tables that grow with the organisation; a full scan of any of them fails the check
+HOT_TABLES = {"timesheet_entries", "Assignments", "approvals", "timesheet_rollup_weekly", "project_approvers"}
+
+SHOWPLAN_NS = {"sp": "http://schemas.microsoft.com/sqlserver/2004/07/showplan"}
+MSSQL_SCAN_OPS = {"Table Scan", "Clustered Index Scan"}
+
+_SQL_KEYWORDS = {"WHERE", "JOIN", "LEFT", "INNER", "ON", "ORDER", "GROUP", "LIMIT", "AS", "WITH", "UNION"}
+
+
+# ========================================================
+# 1. Capturing statements
+# ========================================================
+
+def _is_read(sql):
+    """SELECT statements and SET NOCOUNT batches of SELECTs; not writes or SELECT GETDATE()."""
+    body = re.sub(r"^\s*SET\s+NOCOUNT\s+ON\s*;", "", sql, flags=re.IGNORECASE).lstrip().upper()
+    return body.startswith("SELECT") and "FROM" in body
+
+
+class _RecordingCursor:
+    def __init__(self, cursor, sink):
+        self._cursor = cursor
+        self._sink = sink
+
+    def execute(self, sql, *params):
+        if len(params) == 1 and isinstance(params[0], (list, tuple)):
+            params = tuple(params[0])
+        if _is_read(sql):
+            self._sink.append((query_profiler._caller(), sql, params))
+        self._cursor.execute(sql, *params)
+        return self
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class _RecordingConnection:
+    def __init__(self, conn, sink):
+        self._conn = conn
+        self._sink = sink
+
+    def cursor(self):
+        return _RecordingCursor(self._conn.cursor(), self._sink)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def capture(fn):
+    """Runs fn and returns the (caller, sql, params) of every SELECT it executed."""
+    statements = []
+    with mock.patch.object(query_profiler, "wrap", lambda conn: _RecordingConnection(conn, statements)):
+        fn()
+    return statements
+
+
+# ========================================================
+# 2. Plans
+# ========================================================
+
+def _aliases(sql):
+    """alias -> table for every FROM / JOIN in a statement."""
+    aliases = {}
+    for table, alias in re.findall(r"\b(?:FROM|JOIN)\s+\[?(\w+)\]?(?:\s+(?:AS\s+)?(\w+))?", sql, re.IGNORECASE):
+        if alias and alias.upper() not in _SQL_KEYWORDS:
+            aliases[alias] = table
+        aliases[table] = table
+    return aliases
+
+
+def sqlite_scans(conn, sql, params):
+    """(plan lines, scanned hot tables) from EXPLAIN QUERY PLAN."""
+    details = conn.explain(sql, params)
+    aliases = _aliases(sql)
+    scans = []
+    for line in details:
+        m = re.match(r"^SCAN (\w+)$", line.strip())
+        if m and aliases.get(m.group(1), m.group(1)) in HOT_TABLES:
+            scans.append(aliases.get(m.group(1), m.group(1)))
+    return details, scans
+
+
+def mssql_scans(conn, sql, params):
+    """(plan operators, scanned hot tables) from the estimated SHOWPLAN_XML."""
+    cur = conn.cursor()
+    cur.execute("SET SHOWPLAN_XML ON")
+    try:
+        cur.execute(sql, params)
+        plan_xml = cur.fetchone()[0]
+    finally:
+        cur.execute("SET SHOWPLAN_XML OFF")
+
+    details, scans = [], []
+    for rel_op in ET.fromstring(plan_xml).iter(f"{{{SHOWPLAN_NS['sp']}}}RelOp"):
+        op = rel_op.get("PhysicalOp")
+        obj = rel_op.find("./*/sp:Object", SHOWPLAN_NS)
+        table = obj.get("Table", "").strip("[]") if obj is not None else ""
+        index = obj.get("Index", "").strip("[]") if obj is not None else ""
+        details.append(f"{op} {table} {index}".strip())
+        if op in MSSQL_SCAN_OPS and table in HOT_TABLES:
+            scans.append(table)
+    return details, scans
+
+
+def explain(sql, params):
+    with db.get_connection() as conn:
+        if db.DB_BACKEND == "sqlite":
+            return sqlite_scans(conn, sql, params)
+        return mssql_scans(conn, sql, params)
+
+
+# ========================================================
+# 3. Hot paths
+# ========================================================
+
+def hot_paths(subjects, week):
+    """The query functions whose plans must stay scan-free."""
+    emp = subjects["employee"]["user_id"]
+    report_start = week - datetime.timedelta(weeks=12)
+    paths = {
+        "timesheet.week_snapshot": lambda: tq.fetch_week_snapshot(emp, week),
+    }
+    for role in ("admin", "approver", "dept_manager"):
+        user = subjects.get(role)
+        if not user:
+            continue
+        paths[f"approvals.first_page.{role}"] = lambda u=user: mq.fetch_submitted_weekly_entries(
+            u["user_id"], u["role_id"], page_size=run_benchmarks.APPROVALS_PAGE_SIZE + 1)
+        paths[f"approvals.submitted_only.{role}"] = lambda u=user: mq.fetch_submitted_weekly_entries(
+            u["user_id"], u["role_id"], status="submitted", page_size=run_benchmarks.APPROVALS_PAGE_SIZE + 1)
+        paths[f"approvals.delta.{role}"] = lambda u=user: mq.fetch_submitted_weekly_entries(
+            u["user_id"], u["role_id"], changed_since=datetime.datetime.combine(week, datetime.time()))
+        if role != "admin":
+            # Admins list every assignment, so that read is a scan by design
+            paths[f"assignments.{role}"] = lambda u=user: mq.get_all_assignments_for_manager(
+                u["user_id"], False)
+    approver = subjects.get("approver") or subjects.get("admin")
+    if approver:
+        paths["reports.detailed_frame.approver"] = lambda: report_data.fetch_detailed_frame(
+            report_start, week, "All", "All", approver["user_id"], approver["role"] == "admin")
+        paths["reports.rollup_totals.approver"] = lambda: rollups.fetch_rollup_totals(
+            report_start, week, approver["user_id"], approver["role"] == "admin")
+    return paths
+
+
+def check(subjects, week, verbose=False):
+    """Returns a list of {"path", "caller", "tables", "plan", "sql"} for every statement that scans."""
+    failures = []
+    for name, fn in hot_paths(subjects, week).items():
+        for caller, sql, params in capture(fn):
+            details, scans = explain(sql, params)
+            if verbose:
+                print(f"{name} [{caller}]")
+                for line in details:
+                    print(f"    {line}")
+            if scans:
+                failures.append({"path": name, "caller": caller, "tables": sorted(set(scans)),
+                                 "plan": details, "sql": " ".join(sql.split())})
+    return failures
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Fail when a hot query's estimated plan scans a large table.")
+    parser.add_argument("--scale", default="small", choices=sorted(run_benchmarks.synthetic_data.SCALES))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--end-date", type=datetime.date.fromisoformat, default=datetime.date(2025, 6, 30))
+    parser.add_argument("--verbose", action="store_true", help="Print every captured plan.")
+    args = parser.parse_args()
+
+    if db.DB_BACKEND == "sqlite":
+        run_benchmarks.use_database(args.scale, args.seed, args.end_date)
+    subjects, week = run_benchmarks.pick_subjects()
+    failures = check(subjects, week, verbose=args.verbose)
+
+    for f in failures:
+        print(f"SCAN {', '.join(f['tables'])} in {f['path']} [{f['caller']}]")
+        for line in f["plan"]:
+            print(f"    {line}")
+    print(f"{len(failures)} scanning statement(s) on hot paths." if failures else "No scans on hot paths.")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,271 @@
+# ./benchmarks/run_benchmarks.py
+"""
+Benchmarks for the query layer and the page render paths.
+
+For each data scale (see benchmarks.synthetic_data.SCALES) this times the
+hot query functions and full reruns of views/employee_timesheet.py and
+views/manager_dashboard.py through Streamlit's AppTest, and writes p50/p95
+per case as JSON.
+
+    python -m benchmarks.run_benchmarks --scales small medium --out bench_results.json
+    python -m benchmarks.run_benchmarks --baseline bench_results.json   # exits 1 on p95 regressions
+
+Runs against the SQLite stand-in (one bench_<scale>.db per scale, generated
+on first use) unless TIMESHEET_DB_BACKEND is set to something else, in
+which case the configured database is benchmarked as the single "live" scale.
+"""
+import os
+
+os.environ.setdefault("TIMESHEET_DB_BACKEND", "sqlite")
+os.environ.setdefault("OUTBOX_WORKER_ENABLED", "0")
+
+import datetime
+import json
+import sys
+import time
+from pathlib import Path
+from unittest import mock
+from lib.constants import ROLE_ID_ADMIN, ROLE_ID_DEPT_MANAGER, ROLE_ID_PROJECT_MANAGER
+from utils import db, catalog_cache, rollups, report_data
+from utils import manager_queries as mq
+from utils import timesheet_queries as tq
+from benchmarks import synthetic_data
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_REPEAT = 20
+# A case whose p95 grows by more than this factor over the baseline is a regression
+REGRESSION_FACTOR = 1.25
+APPROVALS_PAGE_SIZE = 50
+
+ROLE_NAMES = {
+    ROLE_ID_ADMIN: "admin",
+    ROLE_ID_PROJECT_MANAGER: "approver",
+    ROLE_ID_DEPT_MANAGER: "dept_manager",
+}
+
+
+def _percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def time_case(fn, repeat, warmup=1):
+    """Runs fn warmup + repeat times; returns latency stats in milliseconds."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return {
+        "n": len(samples),
+        "p50_ms": round(_percentile(samples, 0.50), 3),
+        "p95_ms": round(_percentile(samples, 0.95), 3),
+        "mean_ms": round(sum(samples) / len(samples), 3),
+        "min_ms": round(min(samples), 3),
+        "max_ms": round(max(samples), 3),
+    }
+
+
+# ========================================================
+# 1. Subjects (which users / weeks to benchmark with)
+# ========================================================
+
+def pick_subjects():
+    """The busiest approver of each role, the busiest employee and the latest week with data."""
+    with db.get_connection() as conn:
+        cur = conn.cursor()
+        subjects = {}
+        for role_id in ROLE_NAMES:
+            cur.execute("""
+                SELECT TOP 1 e.EmpId, e.EmpName
+                FROM Employee e
+                LEFT JOIN project_approvers pa ON pa.user_id = e.EmpId
+                WHERE e.UserTypeId = ?
+                GROUP BY e.EmpId, e.EmpName
+                ORDER BY COUNT(pa.project_id) DESC, e.EmpId
+            """, (role_id,))
+            row = cur.fetchone()
+            if row:
+                subjects[ROLE_NAMES[role_id]] = {
+                    "user_id": int(row[0]), "full_name": row[1],
+                    "role": ROLE_NAMES[role_id], "role_id": role_id,
+                }
+
+        cur.execute("SELECT MAX(week_start_date) FROM timesheet_entries")
+        latest = cur.fetchone()[0]
+        # SQLite returns aggregates of DATETIME columns as plain text
+        latest = datetime.datetime.fromisoformat(latest) if isinstance(latest, str) else latest
+        latest = latest.date() if isinstance(latest, datetime.datetime) else latest
+        cur.execute("""
+            SELECT TOP 1 te.user_id, e.EmpName
+            FROM timesheet_entries te JOIN Employee e ON te.user_id = e.EmpId
+            WHERE te.week_start_date = ?
+            GROUP BY te.user_id, e.EmpName
+            ORDER BY COUNT(*) DESC, te.user_id
+        """, (latest,))
+        row = cur.fetchone()
+        subjects["employee"] = {"user_id": int(row[0]), "full_name": row[1], "role": "user", "role_id": None}
+    return subjects, latest
+
+
+# ========================================================
+# 2. Cases
+# ========================================================
+
+def query_cases(subjects, week):
+    cases = {}
+    for role in ("admin", "approver", "dept_manager"):
+        user = subjects.get(role)
+        if not user:
+            continue
+        cases[f"approvals.first_page.{role}"] = lambda u=user: mq.fetch_submitted_weekly_entries(
+            u["user_id"], u["role_id"], page_size=APPROVALS_PAGE_SIZE + 1)
+        cases[f"approvals.submitted_only.{role}"] = lambda u=user: mq.fetch_submitted_weekly_entries(
+            u["user_id"], u["role_id"], status="submitted", page_size=APPROVALS_PAGE_SIZE + 1)
+        cases[f"assignments.{role}"] = lambda u=user: mq.get_all_assignments_for_manager(
+            u["user_id"], u["role"] == "admin")
+
+    report_start = week - datetime.timedelta(weeks=12)
+    admin = subjects.get("admin", subjects["employee"])
+    approver = subjects.get("approver", admin)
+    cases["reports.detailed_frame.admin"] = lambda: report_data.fetch_detailed_frame(
+        report_start, week, "All", "All", admin["user_id"], True)
+    cases["reports.detailed_frame.approver"] = lambda: report_data.fetch_detailed_frame(
+        report_start, week, "All", "All", approver["user_id"], False)
+    cases["reports.rollup_totals.admin"] = lambda: rollups.fetch_rollup_totals(
+        report_start, week, admin["user_id"], True)
+
+    emp = subjects["employee"]["user_id"]
+    cases["timesheet.week_snapshot"] = lambda: tq.fetch_week_snapshot(emp, week)
+
+    snap = tq.fetch_week_snapshot(emp, week)
+    rows = [{
+        "project_id": e["project_id"], "task_id": e["task_id"], "AssignmentId": e["AssignmentId"],
+        **{d: e[f"{d}_hours"] for d in tq.DAYS},
+    } for e in snap.entries]
+    status = snap.week_status if snap.week_status in ("draft", "submitted") else "draft"
+    cases["timesheet.save_week"] = lambda: tq.save_week_entries(emp, week, status, rows)
+    return cases
+
+
+def page_cases(subjects, week):
+    """Full script reruns through AppTest, logged in as the given user via a patched lib.auth."""
+    from streamlit.testing.v1 import AppTest
+
+    def page(script, user, state=None, fresh_session=False):
+        def new_session():
+            at = AppTest.from_file(str(ROOT / script), default_timeout=120)
+            for key, value in (state or {}).items():
+                at.session_state[key] = value
+            return at
+
+        session = [new_session()]
+
+        def rerun():
+            at = new_session() if fresh_session else session[0]
+            with mock.patch("lib.auth.get_current_user", return_value=user), \
+                 mock.patch("lib.auth.is_logged_in", return_value=True):
+                at.run()
+            if at.exception:
+                raise RuntimeError(f"{script} raised: {at.exception[0].message}")
+        return rerun
+
+    cases = {
+        "page.employee_timesheet": page("views/employee_timesheet.py", subjects["employee"],
+                                        {"ts_week_start": week}),
+    }
+    for role in ("admin", "approver"):
+        if role in subjects:
+            # AppTest cannot replay the segmented_control tab switcher into a second run,
+            # so every dashboard sample renders a new session (shared caches stay warm).
+            cases[f"page.manager_dashboard.{role}"] = page("views/manager_dashboard.py", subjects[role],
+                                                           fresh_session=True)
+    return cases
+
+
+# ========================================================
+# 3. Runner
+# ========================================================
+
+def use_database(scale, seed, end_date):
+    """Points the SQLite backend at bench_<scale>.db, generating it on first use."""
+    from utils import sqlite_backend
+
+    path = ROOT / f"bench_{scale}.db"
+    fresh = not path.exists()
+    sqlite_backend.SQLITE_PATH = str(path)
+    db.reset_pool()
+    catalog_cache.clear()
+    if fresh:
+        print(f"[{scale}] generating synthetic data into {path.name} ...", flush=True)
+        return synthetic_data.generate(scale, seed=seed, end_date=end_date)
+    return None
+
+
+def run(scales, repeat, pages=True, seed=42, end_date=None):
+    results = {"generated_at": datetime.datetime.now().isoformat(timespec="seconds"),
+               "backend": db.DB_BACKEND, "repeat": repeat, "scales": {}}
+    if db.DB_BACKEND != "sqlite":
+        scales = ["live"]
+
+    for scale in scales:
+        dataset = use_database(scale, seed, end_date) if scale != "live" else None
+        subjects, week = pick_subjects()
+        cases = query_cases(subjects, week)
+        if pages:
+            cases.update(page_cases(subjects, week))
+
+        scale_results = {}
+        for name, fn in cases.items():
+            scale_results[name] = time_case(fn, repeat)
+            print(f"[{scale}] {name:<45} p50 {scale_results[name]['p50_ms']:>9.2f} ms"
+                  f"   p95 {scale_results[name]['p95_ms']:>9.2f} ms", flush=True)
+        results["scales"][scale] = {"cases": scale_results, "dataset": dataset, "week": week.isoformat()}
+    return results
+
+
+def compare(results, baseline, factor=REGRESSION_FACTOR):
+    """Cases whose p95 grew by more than `factor` against a previous results file."""
+    regressions = []
+    for scale, data in results["scales"].items():
+        old_cases = baseline.get("scales", {}).get(scale, {}).get("cases", {})
+        for name, stats in data["cases"].items():
+            old = old_cases.get(name)
+            if old and old["p95_ms"] > 0 and stats["p95_ms"] > old["p95_ms"] * factor:
+                regressions.append({"scale": scale, "case": name,
+                                    "baseline_p95_ms": old["p95_ms"], "p95_ms": stats["p95_ms"]})
+    return regressions
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the query layer and page reruns.")
+    parser.add_argument("--scales", nargs="+", default=["small"], choices=sorted(synthetic_data.SCALES))
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--end-date", type=datetime.date.fromisoformat, default=datetime.date(2025, 6, 30),
+                        help="Last week of generated data (fixed so datasets are reproducible).")
+    parser.add_argument("--no-pages", action="store_true", help="Skip the AppTest page reruns.")
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--baseline", help="Previous results file; exit 1 if any p95 regressed.")
+    parser.add_argument("--factor", type=float, default=REGRESSION_FACTOR)
+    args = parser.parse_args()
+
+    results = run(args.scales, args.repeat, pages=not args.no_pages, seed=args.seed, end_date=args.end_date)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.factor)
+        results["regressions"] = regressions
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, default=str)
+    print(f"Wrote {args.out}")
+
+    for r in regressions:
+        print(f"REGRESSION [{r['scale']}] {r['case']}: p95 {r['baseline_p95_ms']:.2f} -> {r['p95_ms']:.2f} ms")
+    sys.exit(1 if regressions else 0)
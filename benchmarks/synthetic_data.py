@@ -0,0 +1,384 @@
+# ./benchmarks/synthetic_data.py
+"""
+Deterministic synthetic organisation for load and scaling tests.
+
+Fills Department, UserType, Employee, projects, project_approvers,
+TaskTypes, tasks, Assignments, timesheet_entries, approvals and Vacation
+through utils.db, using batched executemany inserts with explicit ids, then
+rebuilds the weekly rollup. The same seed, scale and end date always
+produce the same rows.
+
+Usually run against the SQLite stand-in:
+    TIMESHEET_DB_BACKEND=sqlite TIMESHEET_SQLITE_PATH=bench_large.db \\
+        python -m benchmarks.synthetic_data --scale large --seed 7
+
+Run it against an empty database: ids start at 1.
+"""
+import datetime
+import random
+import time
+from dataclasses import dataclass, asdict
+from lib.constants import ROLE_ID_ADMIN, ROLE_ID_DEPT_MANAGER, ROLE_ID_PROJECT_MANAGER
+from utils.db import get_connection, DB_BACKEND
+from utils import rollups
+
+BATCH_ROWS = 5000
+
+# Not a valid password hash, so synthetic accounts cannot log in
+SYNTHETIC_PASSWORD = "!synthetic"
+
+
+@dataclass
+class Scale:
+    departments: int
+    employees: int
+    projects: int
+    task_types: int
+    tasks: int
+    years: int
+    assignments_per_employee: tuple = (1, 5)   # min, max concurrent assignments
+    approvers_per_project: tuple = (1, 3)
+    billable_share: float = 0.7
+    manager_share: float = 0.06                  # employees who approve
+    vacation_weeks_per_year: int = 3
+
+
+SCALES = {
+    "small": Scale(departments=6, employees=200, projects=40, task_types=12, tasks=150, years=1),
+    "medium": Scale(departments=15, employees=1000, projects=200, task_types=30, tasks=800, years=2),
+    "large": Scale(departments=40, employees=5000, projects=800, task_types=60, tasks=3000, years=5),
+}
+
+FIRST_NAMES = ["Ahmed", "Sara", "Omar", "Mona", "Youssef", "Nour", "Karim", "Laila", "Hassan", "Dina",
+               "Mostafa", "Aya", "Tarek", "Salma", "Ali", "Hana", "Khaled", "Rana", "Amr", "Farida"]
+LAST_NAMES = ["Hassan", "Mahmoud", "Ibrahim", "Saleh", "Fahmy", "Nabil", "Adel", "Samir", "Fawzy", "Zaki",
+              "Mansour", "Shawky", "Ezzat", "Gamal", "Hamdy", "Kamel", "Lotfy", "Naguib", "Ragab", "Wahba"]
+TASK_VERBS = ["Design", "Build", "Review", "Test", "Deploy", "Document", "Support", "Analyse", "Plan", "Migrate"]
+TASK_OBJECTS = ["API", "Dashboard", "Reports", "Billing", "Onboarding", "Integration", "Data Model",
+                "Mobile App", "Infrastructure", "Security Audit", "Training", "Workshop"]
+DEPT_NAMES = ["Engineering", "Finance", "HR", "Sales", "Operations", "Marketing", "Legal", "Support",
+              "Data", "Design", "QA", "Procurement", "IT", "Research", "Delivery"]
+
+
+def _week_start(day):
+    """Monday of the week containing `day` (the timesheet page's week start)."""
+    return day - datetime.timedelta(days=day.weekday())
+
+
+# ========================================================
+# 1. Bulk Writer
+# ========================================================
+
+class _BulkWriter:
+    """Buffers rows for one table and writes them with executemany every BATCH_ROWS rows."""
+
+    def __init__(self, cur, table, columns, identity=True, parent=None):
+        self.cur = cur
+        self.table = table
+        self.identity = identity
+        self.parent = parent  # writer whose rows this table references; flushed first
+        self.sql = (f"INSERT INTO {table} ({', '.join(columns)}) "
+                    f"VALUES ({', '.join(['?'] * len(columns))})")
+        self.rows = []
+        self.count = 0
+        if DB_BACKEND == "mssql":
+            cur.fast_executemany = True
+
+    def add(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= BATCH_ROWS:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        if self.parent is not None:
+            self.parent.flush()
+        # Explicit ids keep the foreign keys deterministic
+        if self.identity and DB_BACKEND == "mssql":
+            self.cur.execute(f"SET IDENTITY_INSERT {self.table} ON")
+        self.cur.executemany(self.sql, self.rows)
+        if self.identity and DB_BACKEND == "mssql":
+            self.cur.execute(f"SET IDENTITY_INSERT {self.table} OFF")
+        self.count += len(self.rows)
+        self.rows = []
+
+
+# ========================================================
+# 2. Generator
+# ========================================================
+
+class SyntheticOrg:
+    def __init__(self, scale, seed=42, end_date=None):
+        self.scale = scale
+        self.rng = random.Random(seed)
+        self.end_week = _week_start(end_date or datetime.date.today())
+        self.start_week = self.end_week - datetime.timedelta(weeks=52 * scale.years - 1)
+        self.counts = {}
+
+    def generate(self):
+        """Writes the whole organisation in one transaction. Returns row counts per table."""
+        with get_connection() as conn:
+            cur = conn.cursor()
+            try:
+                self._reference_data(cur)
+                self._people(cur)
+                self._projects(cur)
+                self._tasks(cur)
+                self._assignments(cur)
+                self._timesheets(cur)
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                raise e
+
+        self.counts["timesheet_rollup_weekly"] = rollups.rebuild()
+        return self.counts
+
+    def _write(self, cur, table, columns, rows, identity=True):
+        writer = _BulkWriter(cur, table, columns, identity)
+        for row in rows:
+            writer.add(row)
+        writer.flush()
+        self.counts[table] = writer.count
+
+    # --- Reference data ---
+
+    def _reference_data(self, cur):
+        s = self.scale
+        names = [DEPT_NAMES[i % len(DEPT_NAMES)] + ("" if i < len(DEPT_NAMES) else f" {i // len(DEPT_NAMES) + 1}")
+                 for i in range(s.departments)]
+        self._write(cur, "Department", ["DepId", "DepName"], [(i + 1, n) for i, n in enumerate(names)])
+        self._write(cur, "UserType", ["UserTypeId", "UserTypeName"], [
+            (ROLE_ID_ADMIN, "Admin"),
+            (ROLE_ID_PROJECT_MANAGER, "Project Manager"),
+            (ROLE_ID_DEPT_MANAGER, "Department Manager"),
+        ], identity=False)
+
+        # Every third task type is global (no department)
+        self.task_type_dept = {}
+        rows = []
+        for i in range(1, s.task_types + 1):
+            dep = None if i % 3 == 0 else self.rng.randint(1, s.departments)
+            self.task_type_dept[i] = dep
+            rows.append((i, f"{TASK_OBJECTS[i % len(TASK_OBJECTS)]} Work {i}", dep))
+        self._write(cur, "TaskTypes", ["TaskTypeId", "TaskTypeName", "DepId"], rows)
+
+    # --- Employees ---
+
+    def _people(self, cur):
+        s, rng = self.scale, self.rng
+        # Department sizes follow a skewed distribution: a few big departments, many small ones
+        weights = [1.0 / (d ** 0.8) for d in range(1, s.departments + 1)]
+        n_managers = max(2, int(s.employees * s.manager_share))
+
+        self.employee_dept = {}
+        self.employee_hired = {}
+        self.project_managers, self.dept_managers = [], []
+        rows = []
+        for emp_id in range(1, s.employees + 1):
+            dep = rng.choices(range(1, s.departments + 1), weights)[0]
+            if emp_id == 1:
+                role = ROLE_ID_ADMIN
+            elif emp_id <= n_managers:
+                role = ROLE_ID_PROJECT_MANAGER if emp_id % 3 else ROLE_ID_DEPT_MANAGER
+                (self.project_managers if role == ROLE_ID_PROJECT_MANAGER else self.dept_managers).append(emp_id)
+            else:
+                role = None
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {emp_id}"
+            # Staff join over the whole period; a third were there from the start
+            hired = self.start_week if rng.random() < 0.33 else self.start_week + datetime.timedelta(
+                weeks=rng.randint(0, 52 * s.years - 1))
+            self.employee_dept[emp_id] = dep
+            self.employee_hired[emp_id] = hired
+            manager = rng.randint(2, n_managers) if emp_id > n_managers else None
+            rows.append((emp_id, name, dep, None, f"user{emp_id}@example.com", SYNTHETIC_PASSWORD,
+                         manager, 1, 100000 + emp_id, role, 0, 0))
+        self._write(cur, "Employee", [
+            "EmpId", "EmpName", "DepId", "EmpPositionId", "EmpEmail", "Password",
+            "ParentManager", "ApprovalTypeId", "SAP_ID", "UserTypeId", "IsFirstLogin", "EmailCC"
+        ], rows)
+
+    # --- Projects & approvers ---
+
+    def _projects(self, cur):
+        s, rng = self.scale, self.rng
+        self.project_billable = {}
+        self.project_dept = {}
+        rows, approver_rows = [], []
+        for pid in range(1, s.projects + 1):
+            dep = rng.randint(1, s.departments)
+            billable = rng.random() < s.billable_share
+            start = self.start_week + datetime.timedelta(weeks=rng.randint(-26, 52 * s.years - 4))
+            ended = rng.random() < 0.3 and start < self.end_week - datetime.timedelta(weeks=12)
+            end = start + datetime.timedelta(weeks=rng.randint(8, 104)) if ended else None
+            self.project_billable[pid] = billable
+            self.project_dept[pid] = dep
+            rows.append((pid, f"Project {pid:04d}", f"Client {rng.randint(1, max(1, s.projects // 4))}",
+                         start, end, "completed" if ended and end < self.end_week else "active",
+                         f"PRJ-{pid:05d}", rng.choice([500, 1000, 2000, 5000]), dep, int(billable)))
+
+            pool = self.project_managers if billable else self.dept_managers
+            pool = pool or self.project_managers or self.dept_managers
+            for approver in rng.sample(pool, min(len(pool), rng.randint(*s.approvers_per_project))):
+                approver_rows.append((pid, approver))
+
+        self._write(cur, "projects", [
+            "project_id", "project_name", "client_name", "start_date", "end_date", "status",
+            "project_number", "planned_hours", "DepId", "is_billable"
+        ], rows)
+        self._write(cur, "project_approvers", ["project_id", "user_id"], approver_rows, identity=False)
+
+    # --- Tasks ---
+
+    def _tasks(self, cur):
+        s, rng = self.scale, self.rng
+        self.tasks_by_project = {}
+        rows = []
+        for tid in range(1, s.tasks + 1):
+            pid = rng.randint(1, s.projects)
+            type_id = rng.randint(1, s.task_types)
+            self.tasks_by_project.setdefault(pid, []).append(tid)
+            rows.append((tid, f"{rng.choice(TASK_VERBS)} {rng.choice(TASK_OBJECTS)} {tid}", None, 1,
+                         pid, datetime.datetime.combine(self.start_week, datetime.time(9)), type_id))
+        self._write(cur, "tasks", [
+            "task_id", "task_name", "description", "created_by", "project_id", "created_at", "TaskTypeId"
+        ], rows)
+
+    # --- Assignments ---
+
+    def _assignments(self, cur):
+        s, rng = self.scale, self.rng
+        projects_by_dept = {}
+        for pid, dep in self.project_dept.items():
+            projects_by_dept.setdefault(dep, []).append(pid)
+        all_projects = list(self.project_dept)
+
+        self.assignments_by_emp = {}
+        rows = []
+        aid = 0
+        for emp_id in range(1, s.employees + 1):
+            # 80% of work is on the employee's own department's projects
+            own = projects_by_dept.get(self.employee_dept[emp_id]) or all_projects
+            for _ in range(rng.randint(*s.assignments_per_employee)):
+                pid = rng.choice(own) if rng.random() < 0.8 else rng.choice(all_projects)
+                task_id = rng.choice(self.tasks_by_project.get(pid) or [rng.randint(1, s.tasks)])
+                start = max(self.employee_hired[emp_id],
+                            self.start_week + datetime.timedelta(weeks=rng.randint(0, 52 * s.years - 1)))
+                end = start + datetime.timedelta(weeks=rng.randint(4, 78)) if rng.random() < 0.6 else None
+                aid += 1
+                self.assignments_by_emp.setdefault(emp_id, []).append((aid, pid, task_id, start, end))
+                rows.append((aid, pid, task_id, emp_id, None, rng.choice([40, 80, 160, 320]), None,
+                             start, end, "active"))
+        self._write(cur, "Assignments", [
+            "AssignmentId", "project_id", "task_id", "EmpId", "assignment_name", "planned_hours",
+            "notes", "start_date", "end_date", "status"
+        ], rows)
+
+    # --- Timesheets, approvals & vacations ---
+
+    def _timesheets(self, cur):
+        s, rng = self.scale, self.rng
+        entries = _BulkWriter(cur, "timesheet_entries", [
+            "entry_id", "user_id", "project_id", "task_id", "AssignmentId", "week_start_date",
+            "sunday_hours", "monday_hours", "tuesday_hours", "wednesday_hours",
+            "thursday_hours", "friday_hours", "saturday_hours",
+            "status", "notes", "created_at", "updated_at"
+        ])
+        approvals = _BulkWriter(cur, "approvals", [
+            "approval_id", "entry_id", "approver_id", "decision", "comment", "decision_ts"
+        ], parent=entries)
+        vacations = _BulkWriter(cur, "Vacation", [
+            "VacationId", "VacationDesc", "VacationTypeId", "EmpId", "IsAccepted", "[From]", "[To]",
+            "DateOfRequestingVacation", "IsMedical", "IsCancel", "Qouta"
+        ])
+
+        approvers = self.project_managers + self.dept_managers or [1]
+        n_weeks = 52 * s.years
+        entry_id = approval_id = vacation_id = 0
+        for emp_id in range(1, s.employees + 1):
+            hired = self.employee_hired[emp_id]
+            vacation_weeks = set()
+            for year in range(s.years):
+                for _ in range(s.vacation_weeks_per_year):
+                    vacation_weeks.add(year * 52 + rng.randint(0, 51))
+
+            for w in range(n_weeks):
+                week = self.start_week + datetime.timedelta(weeks=w)
+                if week < hired:
+                    continue
+                if w in vacation_weeks:
+                    vacation_id += 1
+                    vacations.add((vacation_id, "Annual leave", 1, emp_id, 1, week,
+                                   week + datetime.timedelta(days=4), week - datetime.timedelta(days=14),
+                                   0, 0, 5.0))
+                    continue
+
+                active = [a for a in self.assignments_by_emp.get(emp_id, [])
+                          if a[3] <= week and (a[4] is None or a[4] >= week)]
+                if not active:
+                    continue
+
+                age = (self.end_week - week).days // 7
+                status = self._status_for_age(age)
+                share = 8.0 / len(active)
+                for aid, pid, task_id, _, _ in active:
+                    weekdays = [max(0.0, round(rng.gauss(share, share * 0.25) * 2) / 2) for _ in range(5)]
+                    weekend = [2.0 if rng.random() < 0.05 else 0.0 for _ in range(2)]
+                    submitted = datetime.datetime.combine(week + datetime.timedelta(days=4), datetime.time(17))
+                    entry_id += 1
+                    entries.add((entry_id, emp_id, pid, task_id, aid, week,
+                                 weekend[0], *weekdays, weekend[1],
+                                 status, None, submitted, submitted + datetime.timedelta(minutes=rng.randint(0, 600))))
+
+                    if status in ("approved", "rejected"):
+                        approval_id += 1
+                        decided = submitted + datetime.timedelta(days=rng.randint(1, 6))
+                        comment = "Please fix the hours." if status == "rejected" else None
+                        approvals.add((approval_id, entry_id, rng.choice(approvers), status, comment, decided))
+
+        for writer in (entries, approvals, vacations):
+            writer.flush()
+            self.counts[writer.table] = writer.count
+
+    def _status_for_age(self, age_weeks):
+        """Old weeks are settled; the last few are still moving through approval."""
+        r = self.rng.random()
+        if age_weeks > 4:
+            return "approved" if r < 0.97 else "rejected"
+        if age_weeks > 0:
+            return "approved" if r < 0.5 else "submitted" if r < 0.9 else "rejected"
+        return "draft" if r < 0.6 else "submitted"
+
+
+def generate(scale="small", seed=42, end_date=None):
+    """Generates a synthetic organisation at a named scale (see SCALES) or a custom Scale."""
+    if isinstance(scale, str):
+        scale = SCALES[scale]
+    return SyntheticOrg(scale, seed=seed, end_date=end_date).generate()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Fill an empty database with a synthetic organisation.")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--end-date", type=datetime.date.fromisoformat, default=None,
+                        help="Last week of data (default: this week). Fix it for reproducible datasets.")
+    parser.add_argument("--employees", type=int, help="Override the scale's employee count.")
+    parser.add_argument("--projects", type=int, help="Override the scale's project count.")
+    parser.add_argument("--years", type=int, help="Override the scale's years of history.")
+    args = parser.parse_args()
+
+    scale = SCALES[args.scale]
+    overrides = {k: v for k, v in (("employees", args.employees), ("projects", args.projects),
+                                   ("years", args.years)) if v}
+    if overrides:
+        scale = Scale(**{**asdict(scale), **overrides})
+
+    started = time.perf_counter()
+    counts = generate(scale, seed=args.seed, end_date=args.end_date)
+    for table, count in counts.items():
+        print(f"{table:>26}: {count:>10,}")
+    print(f"Done in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,49 @@
+USE [att_db]
+GO
+
+/****** Object:  Table [dbo].[email_outbox]    Durable queue for notification emails ******/
+/* Rows are written inside the approval transaction and delivered by the
+   background sender in utils/email_outbox.py. */
+SET ANSI_NULLS ON
+GO
+
+SET QUOTED_IDENTIFIER ON
+GO
+
+CREATE TABLE [dbo].[email_outbox](
+	[outbox_id] [int] IDENTITY(1,1) NOT NULL,
+	[recipient] [nvarchar](320) NOT NULL,
+	[subject] [nvarchar](400) NOT NULL,
+	[body] [nvarchar](max) NOT NULL,
+	[status] [nvarchar](20) NOT NULL,
+	[attempts] [int] NOT NULL,
+	[last_error] [nvarchar](max) NULL,
+	[created_at] [datetime] NOT NULL,
+	[next_attempt_at] [datetime] NOT NULL,
+	[claimed_at] [datetime] NULL,
+	[sent_at] [datetime] NULL,
+ CONSTRAINT [PK_email_outbox] PRIMARY KEY CLUSTERED 
+(
+	[outbox_id] ASC
+)WITH (PAD_INDEX = OFF, STATISTICS_NORECOMPUTE = OFF, IGNORE_DUP_KEY = OFF, ALLOW_ROW_LOCKS = ON, ALLOW_PAGE_LOCKS = ON, OPTIMIZE_FOR_SEQUENTIAL_KEY = OFF) ON [PRIMARY]
+) ON [PRIMARY] TEXTIMAGE_ON [PRIMARY]
+GO
+
+ALTER TABLE [dbo].[email_outbox] ADD  DEFAULT ('pending') FOR [status]
+GO
+
+ALTER TABLE [dbo].[email_outbox] ADD  DEFAULT ((0)) FOR [attempts]
+GO
+
+ALTER TABLE [dbo].[email_outbox] ADD  DEFAULT (getdate()) FOR [created_at]
+GO
+
+ALTER TABLE [dbo].[email_outbox] ADD  DEFAULT (getdate()) FOR [next_attempt_at]
+GO
+
+CREATE NONCLUSTERED INDEX [IX_email_outbox_status_next_attempt] ON [dbo].[email_outbox]
+(
+	[status] ASC,
+	[next_attempt_at] ASC
+)
+GO
@@ -0,0 +1,46 @@
+USE [att_db]
+GO
+
+/****** Object:  Table [dbo].[timesheet_rollup_weekly]    Pre-aggregated hours for reports ******/
+/* One row per (week, project, employee, task type, status). Maintained
+   incrementally by the write paths (utils/rollups.py) and rebuilt with
+   `python -m utils.rollups rebuild`. TaskTypeId 0 = entry without a task. */
+SET ANSI_NULLS ON
+GO
+
+SET QUOTED_IDENTIFIER ON
+GO
+
+CREATE TABLE [dbo].[timesheet_rollup_weekly](
+	[week_start_date] [datetime] NOT NULL,
+	[project_id] [int] NOT NULL,
+	[user_id] [int] NOT NULL,
+	[TaskTypeId] [int] NOT NULL,
+	[status] [nvarchar](20) NOT NULL,
+	[is_billable] [bit] NOT NULL,
+	[total_hours] [decimal](18, 2) NOT NULL,
+	[entry_count] [int] NOT NULL,
+ CONSTRAINT [PK_timesheet_rollup_weekly] PRIMARY KEY CLUSTERED 
+(
+	[week_start_date] ASC,
+	[project_id] ASC,
+	[user_id] ASC,
+	[TaskTypeId] ASC,
+	[status] ASC
+)WITH (PAD_INDEX = OFF, STATISTICS_NORECOMPUTE = OFF, IGNORE_DUP_KEY = OFF, ALLOW_ROW_LOCKS = ON, ALLOW_PAGE_LOCKS = ON, OPTIMIZE_FOR_SEQUENTIAL_KEY = OFF) ON [PRIMARY]
+) ON [PRIMARY]
+GO
+
+CREATE NONCLUSTERED INDEX [IX_timesheet_rollup_weekly_user_week] ON [dbo].[timesheet_rollup_weekly]
+(
+	[user_id] ASC,
+	[week_start_date] ASC
+)
+GO
+
+CREATE NONCLUSTERED INDEX [IX_timesheet_rollup_weekly_project] ON [dbo].[timesheet_rollup_weekly]
+(
+	[project_id] ASC
+)
+INCLUDE ([is_billable])
+GO
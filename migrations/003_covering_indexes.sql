@@ -0,0 +1,97 @@
+USE [att_db]
+GO
+
+/****** Covering indexes for the hot read paths ******/
+/* Until now every table had only its clustered primary key, so the
+   employee week load, the approvals queue and the report ranges were all
+   scans. Each index below serves one access pattern of utils/*_queries.py
+   and lib/*_queries.py; `python -m benchmarks.plan_check` fails if one of
+   those queries goes back to scanning. Applied by `python -m utils.migrate up`. */
+SET ANSI_NULLS ON
+GO
+
+SET QUOTED_IDENTIFIER ON
+GO
+
+/* nvarchar(max) cannot be an index key; statuses are draft / submitted / approved / rejected */
+ALTER TABLE [dbo].[timesheet_entries] ALTER COLUMN [status] [nvarchar](20) NOT NULL
+GO
+
+/* Employee week load and save: WHERE user_id = ? AND week_start_date = ? */
+CREATE NONCLUSTERED INDEX [IX_timesheet_entries_user_week] ON [dbo].[timesheet_entries]
+(
+	[user_id] ASC,
+	[week_start_date] ASC
+)
+INCLUDE ([project_id], [task_id], [AssignmentId], [status], [updated_at])
+GO
+
+/* Manager approvals queue: project scope + status filter, newest first (keyset on updated_at, entry_id) */
+CREATE NONCLUSTERED INDEX [IX_timesheet_entries_project_status_updated] ON [dbo].[timesheet_entries]
+(
+	[project_id] ASC,
+	[status] ASC,
+	[updated_at] DESC,
+	[entry_id] DESC
+)
+INCLUDE ([user_id], [task_id], [week_start_date], [total_hours])
+GO
+
+/* Admin approvals queue (no project scope) and delta refreshes: ORDER BY updated_at DESC, entry_id DESC */
+CREATE NONCLUSTERED INDEX [IX_timesheet_entries_updated] ON [dbo].[timesheet_entries]
+(
+	[updated_at] DESC,
+	[entry_id] DESC
+)
+INCLUDE ([user_id], [project_id], [task_id], [week_start_date], [status], [total_hours])
+GO
+
+/* Report date ranges: WHERE week_start_date BETWEEN ? AND ? */
+CREATE NONCLUSTERED INDEX [IX_timesheet_entries_week] ON [dbo].[timesheet_entries]
+(
+	[week_start_date] ASC
+)
+INCLUDE ([user_id], [project_id], [task_id], [status], [total_hours])
+GO
+
+/* Employee assignments active in a week: WHERE EmpId = ? AND start_date <= ? AND end_date >= ? */
+CREATE NONCLUSTERED INDEX [IX_Assignments_emp_dates] ON [dbo].[Assignments]
+(
+	[EmpId] ASC,
+	[start_date] ASC,
+	[end_date] ASC
+)
+INCLUDE ([project_id], [task_id], [status])
+GO
+
+/* Manager assignment list: WHERE project_id IN (allowed projects) */
+CREATE NONCLUSTERED INDEX [IX_Assignments_project] ON [dbo].[Assignments]
+(
+	[project_id] ASC
+)
+INCLUDE ([task_id], [EmpId])
+GO
+
+/* Latest decision per entry and decision deltas: WHERE entry_id = ? [AND decision_ts >= ?] */
+CREATE NONCLUSTERED INDEX [IX_approvals_entry_decision] ON [dbo].[approvals]
+(
+	[entry_id] ASC,
+	[decision_ts] ASC
+)
+INCLUDE ([approver_id])
+GO
+
+/* Department rosters */
+CREATE NONCLUSTERED INDEX [IX_Employee_DepId] ON [dbo].[Employee]
+(
+	[DepId] ASC
+)
+GO
+
+/* Approver -> projects (the clustered key leads with project_id) */
+CREATE NONCLUSTERED INDEX [IX_project_approvers_user] ON [dbo].[project_approvers]
+(
+	[user_id] ASC,
+	[project_id] ASC
+)
+GO
@@ -1,10 +1,12 @@
 # ./tabs/tab_approvals.py
 import streamlit as st
 import pandas as pd
+import time
 from datetime import date, timedelta
 from utils import manager_queries as mq
+from utils import access_control
+from utils import catalog_cache
 from utils.state_helpers import clear_other_dialogs, reset_dialog_state
-from lib.constants import ROLE_ID_ADMIN, ROLE_ID_DEPT_MANAGER, ROLE_ID_PROJECT_MANAGER
 
 # ========================================================
 # 🎨 Dialogs
@@ -120,6 +122,8 @@ def edit_entry_dialog(entry_summary, admin_user_id):
                     **new_hours
                 }
                 mq.update_timesheet_entry_full(data)
+                # Admin edits can move an entry to another project; reload the list in full
+                invalidate_approvals_cache()
                 st.success("Entry updated successfully!")
                 
                 if "edit_entry_info" in st.session_state:
@@ -204,6 +208,176 @@ def admin_insert_entry_dialog(admin_user_id):
 # Main Render
 # ========================================================
 
+APPROVALS_PAGE_SIZE = 50
+
+# Grid mode: one selectable st.dataframe per page instead of a columns row and
+# buttons per entry, so a page costs the same few elements however long it is.
+# Bulk approve / reject is the grid's selection (grid_decide); the row layout
+# only has per-entry buttons.
+APPROVALS_GRID_MODE = True
+APPROVALS_GRID_PAGE_SIZE = 500
+
+# Delta sync: keep the current page in the session and, on later reruns,
+# fetch only the entries changed since the last server-time high-water mark.
+APPROVALS_DELTA_SYNC = True
+# Deltas cannot see deleted entries, so the page is still reloaded in full this often
+APPROVALS_FULL_RELOAD_SECONDS = 300
+
+# Widget keys whose values must survive while the tab is hidden (lazy dashboard)
+STATE_KEYS = [
+    "approvals_emp_filter", "approvals_proj_filter", "approvals_status_filter",
+    "approvals_week_filter", "approvals_grid_reason",
+]
+
+def reset_approvals_page():
+    """Filter changes invalidate the keyset cursors, so jump back to page 1."""
+    reset_dialog_state()
+    reset_grid_selection()
+    st.session_state.pop("approvals_page_cursors", None)
+
+def reset_grid_selection():
+    """Selections can't be written through session_state, so a new widget key clears them."""
+    st.session_state["approvals_grid_version"] = st.session_state.get("approvals_grid_version", 0) + 1
+
+def grid_decide(approver_id, new_status, entry_ids):
+    """on_click callback for the grid buttons: one set-based update for the selected pending rows."""
+    comment = (st.session_state.get("approvals_grid_reason") or "").strip() or None
+    if not entry_ids:
+        return
+    if new_status == 'rejected' and not comment:
+        st.toast("A reason is required to reject.", icon="⚠️")
+        return
+
+    count = mq.bulk_update_entry_status(entry_ids, approver_id, new_status, comment)
+    st.session_state["approvals_grid_reason"] = ""
+    reset_grid_selection()
+    st.toast(f"{count} entries {new_status}.", icon="✅" if new_status == 'approved' else "❌")
+
+def grid_edit(row):
+    clear_other_dialogs("edit_entry_info")
+    st.session_state.edit_entry_info = row
+    reset_grid_selection()
+
+def render_grid(df, approver_id, is_admin):
+    """The page as one selectable table; the selected rows drive approve, reject and (admin) edit."""
+    view = pd.DataFrame({
+        "Employee": df["employee_name"],
+        "Project": df["project_name"],
+        "Task": df["task_name"].fillna("--"),
+        "Week": df["week_start_date"],
+        "Hrs": df["total_hours"].astype(float),
+        "Status": df["status"],
+        "Updated": df["updated_at"],
+    })
+    event = st.dataframe(
+        view,
+        key=f"approvals_grid_{st.session_state.get('approvals_grid_version', 0)}",
+        on_select="rerun",
+        selection_mode="multi-row",
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            "Hrs": st.column_config.NumberColumn(format="%.2f"),
+            "Updated": st.column_config.DatetimeColumn(format="YYYY-MM-DD HH:mm"),
+        },
+    )
+
+    records = df.to_dict("records")
+    selected = [records[i] for i in event.selection.rows if i < len(records)]
+    pending_ids = [r['entry_id'] for r in selected if r['status'] not in ("approved", "rejected")]
+
+    gc1, gc2, gc3, gc4 = st.columns([3, 1, 1, 1])
+    gc1.text_input(
+        "Rejection Reason (required to reject)", key="approvals_grid_reason",
+        label_visibility="collapsed", placeholder="Rejection reason (required to reject)"
+    )
+    gc2.button(
+        f"✅ Approve ({len(pending_ids)})", type="primary", disabled=not pending_ids,
+        on_click=grid_decide, args=(approver_id, 'approved', pending_ids), use_container_width=True
+    )
+    gc3.button(
+        f"❌ Reject ({len(pending_ids)})", disabled=not pending_ids,
+        on_click=grid_decide, args=(approver_id, 'rejected', pending_ids), use_container_width=True
+    )
+    if is_admin:
+        gc4.button(
+            "✏️ Edit", disabled=len(selected) != 1,
+            on_click=grid_edit, args=(selected[0] if len(selected) == 1 else None,),
+            use_container_width=True
+        )
+    if selected and len(pending_ids) < len(selected):
+        st.caption(f"{len(selected) - len(pending_ids)} selected entries are already decided and are skipped.")
+
+def render_page_nav(cursors, next_cursor):
+    """Previous / Next controls. `cursors` is the stack of page-start keys."""
+    if not cursors and not next_cursor:
+        return
+    nc1, nc2, nc3 = st.columns([1, 2, 1])
+    if cursors and nc1.button("◀ Previous Page", key="approvals_prev_page"):
+        cursors.pop()
+        reset_grid_selection()
+        st.rerun()
+    nc2.caption(f"Page {len(cursors) + 1}")
+    if next_cursor and nc3.button("Next Page ▶", key="approvals_next_page"):
+        cursors.append(next_cursor)
+        reset_grid_selection()
+        st.rerun()
+
+def invalidate_approvals_cache():
+    st.session_state.pop("approvals_cache", None)
+
+def _sort_key(row):
+    return (row['updated_at'], row['entry_id'])
+
+def load_approvals_page(user_id, role_id, filters, cursors, page_size=APPROVALS_PAGE_SIZE):
+    """
+    Returns (entries, has_next_page) for the current page, newest first.
+    The first load of a page (or a filter / page change) fetches it in full;
+    later reruns merge in only the entries changed since the high-water mark.
+    """
+    after = cursors[-1] if cursors else None
+    key = (tuple(sorted(filters.items())), after)
+    cache = st.session_state.get("approvals_cache")
+
+    if (not APPROVALS_DELTA_SYNC or cache is None or cache["key"] != key
+            or time.monotonic() - cache["loaded_at"] > APPROVALS_FULL_RELOAD_SECONDS):
+        watermark = mq.fetch_server_time()
+        entries = mq.fetch_submitted_weekly_entries(
+            user_id, role_id, **filters, page_size=page_size + 1, after=after
+        )
+        has_next = len(entries) > page_size
+        entries = entries[:page_size]
+        st.session_state["approvals_cache"] = {
+            "key": key, "rows": entries, "has_next": has_next,
+            "watermark": watermark, "loaded_at": time.monotonic(),
+        }
+        return entries, has_next
+
+    watermark = mq.fetch_server_time()
+    # Status is what changes, so it is filtered here rather than in SQL
+    changed = mq.fetch_submitted_weekly_entries(
+        user_id, role_id, **{k: v for k, v in filters.items() if k != "status"},
+        changed_since=cache["watermark"]
+    )
+    if changed:
+        rows = {r['entry_id']: r for r in cache["rows"]}
+        # A full page ends at its last row; anything older belongs to the next page
+        lower = _sort_key(cache["rows"][-1]) if cache["has_next"] and cache["rows"] else None
+        for r in changed:
+            rows.pop(r['entry_id'], None)
+            if filters["status"] and r['status'] != filters["status"]:
+                continue
+            if (after and _sort_key(r) >= tuple(after)) or (lower and _sort_key(r) < lower):
+                continue
+            rows[r['entry_id']] = r
+        merged = sorted(rows.values(), key=_sort_key, reverse=True)
+        cache["has_next"] = cache["has_next"] or len(merged) > page_size
+        cache["rows"] = merged[:page_size]
+        # Grid selections are row positions, which the merge may have shifted
+        reset_grid_selection()
+    cache["watermark"] = watermark
+    return cache["rows"], cache["has_next"]
+
 def render(user, is_admin=False):
     c1, c2 = st.columns([3, 1])
     c1.subheader("Pending & Submitted Timesheets")
@@ -213,6 +387,9 @@ def render(user, is_admin=False):
         rc1, rc2 = st.columns([1, 1])
         if rc1.button("🔄 Refresh"):
             reset_dialog_state()
+            access_control.invalidate_scope(user['user_id'])
+            catalog_cache.invalidate("timesheet_entries")
+            invalidate_approvals_cache()
             st.rerun()
         
         # --- NEW BUTTON FOR ADMIN ---
@@ -226,109 +403,110 @@ def render(user, is_admin=False):
     if st.session_state.get("show_admin_entry_dialog"):
         admin_insert_entry_dialog(user['user_id'])
 
-    # Determine Role ID robustly
-    role_id = user.get('role_id')
-    if role_id is None:
-        if user.get('role') == 'admin': 
-            role_id = ROLE_ID_ADMIN
-        elif user.get('role') == 'dept_manager': 
-            role_id = ROLE_ID_DEPT_MANAGER
-        else: 
-            role_id = ROLE_ID_PROJECT_MANAGER
-
-    # Fetch entries (SQL should filter, but we will double check)
-    entries = mq.fetch_submitted_weekly_entries(user['user_id'], role_id)
-    
-    # --- Strict Logic: Fetch Allowed Projects for this User ---
-    allowed_projects = mq.fetch_approver_projects(user['user_id'], is_admin)
-    allowed_project_names = [p['project_name'] for p in allowed_projects]
-    
+    # Allowed-project set (role included) from the shared ACL cache, applied in SQL by the queries below
+    role_id = access_control.role_id_for(user)
+    scope = access_control.get_scope(user['user_id'], role_id)
+
+    # --- Filters Section (applied in SQL) ---
+    fc1, fc2, fc3, fc4 = st.columns(4)
+
+    emp_opts = {e['EmpId']: e['EmpName'] for e in mq.fetch_entry_employees(user['user_id'], role_id)}
+    emp_filter = fc1.selectbox(
+        "Employee", 
+        ["All"] + list(emp_opts.keys()), 
+        format_func=lambda x: "All" if x == "All" else emp_opts[x],
+        key="approvals_emp_filter", 
+        on_change=reset_approvals_page
+    )
+
+    proj_opts = {p['project_id']: p['project_name'] for p in scope.projects}
+    proj_filter = fc2.selectbox(
+        "Project", 
+        ["All"] + list(proj_opts.keys()), 
+        format_func=lambda x: "All" if x == "All" else proj_opts[x],
+        key="approvals_proj_filter",
+        on_change=reset_approvals_page
+    )
+
+    status_filter = fc3.selectbox(
+        "Status", 
+        ["All", "draft", "submitted", "approved", "rejected"], 
+        key="approvals_status_filter",
+        on_change=reset_approvals_page
+    )
+
+    week_range = fc4.date_input(
+        "Week Range",
+        value=(),
+        key="approvals_week_filter",
+        on_change=reset_approvals_page
+    )
+    week_from = week_range[0] if len(week_range) > 0 else None
+    week_to = week_range[1] if len(week_range) > 1 else None
+
+    # --- Fetch one page (keyset pagination on updated_at, entry_id; delta-synced) ---
+    cursors = st.session_state.setdefault("approvals_page_cursors", [])
+    filters = {
+        "employee_id": None if emp_filter == "All" else emp_filter,
+        "project_id": None if proj_filter == "All" else proj_filter,
+        "status": None if status_filter == "All" else status_filter,
+        "week_from": week_from,
+        "week_to": week_to,
+    }
+    page_size = APPROVALS_GRID_PAGE_SIZE if APPROVALS_GRID_MODE else APPROVALS_PAGE_SIZE
+    entries, has_next_page = load_approvals_page(user['user_id'], role_id, filters, cursors, page_size)
+
     if not entries:
         st.info("No pending timesheets.")
+        render_page_nav(cursors, None)
     else:
         df = pd.DataFrame(entries)
-        
-        # STRICT FILTER: Ensure we only show allowed projects
-        if not is_admin:
-            df = df[df['project_name'].isin(allowed_project_names)]
-            
-        if df.empty:
-            st.info("No pending timesheets for your assigned projects.")
+
+        last = entries[-1]
+        next_cursor = (last['updated_at'], last['entry_id']) if has_next_page else None
+
+        if APPROVALS_GRID_MODE:
+            render_grid(df, user['user_id'], is_admin)
+            render_page_nav(cursors, next_cursor)
             return
 
-        # --- Filters Section (FIXED LAYOUT) ---
-        fc1, fc2, fc3 = st.columns(3)
-        
-        unique_emps = sorted(df["employee_name"].unique().tolist())
-        
-        emp_filter = fc1.selectbox(
-            "Employee", 
-            ["All"] + unique_emps, 
-            key="approvals_emp_filter", 
-            on_change=reset_dialog_state
-        )
-        
-        unique_visible_projects = sorted(df["project_name"].unique().tolist())
-        proj_filter = fc2.selectbox(
-            "Project", 
-            ["All"] + unique_visible_projects, 
-            key="approvals_proj_filter",
-            on_change=reset_dialog_state
-        )
-        
-        status_filter = fc3.selectbox(
-            "Status", 
-            ["All", "draft", "submitted", "approved", "rejected"], 
-            key="approvals_status_filter",
-            on_change=reset_dialog_state
-        )
-        
-        # Apply UI Filters
-        filtered = df.copy()
-        if emp_filter != "All": filtered = filtered[filtered["employee_name"] == emp_filter]
-        if proj_filter != "All": filtered = filtered[filtered["project_name"] == proj_filter]
-        if status_filter != "All": filtered = filtered[filtered["status"] == status_filter]
-
-        if filtered.empty:
-            st.warning("No matches found.")
+        if is_admin:
+            cols = st.columns([3, 3, 2, 2, 1.5, 1.5, 1])
+            headers = ["Employee", "Project / Task", "Week", "Hrs", "Approve", "Reject", "Edit"]
         else:
+            cols = st.columns([3, 3, 2, 2, 2, 2])
+            headers = ["Employee", "Project / Task", "Week", "Hrs", "Approve", "Reject"]
+            
+        for c, h in zip(cols, headers): c.write(f"**{h}**")
+
+        for row in df.to_dict("records"):
             if is_admin:
-                cols = st.columns([3, 3, 2, 2, 1.5, 1.5, 1])
-                headers = ["Employee", "Project / Task", "Week", "Hrs", "Approve", "Reject", "Edit"]
+                c = st.columns([3, 3, 2, 2, 1.5, 1.5, 1])
             else:
-                cols = st.columns([3, 3, 2, 2, 2, 2])
-                headers = ["Employee", "Project / Task", "Week", "Hrs", "Approve", "Reject"]
-                
-            for c, h in zip(cols, headers): c.write(f"**{h}**")
-
-            for row in filtered.to_dict("records"):
-                if is_admin:
-                    c = st.columns([3, 3, 2, 2, 1.5, 1.5, 1])
-                else:
-                    c = st.columns([3, 3, 2, 2, 2, 2])
-                    
-                c[0].write(row['employee_name'])
-                c[1].write(f"{row['project_name']} / {row['task_name'] or '--'}")
-                c[2].write(str(row['week_start_date']))
-                c[3].write(f"{row['total_hours']:.2f}")
-
-                if row["status"] == "approved":
-                    c[4].success("Approved")
-                elif row["status"] == "rejected":
-                    c[5].error("Rejected")
-                else:
-                    if c[4].button("✅", key=f"app_{row['entry_id']}"):
-                        mq.update_entry_status(row['entry_id'], user['user_id'], 'approved')
-                        st.rerun()
-                    if c[5].button("❌", key=f"rej_{row['entry_id']}"):
-                        clear_other_dialogs("reject_entry_info")
-                        st.session_state.reject_entry_info = row
-                        st.rerun()
+                c = st.columns([3, 3, 2, 2, 2, 2])
                 
-                if is_admin:
-                    if c[6].button("✏️", key=f"adm_edit_{row['entry_id']}"):
-                        clear_other_dialogs("edit_entry_info")
-                        st.session_state.edit_entry_info = row
-                        st.rerun()
+            c[0].write(row['employee_name'])
+            c[1].write(f"{row['project_name']} / {row['task_name'] or '--'}")
+            c[2].write(str(row['week_start_date']))
+            c[3].write(f"{row['total_hours']:.2f}")
+
+            if row["status"] == "approved":
+                c[4].success("Approved")
+            elif row["status"] == "rejected":
+                c[5].error("Rejected")
+            else:
+                if c[4].button("✅", key=f"app_{row['entry_id']}"):
+                    mq.update_entry_status(row['entry_id'], user['user_id'], 'approved')
+                    st.rerun()
+                if c[5].button("❌", key=f"rej_{row['entry_id']}"):
+                    clear_other_dialogs("reject_entry_info")
+                    st.session_state.reject_entry_info = row
+                    st.rerun()
+            
+            if is_admin:
+                if c[6].button("✏️", key=f"adm_edit_{row['entry_id']}"):
+                    clear_other_dialogs("edit_entry_info")
+                    st.session_state.edit_entry_info = row
+                    st.rerun()
 
-                        
\ No newline at end of file
+        render_page_nav(cursors, next_cursor)
@@ -2,7 +2,7 @@
 import streamlit as st
 from datetime import date
 from utils import manager_queries as mq
-from utils.state_helpers import clear_other_dialogs
+from utils.state_helpers import clear_other_dialogs, tab_result, drop_tab_results
 
 # ==================================================
 # Dialogs
@@ -91,6 +91,7 @@ def assignment_wizard_dialog(user_id, is_admin):
             "status": "active"
         }
         mq.upsert_assignment(data)
+        drop_tab_results()
         st.success("Assignment created!")
         
         # CLOSE DIALOG
@@ -186,6 +187,7 @@ def edit_assignment_dialog(assign, user_id, is_admin):
                 "status": status
             }
             mq.upsert_assignment(data)
+            drop_tab_results()
             st.success("Updated!")
             
             # CLOSE DIALOG
@@ -200,6 +202,7 @@ def confirm_delete_dialog(assign):
     col1, col2 = st.columns(2)
     if col1.button("Yes, Delete", type="primary"):
         mq.delete_assignment(assign['AssignmentId'])
+        drop_tab_results()
         st.success("Deleted.")
         
         if "del_assign" in st.session_state:
@@ -245,7 +248,7 @@ def render(user, is_admin):
         st.rerun()
 
     # Passed is_admin to fetch ALL assignments if admin
-    assignments = mq.get_all_assignments_for_manager(user['user_id'], is_admin)
+    assignments = tab_result("assignments", lambda: mq.get_all_assignments_for_manager(user['user_id'], is_admin))
     
     if not assignments:
         st.info("No active assignments found.")
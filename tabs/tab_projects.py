@@ -3,8 +3,12 @@ import streamlit as st
 import pandas as pd
 from datetime import date
 from lib import admin_queries as aq
-from lib.db import get_connection # Added import
-from utils.state_helpers import clear_other_dialogs
+from utils.db import get_connection
+from utils import catalog_cache
+from utils import rollups
+from utils import access_control
+from utils import manager_queries as mq
+from utils.state_helpers import clear_other_dialogs, tab_result, drop_tab_results
 
 # ================================================================
 # 🛠️ Helpers
@@ -51,7 +55,7 @@ def project_form_dialog(project_id=None):
         is_billable = c8.checkbox("Billable Project", value=project.get("is_billable", True))
 
         # Departments
-        depts = aq.fetch_departments()
+        depts = mq.fetch_departments()
         dept_opts = {d['DepId']: d['DepName'] for d in depts}
         
         curr_dept = project.get("DepId")
@@ -100,6 +104,11 @@ def project_form_dialog(project_id=None):
                 try:
                     # FIX: Passed project_id as the first argument
                     aq.upsert_project(project_id, data, selected_approver_ids)
+                    catalog_cache.invalidate("projects", "timesheet_entries")
+                    access_control.invalidate_scope()
+                    drop_tab_results()
+                    if project_id:
+                        rollups.refresh_project_billable(project_id)
                     st.success("Project saved successfully!")
                     
                     if "show_project_dialog" in st.session_state:
@@ -141,6 +150,9 @@ def confirm_delete_dialog(project):
     col1, col2 = st.columns(2)
     if col1.button("Yes, Delete", type="primary"):
         aq.delete_project(project['project_id'])
+        catalog_cache.invalidate("projects", "timesheet_entries")
+        access_control.invalidate_scope()
+        drop_tab_results()
         st.success("Deleted.")
         if "delete_project_info" in st.session_state:
             del st.session_state["delete_project_info"]
@@ -171,7 +183,7 @@ def render():
     for col, h in zip(cols, headers):
         col.write(f"**{h}**")
     
-    all_projects = aq.list_projects()
+    all_projects = tab_result("projects", aq.list_projects)
     
     if not all_projects:
         st.info("No projects found.")
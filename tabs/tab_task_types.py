@@ -1,7 +1,9 @@
 # ./tabs/tab_task_types.py
 import streamlit as st
 from lib import admin_queries as aq
-from utils.state_helpers import clear_other_dialogs
+from utils import catalog_cache
+from utils import manager_queries as mq
+from utils.state_helpers import clear_other_dialogs, tab_result, drop_tab_results
 
 @st.dialog("Task Type Form")
 def task_type_dialog(type_id=None):
@@ -11,7 +13,7 @@ def task_type_dialog(type_id=None):
     st.subheader(f"{'Edit' if is_edit else 'Add'} Task Type")
     
     # Fetch Departments for Dropdown
-    departments = aq.fetch_departments()
+    departments = mq.fetch_departments()
     dep_opts = {d['DepId']: d['DepName'] for d in departments}
     # Add a "None/Global" option if you want Task Types to be optional
     # dep_opts[None] = "Global / No Department"
@@ -42,6 +44,8 @@ def task_type_dialog(type_id=None):
                 try:
                     # Pass selected_dep_id to upsert
                     aq.upsert_task_type(type_id, name, selected_dep_id)
+                    catalog_cache.invalidate("TaskTypes")
+                    drop_tab_results()
                     st.success("Saved successfully!")
                     
                     if "show_type_dialog" in st.session_state:
@@ -64,7 +68,7 @@ def render():
             st.session_state.show_type_dialog = True
             st.rerun()
 
-    types = aq.fetch_task_types()
+    types = tab_result("task_types", aq.fetch_task_types)
     
     if not types:
         st.info("No task types found.")
@@ -1,7 +1,7 @@
 # ./tabs/tab_tasks.py
 import streamlit as st
 from utils import manager_queries as mq
-from utils.state_helpers import clear_other_dialogs
+from utils.state_helpers import clear_other_dialogs, tab_result, drop_tab_results
 
 @st.dialog("Task Form")
 def task_form_dialog(task_id, user_id):
@@ -42,6 +42,7 @@ def task_form_dialog(task_id, user_id):
                     "created_by": user_id
                 }
                 mq.upsert_task(data)
+                drop_tab_results()
                 st.success("Task saved successfully!")
                 
                 # Close dialog
@@ -60,6 +61,7 @@ def confirm_delete_dialog(task):
     if col1.button("Yes, Delete", type="primary"):
         try:
             mq.delete_task(task['task_id'])
+            drop_tab_results()
             st.success("Task deleted.")
             
             if "delete_def_info" in st.session_state:
@@ -83,7 +85,7 @@ def render(user):
         st.session_state.show_task_dialog = True
         st.rerun() # Force rerun to update state immediately
 
-    tasks = mq.get_tasks_for_manager(user['user_id'])
+    tasks = tab_result("tasks", lambda: mq.get_tasks_for_manager(user['user_id']))
     
     if not tasks:
         st.info("No tasks defined.")
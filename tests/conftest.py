@@ -0,0 +1,79 @@
+# ./tests/conftest.py
+"""
+Shared fixtures. Tests run against the SQLite stand-in (utils.sqlite_backend),
+each on a fresh database file, so no SQL Server is needed. Where the lib/
+package isn't installed, the role ids it provides are filled in below; the
+tested code only compares them, so their values don't matter.
+"""
+import os
+import sys
+import types
+from pathlib import Path
+
+os.environ["TIMESHEET_DB_BACKEND"] = "sqlite"
+os.environ.setdefault("OUTBOX_WORKER_ENABLED", "0")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+try:
+    import lib.constants  # noqa: F401
+except ModuleNotFoundError:
+    lib_pkg = sys.modules.setdefault("lib", types.ModuleType("lib"))
+    lib_pkg.__path__ = []
+    constants = types.ModuleType("lib.constants")
+    constants.ROLE_ID_ADMIN, constants.ROLE_ID_PROJECT_MANAGER, constants.ROLE_ID_DEPT_MANAGER = 1, 2, 3
+    lib_pkg.constants = sys.modules["lib.constants"] = constants
+
+import datetime
+import pytest
+from utils import catalog_cache, db, sqlite_backend
+
+WEEK = datetime.date(2025, 6, 30)  # a Monday, like every week_start_date the app computes
+EMP_ID = 1
+
+
+@pytest.fixture
+def sqlite_db(tmp_path, monkeypatch):
+    """
+    A fresh database with one employee, two projects and three tasks;
+    the employee is assigned to (1, 1) and (1, 2). Returns {(project, task): AssignmentId}.
+    """
+    monkeypatch.setattr(sqlite_backend, "SQLITE_PATH", str(tmp_path / "timesheet.db"))
+    db.reset_pool()
+    catalog_cache.clear()
+
+    with db.get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("INSERT INTO Department (DepId, DepName) VALUES (1, 'Engineering')")
+        cur.execute("""
+            INSERT INTO Employee (EmpId, EmpName, DepId, EmpEmail, Password, ApprovalTypeId, SAP_ID, IsFirstLogin)
+            VALUES (?, 'Test Employee', 1, 'employee@example.com', 'x', 1, 1, 0)
+        """, (EMP_ID,))
+        cur.execute("INSERT INTO projects (project_id, project_name, DepId) VALUES (1, 'Alpha', 1), (2, 'Beta', 1)")
+        cur.execute("INSERT INTO TaskTypes (TaskTypeId, TaskTypeName, DepId) VALUES (1, 'Build', 1)")
+        for task_id in (1, 2, 3):
+            cur.execute(
+                "INSERT INTO tasks (task_id, task_name, created_at, TaskTypeId) VALUES (?, ?, GETDATE(), 1)",
+                (task_id, f"Task {task_id}")
+            )
+        assignments = {}
+        for project_id, task_id in ((1, 1), (1, 2)):
+            cur.execute("""
+                INSERT INTO Assignments (project_id, task_id, EmpId, planned_hours)
+                OUTPUT INSERTED.AssignmentId
+                VALUES (?, ?, ?, 40)
+            """, (project_id, task_id, EMP_ID))
+            assignments[(project_id, task_id)] = int(cur.fetchone()[0])
+        conn.commit()
+
+    yield assignments
+    db.reset_pool()
+    catalog_cache.clear()
+
+
+def week_row(project_id, task_id, assignment_id, **hours):
+    """A save_week_entries row; day hours default to 0."""
+    return {
+        "project_id": project_id, "task_id": task_id, "AssignmentId": assignment_id,
+        **{d: float(hours.get(d, 0)) for d in
+           ("sunday", "monday", "tuesday", "wednesday", "thursday", "friday", "saturday")},
+    }
@@ -0,0 +1,25 @@
+# ./tests/test_assignment_resolver.py
+import datetime
+from conftest import EMP_ID, WEEK
+from utils.db import get_connection
+from utils import assignment_resolver
+
+
+def test_resolve_one_prefers_the_assignment_active_that_week(sqlite_db):
+    earlier = sqlite_db[(1, 1)]
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("UPDATE Assignments SET end_date = ? WHERE AssignmentId = ?",
+                    (WEEK - datetime.timedelta(days=7), earlier))
+        cur.execute("""
+            INSERT INTO Assignments (project_id, task_id, EmpId, planned_hours, start_date)
+            OUTPUT INSERTED.AssignmentId
+            VALUES (1, 1, ?, 10, ?)
+        """, (EMP_ID, WEEK))
+        later = int(cur.fetchone()[0])
+        conn.commit()
+
+        assert assignment_resolver.resolve_one(cur, EMP_ID, 1, 1) == earlier
+        assert assignment_resolver.resolve_one(cur, EMP_ID, 1, 1, WEEK) == later
+        assert assignment_resolver.resolve_one(cur, EMP_ID, 1, 1, WEEK - datetime.timedelta(days=7)) == earlier
+        assert assignment_resolver.resolve_one(cur, EMP_ID, 2, 3, WEEK) is None
@@ -0,0 +1,135 @@
+# ./tests/test_email_outbox.py
+import datetime
+from utils.db import get_connection
+from utils.email_outbox import OutboxWorker, enqueue_emails, queue_depth
+
+
+class FakeSender:
+    """Records sends; fails for recipients listed in failing."""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.sent = []
+        self.closed = 0
+
+    def send(self, recipient, subject, body):
+        if recipient in self.failing:
+            raise ConnectionError(f"refused {recipient}")
+        self.sent.append((recipient, subject, body))
+
+    def close(self):
+        self.closed += 1
+
+
+def enqueue(*messages):
+    with get_connection() as conn:
+        cur = conn.cursor()
+        count = enqueue_emails(cur, messages)
+        conn.commit()
+    return count
+
+
+def outbox():
+    """{recipient: (status, attempts, last_error, seconds until next_attempt_at)}"""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT recipient, status, attempts, last_error, next_attempt_at FROM email_outbox")
+        rows = cur.fetchall()
+    now = datetime.datetime.now()
+    return {r: (s, a, e, (n - now).total_seconds()) for r, s, a, e, n in rows}
+
+
+def make_worker(sender, **kwargs):
+    return OutboxWorker(sender=sender, backoff_seconds=30, backoff_max_seconds=100, **kwargs)
+
+
+def test_enqueue_skips_messages_without_a_recipient(sqlite_db):
+    assert enqueue(("a@example.com", "Hi", "<p>1</p>"), (None, "Hi", "<p>2</p>"), ("", "Hi", "<p>3</p>")) == 1
+    assert queue_depth() == 1
+
+
+def test_enqueue_rolls_back_with_the_callers_transaction(sqlite_db):
+    with get_connection() as conn:
+        cur = conn.cursor()
+        enqueue_emails(cur, [("a@example.com", "Hi", "<p>1</p>")])
+        conn.rollback()
+    assert queue_depth() == 0
+
+
+def test_drain_sends_due_messages_once(sqlite_db):
+    enqueue(("a@example.com", "Approved", "<p>a</p>"), ("b@example.com", "Rejected", "<p>b</p>"))
+    sender = FakeSender()
+    worker = make_worker(sender)
+
+    assert worker.drain_once() == 2
+    assert sorted(r for r, _, _ in sender.sent) == ["a@example.com", "b@example.com"]
+    assert {r: row[:2] for r, row in outbox().items()} == {"a@example.com": ("sent", 1), "b@example.com": ("sent", 1)}
+    assert queue_depth() == 0
+
+    assert worker.drain_once() == 0
+    assert len(sender.sent) == 2
+    assert worker.stats()["sent"] == 2
+
+
+def test_claim_respects_the_batch_size(sqlite_db):
+    enqueue(*[(f"u{i}@example.com", "Hi", "<p/>") for i in range(3)])
+    worker = make_worker(FakeSender(), batch_size=2)
+    assert worker.drain_once() == 2
+    assert worker.drain_once() == 1
+    assert queue_depth() == 0
+
+
+def test_failed_send_is_retried_with_exponential_backoff(sqlite_db):
+    enqueue(("ok@example.com", "Hi", "<p/>"), ("down@example.com", "Hi", "<p/>"))
+    sender = FakeSender(failing={"down@example.com"})
+    worker = make_worker(sender, max_attempts=3)
+
+    assert worker.drain_once() == 2
+    status, attempts, error, delay = outbox()["down@example.com"]
+    assert (status, attempts) == ("pending", 1)
+    assert "refused down@example.com" in error
+    assert 25 <= delay <= 30
+    assert sender.closed == 1
+    assert outbox()["ok@example.com"][0] == "sent"
+
+    # Not due yet, so nothing is claimed
+    assert worker.drain_once() == 0
+
+
+def due_now():
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("UPDATE email_outbox SET next_attempt_at = DATEADD(second, -1, GETDATE()) WHERE status = 'pending'")
+        conn.commit()
+
+
+def test_backoff_doubles_until_the_last_attempt_fails(sqlite_db):
+    enqueue(("down@example.com", "Hi", "<p/>"))
+    worker = make_worker(FakeSender(failing={"down@example.com"}), max_attempts=3)
+
+    delays = []
+    for _ in range(2):
+        worker.drain_once()
+        delays.append(outbox()["down@example.com"][3])
+        due_now()
+    assert 25 <= delays[0] <= 30 and 55 <= delays[1] <= 60
+
+    worker.drain_once()
+    status, attempts, _, _ = outbox()["down@example.com"]
+    assert (status, attempts) == ("failed", 3)
+    assert queue_depth() == 0
+    assert worker.stats()["retried"] == 2 and worker.stats()["failed"] == 1
+
+
+def test_poll_errors_are_logged_and_counted(sqlite_db, monkeypatch, caplog):
+    worker = make_worker(FakeSender(), poll_seconds=0)
+
+    def broken_claim():
+        worker.stop()
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(worker, "_claim_batch", broken_claim)
+    worker.run()
+    assert worker.stats()["poll_errors"] == 1
+    assert "Email outbox poll failed" in caplog.text
+    assert worker.sender.closed == 1
@@ -0,0 +1,105 @@
+# ./tests/test_timesheet_queries.py
+import datetime
+from conftest import EMP_ID, WEEK, week_row
+from utils.db import get_connection
+from utils import timesheet_queries as tq
+
+
+def stored(week=WEEK):
+    """{(project_id, task_id): (AssignmentId, monday_hours, status)} for the employee's week."""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT project_id, task_id, AssignmentId, monday_hours, status
+            FROM timesheet_entries WHERE user_id = ? AND week_start_date = ?
+        """, (EMP_ID, week))
+        return {(p, t): (a, m, s) for p, t, a, m, s in cur.fetchall()}
+
+
+def insert_unassigned_entry(project_id, task_id, monday):
+    """An entry without an AssignmentId, as create_admin_timesheet_entry can leave it."""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            INSERT INTO timesheet_entries (user_id, project_id, task_id, week_start_date,
+                                           monday_hours, status, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, 'draft', GETDATE(), GETDATE())
+        """, (EMP_ID, project_id, task_id, WEEK, monday))
+        conn.commit()
+
+
+def test_save_inserts_then_updates_and_returns_entry_ids(sqlite_db):
+    a11, a12 = sqlite_db[(1, 1)], sqlite_db[(1, 2)]
+    ids = tq.save_week_entries(EMP_ID, WEEK, "draft", [week_row(1, 1, a11, monday=2), week_row(1, 2, a12, monday=3)])
+    assert all(ids) and len(set(ids)) == 2
+
+    again = tq.save_week_entries(EMP_ID, WEEK, "submitted", [week_row(1, 1, a11, monday=5), week_row(1, 2, a12, monday=3)])
+    assert again == ids
+    assert stored() == {(1, 1): (a11, 5.0, "submitted"), (1, 2): (a12, 3.0, "submitted")}
+
+
+def test_duplicate_pairs_are_summed_into_one_entry(sqlite_db):
+    a11 = sqlite_db[(1, 1)]
+    ids = tq.save_week_entries(EMP_ID, WEEK, "draft", [week_row(1, 1, a11, monday=2), week_row(1, 1, a11, monday=1.5)])
+    assert ids[0] == ids[1]
+    assert stored() == {(1, 1): (a11, 3.5, "draft")}
+
+
+def test_delete_missing_replaces_the_week(sqlite_db):
+    a11, a12 = sqlite_db[(1, 1)], sqlite_db[(1, 2)]
+    tq.save_week_entries(EMP_ID, WEEK, "draft", [week_row(1, 1, a11, monday=2), week_row(1, 2, a12, monday=3)])
+
+    tq.save_week_entries(EMP_ID, WEEK, "draft", [week_row(1, 2, a12, monday=4)])
+    assert stored() == {(1, 2): (a12, 4.0, "draft")}
+
+    tq.save_week_entries(EMP_ID, WEEK, "draft", [])
+    assert stored() == {}
+
+
+def test_partial_save_keeps_rows_it_was_not_given(sqlite_db):
+    a11, a12 = sqlite_db[(1, 1)], sqlite_db[(1, 2)]
+    tq.save_week_entries(EMP_ID, WEEK, "draft", [week_row(1, 1, a11, monday=2)])
+    insert_unassigned_entry(2, 3, monday=6)
+
+    tq.save_week_entries(EMP_ID, WEEK, "draft", [week_row(1, 2, a12, monday=1)], delete_missing=False)
+    assert stored() == {
+        (1, 1): (a11, 2.0, "draft"),
+        (1, 2): (a12, 1.0, "draft"),
+        (2, 3): (None, 6.0, "draft"),
+    }
+
+
+def test_delete_keys_deletes_only_those_pairs(sqlite_db):
+    a11, a12 = sqlite_db[(1, 1)], sqlite_db[(1, 2)]
+    tq.save_week_entries(EMP_ID, WEEK, "draft", [week_row(1, 1, a11, monday=2), week_row(1, 2, a12, monday=3)])
+    insert_unassigned_entry(2, 3, monday=6)
+
+    tq.save_week_entries(EMP_ID, WEEK, "draft", [], delete_missing=False, delete_keys={(1, 1)})
+    assert set(stored()) == {(1, 2), (2, 3)}
+
+
+def test_delete_keys_never_deletes_a_pair_being_saved(sqlite_db):
+    a11 = sqlite_db[(1, 1)]
+    tq.save_week_entries(EMP_ID, WEEK, "draft", [week_row(1, 1, a11, monday=2)])
+
+    tq.save_week_entries(EMP_ID, WEEK, "draft", [week_row(1, 1, a11, monday=4)],
+                         delete_missing=False, delete_keys={(1, 1)})
+    assert stored() == {(1, 1): (a11, 4.0, "draft")}
+
+
+def test_empty_partial_save_leaves_the_week_alone(sqlite_db):
+    a11 = sqlite_db[(1, 1)]
+    tq.save_week_entries(EMP_ID, WEEK, "draft", [week_row(1, 1, a11, monday=2)])
+
+    assert tq.save_week_entries(EMP_ID, WEEK, "draft", [], delete_missing=False) == []
+    assert stored() == {(1, 1): (a11, 2.0, "draft")}
+
+
+def test_save_is_scoped_to_the_user_and_week(sqlite_db):
+    a11 = sqlite_db[(1, 1)]
+    next_week = WEEK + datetime.timedelta(days=7)
+    tq.save_week_entries(EMP_ID, next_week, "draft", [week_row(1, 1, a11, monday=8)])
+
+    tq.save_week_entries(EMP_ID, WEEK, "draft", [week_row(1, 1, a11, monday=2)])
+    tq.save_week_entries(EMP_ID, WEEK, "draft", [])
+    assert stored(next_week) == {(1, 1): (a11, 8.0, "draft")}
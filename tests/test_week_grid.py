@@ -0,0 +1,88 @@
+# ./tests/test_week_grid.py
+from utils.week_grid import WeekGrid
+
+
+def entry(project_id, task_id, assignment_id, monday=0.0):
+    return {"project_id": project_id, "task_id": task_id, "AssignmentId": assignment_id, "monday_hours": monday}
+
+
+def loaded_grid():
+    """Two assigned entries, one stored without an AssignmentId, one without a task."""
+    return WeekGrid.from_entries([
+        entry(1, 1, 11, monday=2),
+        entry(1, 2, 12, monday=3),
+        entry(5, 7, None, monday=4),
+        entry(6, None, None, monday=1),
+    ])
+
+
+def test_fresh_grid_has_no_unsaved_changes():
+    grid = loaded_grid()
+    assert grid.removed_keys() == set()
+    assert not grid.has_unsaved_changes()
+    assert grid.saved_keys == {(1, 1), (1, 2), (5, 7)}
+
+
+def test_resolve_fills_missing_assignment_ids():
+    grid = WeekGrid.from_entries([entry(5, 7, None)], resolve=lambda pid, tid: 57)
+    assert grid.assignment_id(0) == 57
+
+
+def test_blank_row_is_not_an_unsaved_change():
+    grid = WeekGrid.from_entries([])
+    grid.add_row()
+    grid.set_hours(0, 1, 4)
+    assert grid.dirty.tolist() == [True]
+    assert not grid.has_unsaved_changes()
+    assert grid.to_rows(only_dirty=True) == []
+
+
+def test_set_hours_marks_only_changed_rows():
+    grid = loaded_grid()
+    assert not grid.set_hours(0, 1, 2.0)
+    assert grid.set_hours(1, 1, 5.0)
+    assert grid.dirty.tolist() == [False, True, False, False]
+    assert grid.has_unsaved_changes()
+    assert [(r["project_id"], r["task_id"], r["monday"]) for r in grid.to_rows(only_dirty=True)] == [(1, 2, 5.0)]
+
+
+def test_dirty_rows_include_rows_sharing_their_pair():
+    grid = loaded_grid()
+    grid.add_row()
+    grid.set_assignment(4, 11, 1, 1)
+    rows = grid.to_rows(only_dirty=True)
+    assert [(r["project_id"], r["task_id"]) for r in rows] == [(1, 1), (1, 1)]
+
+
+def test_unassigned_stored_rows_are_saved_with_a_null_assignment():
+    grid = loaded_grid()
+    rows = {(r["project_id"], r["task_id"]): r for r in grid.to_rows()}
+    assert set(rows) == {(1, 1), (1, 2), (5, 7)}
+    assert rows[(5, 7)]["AssignmentId"] is None
+
+
+def test_removed_and_reassigned_rows_show_up_as_removed():
+    grid = loaded_grid()
+    grid.remove_row(0)
+    grid.set_assignment(0, 13, 2, 3)
+    assert grid.removed_keys() == {(1, 1), (1, 2)}
+    assert grid.has_unsaved_changes()
+
+
+def test_mark_saved_clears_the_saved_rows():
+    grid = loaded_grid()
+    grid.set_hours(1, 1, 5.0)
+    grid.remove_row(0)
+    rows, removed = grid.to_rows(only_dirty=True), grid.removed_keys()
+
+    grid.mark_saved({(r["project_id"], r["task_id"]) for r in rows}, removed)
+    assert not grid.has_unsaved_changes()
+    assert grid.saved_keys == {(1, 2), (5, 7)}
+
+
+def test_totals_and_day_caps():
+    grid = loaded_grid()
+    assert grid.total() == 10.0
+    assert grid.days_over_cap() == []
+    grid.set_hours(0, 1, 20.0)
+    assert grid.days_over_cap() == ["monday"]
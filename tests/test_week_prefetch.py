@@ -0,0 +1,88 @@
+# ./tests/test_week_prefetch.py
+import datetime
+import time
+import pytest
+from conftest import EMP_ID, WEEK, week_row
+from utils import timesheet_queries as tq
+from utils import week_prefetch
+
+PREV, NEXT = WEEK - datetime.timedelta(days=7), WEEK + datetime.timedelta(days=7)
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    with week_prefetch._lock:
+        week_prefetch._users.clear()
+        week_prefetch._generation.clear()
+        week_prefetch._in_flight.clear()
+    yield
+
+
+def cached_weeks(user_id=EMP_ID):
+    weeks = week_prefetch._users.get(user_id)
+    return set(weeks) if weeks is not None else set()
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_put_and_get():
+    snapshot = tq.WeekSnapshot(user_id=EMP_ID, week_start=WEEK)
+    assert week_prefetch.get(EMP_ID, WEEK) is None
+    week_prefetch.put(snapshot)
+    assert week_prefetch.get(EMP_ID, WEEK) is snapshot
+    assert week_prefetch.get(EMP_ID + 1, WEEK) is None
+
+
+def test_invalidate_drops_the_week_and_the_next_one():
+    for week in (PREV, WEEK, NEXT):
+        week_prefetch.put(tq.WeekSnapshot(user_id=EMP_ID, week_start=week))
+    week_prefetch.put(tq.WeekSnapshot(user_id=EMP_ID + 1, week_start=WEEK))
+
+    week_prefetch.invalidate(EMP_ID, WEEK)
+    assert cached_weeks() == {PREV}
+    assert cached_weeks(EMP_ID + 1) == {WEEK}
+
+    week_prefetch.invalidate(EMP_ID)
+    assert cached_weeks() == set()
+
+
+def test_invalidate_accepts_driver_datetimes():
+    week_prefetch.put(tq.WeekSnapshot(user_id=EMP_ID, week_start=WEEK))
+    week_prefetch.invalidate(EMP_ID, datetime.datetime.combine(WEEK, datetime.time()))
+    assert cached_weeks() == set()
+
+
+def test_load_started_before_an_invalidation_is_not_stored(sqlite_db):
+    generation = week_prefetch._generation.get(EMP_ID, 0)
+    week_prefetch.invalidate(EMP_ID, WEEK)
+    week_prefetch._load(EMP_ID, WEEK, generation)
+    assert cached_weeks() == set()
+
+
+def test_prefetch_loads_adjacent_weeks_in_the_background(sqlite_db):
+    tq.save_week_entries(EMP_ID, NEXT, "draft", [week_row(1, 1, sqlite_db[(1, 1)], monday=3)])
+
+    week_prefetch.prefetch(EMP_ID, week_prefetch.adjacent_weeks(WEEK))
+    assert wait_for(lambda: cached_weeks() == {PREV, NEXT})
+
+    snapshot = week_prefetch.get(EMP_ID, NEXT)
+    assert [e["monday_hours"] for e in snapshot.entries] == [3.0]
+
+
+def test_assignment_changes_drop_the_employees_weeks(sqlite_db):
+    from utils import manager_queries as mq
+    week_prefetch.put(tq.fetch_week_snapshot(EMP_ID, WEEK))
+    mq.upsert_assignment({
+        "project_id": 2, "task_id": 3, "EmpId": EMP_ID, "planned_hours": 8,
+        "notes": "", "start_date": None, "end_date": None, "status": "active",
+    })
+    assert cached_weeks() == set()
+
+    week_prefetch.put(tq.fetch_week_snapshot(EMP_ID, WEEK))
+    mq.delete_assignment(sqlite_db[(1, 1)])
+    assert cached_weeks() == set()
@@ -0,0 +1,172 @@
+# ./utils/access_control.py
+"""
+Which projects a manager may see and approve.
+
+The allowed-project set follows from the user's role:
+- Admin: every project (no filter at all)
+- Dept Manager: projects they approve that are non-billable
+- Project Manager: projects they approve that are billable
+- anyone else: projects they approve
+
+Each user's ProjectScope is loaded in one query and kept in a process-wide
+ACL cache shared by all sessions; writes to projects / project_approvers
+drop it through invalidate_scope(). The query modules (manager queries,
+reports, rollups) turn it into a parameterized project_id IN (...) filter
+with ProjectScope.clause() instead of a project_approvers subquery.
+"""
+import os
+import threading
+from dataclasses import dataclass
+from functools import cached_property
+from cachetools import TTLCache
+from utils.db import get_connection, dict_fetchall
+from lib.constants import ROLE_ID_ADMIN, ROLE_ID_DEPT_MANAGER, ROLE_ID_PROJECT_MANAGER
+
+ACL_TTL_SECONDS = float(os.getenv("ACL_TTL_SECONDS", "300"))
+ACL_MAX_ENTRIES = int(os.getenv("ACL_MAX_ENTRIES", "4096"))
+# Past this many ids the clause falls back to the project_approvers subquery
+# (SQL Server allows at most 2100 parameters per statement)
+MAX_IN_LIST = 1000
+
+ROLE_IDS = {
+    "admin": ROLE_ID_ADMIN,
+    "dept_manager": ROLE_ID_DEPT_MANAGER,
+}
+
+_cache = TTLCache(maxsize=ACL_MAX_ENTRIES, ttl=ACL_TTL_SECONDS)  # user_id -> ProjectScope
+_lock = threading.Lock()
+_generation = 0  # bumped on every invalidation
+
+
+@dataclass(frozen=True)
+class ProjectScope:
+    user_id: int
+    role_id: int
+    projects: tuple  # role-allowed ({"project_id", "project_name"}, ...) for dropdowns
+    approver_project_ids: frozenset  # every project the user approves, billable or not
+
+    @property
+    def unrestricted(self):
+        return self.role_id == ROLE_ID_ADMIN
+
+    @cached_property
+    def project_ids(self):
+        return frozenset(p['project_id'] for p in self.projects)
+
+    def allows(self, project_id):
+        return self.unrestricted or project_id in self.project_ids
+
+    def clause(self, column="p.project_id", billable_scope=True):
+        """
+        (sql, params) restricting `column` to the allowed projects; ("", []) for admins.
+        billable_scope=False ignores the role's billable rule (reports cover
+        every project the user approves).
+        """
+        if self.unrestricted:
+            return "", []
+        ids = sorted(self.project_ids if billable_scope else self.approver_project_ids)
+        if not ids:
+            return "1 = 0", []
+        if len(ids) > MAX_IN_LIST:
+            return _subquery_clause(self.user_id, self.role_id if billable_scope else 0, column)
+        return f"{column} IN ({', '.join(['?'] * len(ids))})", ids
+
+
+def role_id_for(user):
+    """Role id of a logged-in user dict, falling back to its role name."""
+    if user.get('role_id') is not None:
+        return normalise_role(user['role_id'])
+    return ROLE_IDS.get(user.get('role'), ROLE_ID_PROJECT_MANAGER)
+
+
+def normalise_role(role_id):
+    try:
+        return int(role_id)
+    except (ValueError, TypeError):
+        return 0
+
+
+def _role_allows(role_id, is_billable):
+    if role_id == ROLE_ID_DEPT_MANAGER:
+        return not is_billable
+    if role_id == ROLE_ID_PROJECT_MANAGER:
+        return is_billable == 1
+    return True
+
+
+def _role_billable_filter(role_id):
+    if role_id == ROLE_ID_DEPT_MANAGER:
+        return " AND (p.is_billable = 0 OR p.is_billable IS NULL)"
+    if role_id == ROLE_ID_PROJECT_MANAGER:
+        return " AND p.is_billable = 1"
+    return ""
+
+
+def _subquery_clause(user_id, role_id, column):
+    sql = f"""{column} IN (
+        SELECT p.project_id FROM projects p
+        JOIN project_approvers pa ON p.project_id = pa.project_id
+        WHERE pa.user_id = ?{_role_billable_filter(role_id)})"""
+    return sql, [user_id]
+
+
+def load_scope(user_id, role_id=None):
+    """
+    Builds the scope from the database. Without a role_id the role is read
+    from Employee.UserTypeId (unknown users get the plain approver scope).
+    """
+    with get_connection() as conn:
+        cur = conn.cursor()
+        if role_id is None:
+            cur.execute("SELECT UserTypeId FROM Employee WHERE EmpId = ?", (user_id,))
+            row = cur.fetchone()
+            role_id = row[0] if row else 0
+        role_id = normalise_role(role_id)
+
+        if role_id == ROLE_ID_ADMIN:
+            cur.execute("SELECT project_id, project_name FROM projects WHERE status = 'active' ORDER BY project_name")
+            return ProjectScope(user_id, role_id, tuple(dict_fetchall(cur)), frozenset())
+
+        cur.execute("""
+            SELECT p.project_id, p.project_name, p.is_billable FROM projects p
+            JOIN project_approvers pa ON p.project_id = pa.project_id
+            WHERE pa.user_id = ?
+            ORDER BY p.project_name
+        """, (user_id,))
+        rows = dict_fetchall(cur)
+
+    allowed = tuple(
+        {"project_id": r['project_id'], "project_name": r['project_name']}
+        for r in rows if _role_allows(role_id, r['is_billable'])
+    )
+    return ProjectScope(user_id, role_id, allowed, frozenset(r['project_id'] for r in rows))
+
+
+def get_scope(user_id, role_id=None):
+    """
+    The user's ProjectScope from the process-wide ACL cache. A role_id that
+    differs from the cached one (role changed since) reloads the entry.
+    """
+    with _lock:
+        scope = _cache.get(user_id)
+        generation = _generation
+    if scope is not None and (role_id is None or scope.role_id == normalise_role(role_id)):
+        return scope
+
+    scope = load_scope(user_id, role_id)
+    with _lock:
+        # Skip the store if approvers changed while we were querying
+        if _generation == generation:
+            _cache[user_id] = scope
+    return scope
+
+
+def invalidate_scope(user_id=None):
+    """Drops one user's scope, or every scope (after project / approver changes)."""
+    global _generation
+    with _lock:
+        _generation += 1
+        if user_id is None:
+            _cache.clear()
+        else:
+            _cache.pop(user_id, None)
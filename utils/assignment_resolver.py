@@ -0,0 +1,161 @@
+# ./utils/assignment_resolver.py
+"""
+Resolves (employee, project, task, week) to an AssignmentId.
+
+AssignmentIndex keys assignments by (EmpId, project_id, task_id); each key
+holds the date intervals of that employee's assignments to the task, so a
+lookup is one dict access plus a check of (almost always) one interval.
+The organisation-wide index is loaded in one query and kept in the
+catalog cache under "Assignments" (invalidated by the assignment write
+paths); single-entry writes use resolve_one() instead.
+
+Backfill entries saved without an AssignmentId:
+    python -m utils.assignment_resolver backfill [--dry-run]
+"""
+import datetime
+from utils.db import get_connection
+from utils import catalog_cache
+
+BACKFILL_CHUNK_ROWS = 5000
+
+
+def _as_date(value):
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value)
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    return value
+
+
+class AssignmentIndex:
+    """(EmpId, project_id, task_id) -> [(start_date, end_date, AssignmentId)], open-ended dates as None."""
+
+    def __init__(self):
+        self._by_key = {}
+
+    @classmethod
+    def from_rows(cls, rows, emp_id=None):
+        """Rows with AssignmentId, project_id, task_id and start/end dates; EmpId defaults to emp_id."""
+        index = cls()
+        for r in rows:
+            start = r.get("start_date", r.get("assign_start"))
+            end = r.get("end_date", r.get("assign_end"))
+            index.add(r.get("EmpId", emp_id), r["project_id"], r["task_id"], r["AssignmentId"], start, end)
+        return index
+
+    def add(self, emp_id, project_id, task_id, assignment_id, start_date=None, end_date=None):
+        self._by_key.setdefault((emp_id, project_id, task_id), []).append(
+            (_as_date(start_date), _as_date(end_date), assignment_id)
+        )
+
+    def resolve(self, emp_id, project_id, task_id, week_start=None):
+        """
+        The AssignmentId for this employee/project/task. With week_start, an
+        assignment active during that week wins; otherwise (or if none is)
+        the first one added.
+        """
+        candidates = self._by_key.get((emp_id, project_id, task_id))
+        if not candidates:
+            return None
+        if week_start is None or len(candidates) == 1:
+            return candidates[0][2]
+
+        week_start = _as_date(week_start)
+        week_end = week_start + datetime.timedelta(days=6)
+        for start, end, assignment_id in candidates:
+            if (start is None or start <= week_end) and (end is None or end >= week_start):
+                return assignment_id
+        return candidates[0][2]
+
+    def __len__(self):
+        return sum(len(v) for v in self._by_key.values())
+
+
+@catalog_cache.cached("Assignments")
+def load_index():
+    """Every assignment in one query, indexed. Shared across sessions via the catalog cache."""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT AssignmentId, EmpId, project_id, task_id, start_date, end_date
+            FROM Assignments
+            ORDER BY AssignmentId
+        """)
+        index = AssignmentIndex()
+        for aid, emp_id, project_id, task_id, start, end in cur.fetchall():
+            index.add(emp_id, project_id, task_id, aid, start, end)
+        return index
+
+
+def resolve_one(cur, emp_id, project_id, task_id, week_start=None):
+    """
+    Point lookup for a single entry, on the caller's cursor: reads only this
+    employee's assignments to the task instead of loading the whole index.
+    """
+    cur.execute("""
+        SELECT AssignmentId, project_id, task_id, start_date, end_date
+        FROM Assignments
+        WHERE EmpId = ? AND project_id = ? AND task_id = ?
+        ORDER BY AssignmentId
+    """, (emp_id, project_id, task_id))
+    rows = [
+        {"AssignmentId": aid, "project_id": pid, "task_id": tid, "start_date": start, "end_date": end}
+        for aid, pid, tid, start, end in cur.fetchall()
+    ]
+    return AssignmentIndex.from_rows(rows, emp_id).resolve(emp_id, project_id, task_id, week_start)
+
+
+# ========================================================
+# Backfill
+# ========================================================
+
+def backfill(dry_run=False):
+    """
+    Fills timesheet_entries.AssignmentId where it is NULL and an assignment
+    matches. Returns (entries without an assignment, entries resolved).
+    """
+    index = load_index.uncached()
+    updates, missing = [], 0
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT entry_id, user_id, project_id, task_id, week_start_date
+            FROM timesheet_entries
+            WHERE AssignmentId IS NULL AND task_id IS NOT NULL
+        """)
+        while True:
+            rows = cur.fetchmany(BACKFILL_CHUNK_ROWS)
+            if not rows:
+                break
+            for entry_id, user_id, project_id, task_id, week in rows:
+                missing += 1
+                aid = index.resolve(user_id, project_id, task_id, week)
+                if aid is not None:
+                    updates.append((aid, entry_id))
+
+        if not dry_run:
+            try:
+                for i in range(0, len(updates), BACKFILL_CHUNK_ROWS):
+                    cur.executemany(
+                        "UPDATE timesheet_entries SET AssignmentId = ? WHERE entry_id = ?",
+                        updates[i:i + BACKFILL_CHUNK_ROWS]
+                    )
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                raise e
+    return missing, len(updates)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Assignment resolution tools.")
+    parser.add_argument("command", choices=["backfill"])
+    parser.add_argument("--dry-run", action="store_true", help="Count matches without writing.")
+    args = parser.parse_args()
+
+    if args.command == "backfill":
+        missing, resolved = backfill(dry_run=args.dry_run)
+        verb = "would be" if args.dry_run else "were"
+        print(f"{missing} entries had no AssignmentId; {resolved} {verb} resolved.")
@@ -0,0 +1,78 @@
+# ./utils/catalog_cache.py
+"""
+In-process cache for slow-changing reference data (departments, task types,
+tasks, projects, employees).
+
+Entries are shared across all Streamlit sessions, keyed by (table, filter
+args), expire after a TTL, and are dropped explicitly by the write paths
+through invalidate().
+"""
+import functools
+import os
+import threading
+from cachetools import TTLCache
+
+CATALOG_TTL_SECONDS = float(os.getenv("CATALOG_TTL_SECONDS", "300"))
+CATALOG_MAX_ENTRIES = int(os.getenv("CATALOG_MAX_ENTRIES", "1024"))
+
+_cache = TTLCache(maxsize=CATALOG_MAX_ENTRIES, ttl=CATALOG_TTL_SECONDS)
+_lock = threading.Lock()
+_counters = {}  # table -> {"hits": n, "misses": n, "invalidations": n}
+_generations = {}  # table -> bumped on every invalidation
+
+
+def _count(table, what):
+    counts = _counters.setdefault(table, {"hits": 0, "misses": 0, "invalidations": 0})
+    counts[what] += 1
+
+
+def cached(table):
+    """
+    Decorator for a fetch function whose result depends only on its arguments.
+    Results are stored under (table, args) until the TTL expires or
+    invalidate(table) is called.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (table, fn.__name__, args, tuple(sorted(kwargs.items())))
+            with _lock:
+                if key in _cache:
+                    _count(table, "hits")
+                    return list(_cache[key]) if isinstance(_cache[key], list) else _cache[key]
+                _count(table, "misses")
+                generation = _generations.get(table, 0)
+
+            result = fn(*args, **kwargs)
+            with _lock:
+                # Skip the store if a write invalidated the table while we were querying
+                if _generations.get(table, 0) == generation:
+                    _cache[key] = result
+            return list(result) if isinstance(result, list) else result
+
+        wrapper.uncached = fn
+        return wrapper
+    return decorator
+
+
+def invalidate(*tables):
+    """Drops every cached entry for the given tables (call after a write)."""
+    with _lock:
+        for key in [k for k in list(_cache.keys()) if k[0] in tables]:
+            _cache.pop(key, None)
+        for table in tables:
+            _generations[table] = _generations.get(table, 0) + 1
+            _count(table, "invalidations")
+
+
+def clear():
+    with _lock:
+        _cache.clear()
+
+
+def stats():
+    """Per-table hit/miss/invalidation counters plus the current entry count."""
+    with _lock:
+        data = {table: dict(c) for table, c in _counters.items()}
+        data["_entries"] = len(_cache)
+        return data
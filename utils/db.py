@@ -0,0 +1,341 @@
+# ./utils/db.py
+"""
+Pooled database access for the query helpers.
+
+lib.db.get_connection opens a brand-new SQL Server connection per call.
+This module keeps a bounded pool of those connections and hands them out
+through a drop-in `get_connection()` context manager, so callers keep
+writing `with get_connection() as conn:` exactly as before.
+
+TIMESHEET_DB_BACKEND=sqlite swaps SQL Server for the local stand-in in
+utils.sqlite_backend (offline benchmarks and regression runs).
+"""
+import datetime
+import decimal
+import os
+import threading
+import time
+from contextlib import contextmanager
+from utils import query_profiler
+
+# "mssql" (lib.db / SQL Server) or "sqlite" (utils.sqlite_backend)
+DB_BACKEND = os.getenv("TIMESHEET_DB_BACKEND", "mssql").lower()
+
+# Pool sizing can be tuned per deployment without code changes.
+POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+POOL_IDLE_TIMEOUT = float(os.getenv("DB_POOL_IDLE_TIMEOUT", "300"))
+POOL_CHECKOUT_TIMEOUT = float(os.getenv("DB_POOL_CHECKOUT_TIMEOUT", "30"))
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection frees up within the checkout timeout."""
+
+
+def _default_connect():
+    """Opens a raw connection for the configured backend (SQL Server via lib.db by default)."""
+    if DB_BACKEND == "sqlite":
+        from utils import sqlite_backend
+        return sqlite_backend.connect()
+    from lib import db as lib_db
+    return lib_db.get_connection()
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-aware connection pool.
+    - Each thread checks out its own connection; nested get_connection()
+      calls on the same thread reuse it instead of taking a second slot.
+    - Idle connections are pinged before reuse and evicted after
+      `idle_timeout` seconds.
+    """
+
+    def __init__(self, connect, max_size=10, idle_timeout=300.0,
+                 checkout_timeout=30.0, ping_sql="SELECT 1"):
+        self._connect = connect
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self.ping_sql = ping_sql
+
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self._idle = []  # [(conn, last_used)], most recently used last
+        self._open = 0
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "creations": 0,
+            "evictions": 0,
+            "ping_failures": 0,
+        }
+
+    # --- Checkout / Checkin ---
+
+    def acquire(self):
+        held = getattr(self._local, "held", None)
+        if held:
+            held[1] += 1
+            return held[0]
+
+        conn = self._checkout()
+        self._local.held = [conn, 1]
+        return conn
+
+    def release(self, conn, discard=False):
+        held = self._local.held
+        held[1] -= 1
+        if held[1] > 0:
+            return
+        self._local.held = None
+        self._checkin(conn, discard)
+
+    def depth(self):
+        """How many nested get_connection() blocks the current thread is in."""
+        held = getattr(self._local, "held", None)
+        return held[1] if held else 0
+
+    def _checkout(self):
+        deadline = time.monotonic() + self.checkout_timeout
+        conn = None
+        stale = []
+        with self._cond:
+            self._stats["checkouts"] += 1
+            waited = False
+            while True:
+                stale.extend(self._pop_expired())
+                if self._idle:
+                    conn, _ = self._idle.pop()
+                    break
+                if self._open < self.max_size:
+                    self._open += 1
+                    break
+                if not waited:
+                    self._stats["waits"] += 1
+                    waited = True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeout(
+                        f"No database connection available after {self.checkout_timeout:.0f}s "
+                        f"(pool size {self.max_size})."
+                    )
+                self._cond.wait(remaining)
+
+        for old in stale:
+            self._close_quietly(old)
+
+        if conn is not None:
+            if self._is_alive(conn):
+                return conn
+            # Dead connection: drop it and reuse its slot for a fresh one.
+            self._close_quietly(conn)
+            with self._cond:
+                self._stats["ping_failures"] += 1
+
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._stats["creations"] += 1
+        return conn
+
+    def _checkin(self, conn, discard):
+        with self._cond:
+            if discard:
+                self._open -= 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+        if discard:
+            self._close_quietly(conn)
+
+    # --- Health ---
+
+    def _pop_expired(self):
+        """Removes idle connections past the idle timeout. Caller holds the lock."""
+        if not self._idle:
+            return []
+        cutoff = time.monotonic() - self.idle_timeout
+        expired = [c for c, last_used in self._idle if last_used < cutoff]
+        if expired:
+            self._idle = [(c, t) for c, t in self._idle if t >= cutoff]
+            self._open -= len(expired)
+            self._stats["evictions"] += len(expired)
+        return expired
+
+    def _is_alive(self, conn):
+        try:
+            cur = conn.cursor()
+            cur.execute(self.ping_sql)
+            cur.fetchall()
+            cur.close()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    # --- Introspection ---
+
+    def stats(self):
+        with self._cond:
+            data = dict(self._stats)
+            data["open"] = self._open
+            data["idle"] = len(self._idle)
+            data["in_use"] = self._open - len(self._idle)
+            data["max_size"] = self.max_size
+            return data
+
+    def close(self):
+        """Closes every idle connection. Checked-out connections close on checkin."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+        for conn, _ in idle:
+            self._close_quietly(conn)
+
+
+# ========================================================
+# Module-level pool
+# ========================================================
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    _default_connect,
+                    max_size=POOL_MAX_SIZE,
+                    idle_timeout=POOL_IDLE_TIMEOUT,
+                    checkout_timeout=POOL_CHECKOUT_TIMEOUT,
+                )
+    return _pool
+
+
+def reset_pool():
+    """Closes the pool; the next get_connection() opens a fresh one (e.g. after switching databases)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+        _pool = None
+
+
+def pool_stats():
+    """Returns pool counters (checkouts, waits, creations, ...) for dashboards/logging."""
+    return get_pool().stats()
+
+
+@contextmanager
+def get_connection():
+    """
+    Drop-in replacement for lib.db.get_connection.
+    Commits on a clean exit and rolls back on error (same as a pyodbc
+    connection used as a context manager), then returns the connection
+    to the pool instead of leaving it open.
+    While a query profiling run is active on this thread, the yielded
+    connection's cursors are instrumented (see utils.query_profiler).
+    """
+    pool = get_pool()
+    conn = pool.acquire()
+    outermost = pool.depth() == 1
+    broken = False
+    try:
+        yield query_profiler.wrap(conn)
+        if outermost:
+            conn.commit()
+    except BaseException:
+        if outermost:
+            try:
+                conn.rollback()
+            except Exception:
+                broken = True
+        raise
+    finally:
+        pool.release(conn, discard=broken)
+
+
+def dict_fetchall(cursor):
+    """Returns all rows from a cursor as a list of dicts keyed by column name."""
+    columns = [col[0] for col in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+# ========================================================
+# Columnar decoding
+# ========================================================
+
+def _column_kind(type_code, values):
+    """Python type of a result column, from the driver's type_code or the first non-null value."""
+    if isinstance(type_code, type):
+        return type_code
+    for v in values:
+        if v is not None:
+            return type(v)
+    return None
+
+
+def fetch_arrow(cursor, date_columns=None, categorical_columns=None, chunk_size=10000):
+    """
+    Decodes the rest of a cursor's result into a pyarrow Table, column by column.
+    - DECIMAL columns become float64
+    - datetime columns in `date_columns` (default: names ending in "_date") become date32
+    - string columns in `categorical_columns` (default: names ending in "name"
+      plus "status") are dictionary-encoded, i.e. pandas categoricals
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    names = [col[0] for col in cursor.description]
+    type_codes = [col[1] for col in cursor.description]
+    if date_columns is None:
+        date_columns = [n for n in names if n.lower().endswith("_date")]
+    if categorical_columns is None:
+        categorical_columns = [n for n in names if n.lower().endswith("name") or n == "status"]
+
+    columns = [[] for _ in names]
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        for i, col in enumerate(zip(*rows)):
+            columns[i].extend(col)
+
+    arrays = []
+    for name, type_code, values in zip(names, type_codes, columns):
+        kind = _column_kind(type_code, values)
+        if kind is decimal.Decimal:
+            arr = pa.array(values).cast(pa.float64())
+        elif kind is datetime.datetime:
+            arr = pa.array(values, type=pa.timestamp("us"))
+            if name in date_columns:
+                arr = arr.cast(pa.date32())
+        elif kind is datetime.date:
+            arr = pa.array(values, type=pa.date32())
+        else:
+            arr = pa.array(values)
+            if name in categorical_columns and pa.types.is_string(arr.type):
+                arr = pc.dictionary_encode(arr)
+        arrays.append(arr)
+
+    return pa.Table.from_arrays(arrays, names=names)
+
+
+def fetch_dataframe(cursor, **kwargs):
+    """Same as fetch_arrow, converted to a pandas DataFrame (dates stay datetime.date)."""
+    return fetch_arrow(cursor, **kwargs).to_pandas()
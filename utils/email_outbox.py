@@ -0,0 +1,268 @@
+# ./utils/email_outbox.py
+"""
+Durable email outbox.
+
+Write paths call enqueue_emails() with their own cursor, so the message is
+committed (or rolled back) together with the data change. A background
+OutboxWorker delivers queued messages over a single reused SMTP connection,
+retrying failures with exponential backoff.
+
+To try it against a local stand-in SMTP server:
+    python -m aiosmtpd -n -l localhost:1025
+    SMTP_SERVER=localhost SMTP_PORT=1025 SMTP_USE_TLS=0 python -m utils.email_outbox --once
+"""
+import logging
+import os
+import smtplib
+import threading
+import time
+from collections import deque
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from utils.db import get_connection
+
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "20"))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "5"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "6"))
+OUTBOX_BACKOFF_SECONDS = int(os.getenv("OUTBOX_BACKOFF_SECONDS", "30"))
+OUTBOX_BACKOFF_MAX_SECONDS = int(os.getenv("OUTBOX_BACKOFF_MAX_SECONDS", "3600"))
+# A row stuck in 'sending' this long (worker crashed mid-send) is claimed again
+OUTBOX_RECLAIM_MINUTES = int(os.getenv("OUTBOX_RECLAIM_MINUTES", "10"))
+
+log = logging.getLogger(__name__)
+
+# ========================================================
+# 1. Enqueue (inside the caller's transaction)
+# ========================================================
+
+def enqueue_emails(cur, messages):
+    """
+    Queues (recipient, subject, body) tuples using the caller's cursor.
+    Nothing is sent until the caller commits.
+    """
+    messages = [m for m in messages if m[0]]
+    if messages:
+        cur.executemany(
+            "INSERT INTO email_outbox (recipient, subject, body) VALUES (?, ?, ?)",
+            messages
+        )
+    return len(messages)
+
+def queue_depth():
+    """Number of messages waiting to be delivered (pending + in flight)."""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT COUNT(*) FROM email_outbox WHERE status IN ('pending', 'sending')")
+        return int(cur.fetchone()[0])
+
+# ========================================================
+# 2. SMTP Sender (one connection, reused)
+# ========================================================
+
+class SmtpSender:
+    """Keeps one SMTP session open across messages and reconnects if the server drops it."""
+
+    def __init__(self, host=None, port=None, username=None, password=None,
+                 from_addr=None, use_tls=None, timeout=30):
+        self.host = host or os.getenv("SMTP_SERVER", "localhost")
+        self.port = int(port or os.getenv("SMTP_PORT", "587"))
+        self.username = username if username is not None else os.getenv("SMTP_USERNAME")
+        self.password = password if password is not None else os.getenv("SMTP_PASSWORD")
+        self.from_addr = from_addr or os.getenv("SMTP_FROM_EMAIL", self.username)
+        if use_tls is None:
+            use_tls = os.getenv("SMTP_USE_TLS", "1") not in ("0", "false", "False")
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self._smtp = None
+
+    def _connect(self):
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            smtp.starttls()
+        if self.username and self.password:
+            smtp.login(self.username, self.password)
+        return smtp
+
+    def send(self, recipient, subject, body):
+        msg = MIMEMultipart()
+        msg['From'] = self.from_addr or ""
+        msg['To'] = recipient
+        msg['Subject'] = subject
+        msg.attach(MIMEText(body, 'html'))
+
+        if self._smtp is None:
+            self._smtp = self._connect()
+        try:
+            self._smtp.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            # Idle sessions get dropped by the server; reconnect once and retry.
+            self._smtp = self._connect()
+            self._smtp.send_message(msg)
+
+    def close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                pass
+            self._smtp = None
+
+# ========================================================
+# 3. Background Worker
+# ========================================================
+
+class OutboxWorker(threading.Thread):
+    """Polls email_outbox and delivers due messages until stop() is called."""
+
+    def __init__(self, sender=None, batch_size=OUTBOX_BATCH_SIZE, poll_seconds=OUTBOX_POLL_SECONDS,
+                 max_attempts=OUTBOX_MAX_ATTEMPTS, backoff_seconds=OUTBOX_BACKOFF_SECONDS,
+                 backoff_max_seconds=OUTBOX_BACKOFF_MAX_SECONDS):
+        super().__init__(name="email-outbox", daemon=True)
+        self.sender = sender or SmtpSender()
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=500)
+        self._counters = {"sent": 0, "retried": 0, "failed": 0, "poll_errors": 0}
+
+    # --- Loop ---
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                delivered = self.drain_once()
+            except Exception:
+                log.exception("Email outbox poll failed")
+                with self._lock:
+                    self._counters["poll_errors"] += 1
+                delivered = 0
+            # Keep draining while there is backlog, otherwise wait for the next poll
+            if delivered < self.batch_size:
+                self._stop_event.wait(self.poll_seconds)
+        self.sender.close()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def drain_once(self):
+        """Claims and sends one batch. Returns how many messages were attempted."""
+        batch = self._claim_batch()
+        for outbox_id, recipient, subject, body, attempts in batch:
+            started = time.perf_counter()
+            try:
+                self.sender.send(recipient, subject, body)
+            except Exception as e:
+                self.sender.close()
+                self._mark_failed(outbox_id, attempts, e)
+                continue
+            with self._lock:
+                self._latencies.append(time.perf_counter() - started)
+            self._mark_sent(outbox_id)
+        return len(batch)
+
+    # --- DB state transitions ---
+
+    def _claim_batch(self):
+        with get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("""
+                UPDATE TOP (?) email_outbox WITH (ROWLOCK, READPAST, UPDLOCK)
+                SET status = 'sending', claimed_at = GETDATE(), attempts = attempts + 1
+                OUTPUT inserted.outbox_id, inserted.recipient, inserted.subject, inserted.body, inserted.attempts
+                WHERE (status = 'pending' AND next_attempt_at <= GETDATE())
+                   OR (status = 'sending' AND claimed_at < DATEADD(minute, ?, GETDATE()))
+            """, (self.batch_size, -OUTBOX_RECLAIM_MINUTES))
+            rows = [tuple(r) for r in cur.fetchall()]
+            conn.commit()
+            return rows
+
+    def _mark_sent(self, outbox_id):
+        with get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "UPDATE email_outbox SET status = 'sent', sent_at = GETDATE(), last_error = NULL WHERE outbox_id = ?",
+                (outbox_id,)
+            )
+            conn.commit()
+        with self._lock:
+            self._counters["sent"] += 1
+
+    def _mark_failed(self, outbox_id, attempts, error):
+        give_up = attempts >= self.max_attempts
+        delay = min(self.backoff_seconds * (2 ** (attempts - 1)), self.backoff_max_seconds)
+        with get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("""
+                UPDATE email_outbox
+                SET status = ?, last_error = ?, next_attempt_at = DATEADD(second, ?, GETDATE())
+                WHERE outbox_id = ?
+            """, ('failed' if give_up else 'pending', str(error)[:4000], delay, outbox_id))
+            conn.commit()
+        with self._lock:
+            self._counters["failed" if give_up else "retried"] += 1
+
+    # --- Metrics ---
+
+    def stats(self):
+        """Delivery counters and send latency (seconds) over the last 500 messages."""
+        with self._lock:
+            data = dict(self._counters)
+            latencies = sorted(self._latencies)
+        if latencies:
+            data["latency_avg"] = sum(latencies) / len(latencies)
+            data["latency_p95"] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        else:
+            data["latency_avg"] = data["latency_p95"] = None
+        return data
+
+# ========================================================
+# 4. Process-wide Worker
+# ========================================================
+
+_worker = None
+_worker_lock = threading.Lock()
+
+def start_outbox_worker():
+    """Starts the shared worker once per process. Safe to call on every rerun."""
+    global _worker
+    if os.getenv("OUTBOX_WORKER_ENABLED", "1") in ("0", "false", "False"):
+        return None
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = OutboxWorker()
+            _worker.start()
+    return _worker
+
+def outbox_stats():
+    """Queue depth plus the running worker's counters and latency."""
+    data = _worker.stats() if _worker else {}
+    data["queue_depth"] = queue_depth()
+    return data
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Deliver queued timesheet emails.")
+    parser.add_argument("--once", action="store_true", help="Send what is due and exit.")
+    args = parser.parse_args()
+
+    worker = OutboxWorker()
+    if args.once:
+        while worker.drain_once() == worker.batch_size:
+            pass
+        worker.sender.close()
+        print(worker.stats())
+    else:
+        worker.start()
+        try:
+            while worker.is_alive():
+                worker.join(1)
+        except KeyboardInterrupt:
+            worker.stop()
+            worker.join()
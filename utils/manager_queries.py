@@ -1,14 +1,21 @@
 # ./utils/manager_queries.py
 import pandas as pd
 from datetime import date
-from lib.db import get_connection, dict_fetchall
-from lib.constants import ROLE_ID_ADMIN, ROLE_ID_DEPT_MANAGER, ROLE_ID_PROJECT_MANAGER
-from lib.email_utils import send_email # Import Email Utils
+from utils.db import get_connection, dict_fetchall
+from lib.constants import ROLE_ID_ADMIN
+from utils.email_outbox import enqueue_emails
+from utils import catalog_cache
+from utils import week_prefetch
+from utils import rollups
+from utils import access_control
+from utils import assignment_resolver
 
 # ========================================================
 # 1. Dropdown & Helper Fetchers
+# (reference data is served from the shared catalog cache)
 # ========================================================
 
+@catalog_cache.cached("Department")
 def fetch_departments():
     """Fetches all departments for dropdowns."""
     with get_connection() as conn:
@@ -16,6 +23,7 @@ def fetch_departments():
         cur.execute("SELECT DepId, DepName FROM Department ORDER BY DepName")
         return dict_fetchall(cur)
 
+@catalog_cache.cached("TaskTypes")
 def fetch_task_types(dep_id_filter=None):
     """
     Fetches Task Types. 
@@ -44,44 +52,12 @@ def fetch_approver_projects(user_id: int, is_admin: bool = False):
     Fetches projects for dropdowns.
     - If Admin: Fetches ALL active projects.
     - If Manager: Fetches only assigned projects (with role-based billable filter).
+    Served from the ACL cache (see utils.access_control).
     """
-    with get_connection() as conn:
-        cur = conn.cursor()
-        if is_admin:
-            cur.execute("SELECT project_id, project_name FROM projects WHERE status = 'active' ORDER BY project_name")
-        else:
-            # Determine strict role for this user to filter dropdowns correctly
-            cur.execute("SELECT UserTypeId FROM Employee WHERE EmpId = ?", (user_id,))
-            row = cur.fetchone()
-            # Default to generic approver if role lookup fails
-            role_id = int(row[0]) if row else 0
-
-            if role_id == ROLE_ID_DEPT_MANAGER:
-                # Dept Manager: Assigned + Non-Billable (0 or NULL)
-                cur.execute("""
-                    SELECT p.project_id, p.project_name FROM projects p
-                    JOIN project_approvers pa ON p.project_id = pa.project_id
-                    WHERE pa.user_id = ? AND (p.is_billable = 0 OR p.is_billable IS NULL)
-                    ORDER BY p.project_name
-                """, (user_id,))
-            elif role_id == ROLE_ID_PROJECT_MANAGER:
-                # Project Manager: Assigned + Billable (1)
-                cur.execute("""
-                    SELECT p.project_id, p.project_name FROM projects p
-                    JOIN project_approvers pa ON p.project_id = pa.project_id
-                    WHERE pa.user_id = ? AND p.is_billable = 1
-                    ORDER BY p.project_name
-                """, (user_id,))
-            else:
-                # Fallback / General Approver (Just Assigned)
-                cur.execute("""
-                    SELECT p.project_id, p.project_name FROM projects p
-                    JOIN project_approvers pa ON p.project_id = pa.project_id
-                    WHERE pa.user_id = ? ORDER BY p.project_name
-                """, (user_id,))
-                
-        return dict_fetchall(cur)
+    scope = access_control.get_scope(user_id, ROLE_ID_ADMIN if is_admin else None)
+    return list(scope.projects)
 
+@catalog_cache.cached("projects")
 def fetch_all_active_projects():
     """Fetches all active projects (Legacy/Admin specific helper)."""
     with get_connection() as conn:
@@ -89,6 +65,7 @@ def fetch_all_active_projects():
         cur.execute("SELECT project_id, project_name FROM projects WHERE status = 'active' ORDER BY project_name")
         return dict_fetchall(cur)
 
+@catalog_cache.cached("tasks")
 def fetch_tasks_by_type(type_id):
     """
     Fetches global tasks filtered by TaskType.
@@ -104,6 +81,7 @@ def fetch_tasks_by_type(type_id):
         cur.execute(sql, (type_id,))
         return dict_fetchall(cur)
 
+@catalog_cache.cached("Employee")
 def get_all_employees(dep_id=None):
     """
     Fetches employees. 
@@ -123,6 +101,7 @@ def get_all_employees(dep_id=None):
         cur.execute(sql, params)
         return dict_fetchall(cur)
 
+@catalog_cache.cached("projects")
 def get_project_details_simple(project_id):
     """Helper to get just the DepId for a project."""
     with get_connection() as conn:
@@ -171,6 +150,8 @@ def upsert_task(data):
                     SET task_name=?, TaskTypeId=? 
                     WHERE task_id=?
                 """, (data['task_name'], data['TaskTypeId'], task_id))
+                # Task type may have changed: re-bucket the hours rollup
+                rollups.refresh_for_task(cur, task_id)
             else:
                 cur.execute("""
                     INSERT INTO tasks (task_name, created_by, TaskTypeId, created_at) 
@@ -180,6 +161,7 @@ def upsert_task(data):
         except Exception as e:
             conn.rollback()
             raise e
+    catalog_cache.invalidate("tasks")
 
 def delete_task(task_id: int):
     with get_connection() as conn:
@@ -190,6 +172,7 @@ def delete_task(task_id: int):
         except Exception as e:
             conn.rollback()
             raise e
+    catalog_cache.invalidate("tasks")
 
 # ========================================================
 # 3. Assignment Management
@@ -220,13 +203,11 @@ def get_all_assignments_for_manager(user_id: int, is_admin: bool = False):
             JOIN Employee e ON a.EmpId = e.EmpId
         """
         
-        if is_admin:
-            sql = base_sql + " ORDER BY p.project_name, t.task_name, e.EmpName"
-            cur.execute(sql)
-        else:
-            sql = base_sql + " WHERE p.project_id IN (SELECT project_id FROM project_approvers WHERE user_id=?) ORDER BY p.project_name, t.task_name, e.EmpName"
-            cur.execute(sql, (user_id,))
-            
+        scope = access_control.get_scope(user_id, ROLE_ID_ADMIN if is_admin else None)
+        scope_sql, params = scope.clause()
+        sql = base_sql + (" WHERE " + scope_sql if scope_sql else "") + " ORDER BY p.project_name, t.task_name, e.EmpName"
+        cur.execute(sql, params)
+
         return dict_fetchall(cur)
 
 def upsert_assignment(data):
@@ -237,8 +218,11 @@ def upsert_assignment(data):
     with get_connection() as conn:
         cur = conn.cursor()
         aid = data.get("AssignmentId")
+        employees = {data['EmpId']}  # whose cached week snapshots list this assignment
         try:
             if aid:
+                cur.execute("SELECT EmpId FROM Assignments WHERE AssignmentId=?", (aid,))
+                employees.update(row[0] for row in cur.fetchall())
                 sql = """
                     UPDATE Assignments
                     SET project_id=?, task_id=?, EmpId=?, planned_hours=?, notes=?, 
@@ -266,72 +250,140 @@ def upsert_assignment(data):
         except Exception as e:
             conn.rollback()
             raise e
+    catalog_cache.invalidate("Assignments")
+    for emp_id in employees:
+        week_prefetch.invalidate(emp_id)
 
 def delete_assignment(assignment_id):
     with get_connection() as conn:
         cur = conn.cursor()
         try:
+            cur.execute("SELECT EmpId FROM Assignments WHERE AssignmentId=?", (assignment_id,))
+            employees = [row[0] for row in cur.fetchall()]
             cur.execute("DELETE FROM Assignments WHERE AssignmentId=?", (assignment_id,))
             conn.commit()
         except Exception as e:
             conn.rollback()
             raise e
+    catalog_cache.invalidate("Assignments")
+    for emp_id in employees:
+        week_prefetch.invalidate(emp_id)
 
 # ========================================================
 # 4. Approvals & Timesheet Management
 # ========================================================
 
-def fetch_submitted_weekly_entries(approver_id: int, role_id: int, sort_order: str = "DESC"):
+def _role_scope_clause(approver_id: int, role_id):
+    """
+    Returns (sql, params) restricting projects aliased `p` to what this role may approve.
+    Admins see everything, so the clause is empty.
+    """
+    return access_control.get_scope(approver_id, role_id).clause()
+
+def fetch_server_time():
+    """Current database time; the high-water mark for delta refreshes of the approvals list."""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT GETDATE()")
+        return cur.fetchone()[0]
+
+def fetch_submitted_weekly_entries(approver_id: int, role_id: int, sort_order: str = "DESC",
+                                   employee_id=None, project_id=None, status=None,
+                                   week_from=None, week_to=None, page_size=None, after=None,
+                                   changed_since=None):
     """
     Fetches submitted timesheets based on role.
     sort_order: "ASC" or "DESC" for updated_at column
+    Optional filters (employee, project, status, week range) are applied in SQL.
+    Pagination is keyset-based: pass page_size and, for later pages,
+    after=(updated_at, entry_id) of the last row of the previous page.
+    changed_since limits the result to entries edited or decided on since
+    that time (updated_at or an approvals.decision_ts), for delta refreshes.
     """
     with get_connection() as conn:
         cur = conn.cursor()
-        
-        # Base Query
-        base_sql = """
-            SELECT te.entry_id, u.EmpName AS employee_name, p.project_name, t.task_name,
+
+        # Validate sort_order
+        if sort_order.upper() not in ["ASC", "DESC"]:
+            sort_order = "DESC"
+        sort_order = sort_order.upper()
+
+        where, params = [], []
+
+        scope_sql, scope_params = _role_scope_clause(approver_id, role_id)
+        if scope_sql:
+            where.append(scope_sql)
+            params.extend(scope_params)
+
+        if employee_id:
+            where.append("te.user_id = ?")
+            params.append(employee_id)
+        if project_id:
+            where.append("te.project_id = ?")
+            params.append(project_id)
+        if status:
+            where.append("te.status = ?")
+            params.append(status)
+        if week_from:
+            where.append("te.week_start_date >= ?")
+            params.append(week_from)
+        if week_to:
+            where.append("te.week_start_date <= ?")
+            params.append(week_to)
+
+        if changed_since is not None:
+            # Approve/reject does not touch updated_at, so decisions are tracked via approvals
+            where.append("""(te.updated_at >= ? OR EXISTS (
+                SELECT 1 FROM approvals ap WHERE ap.entry_id = te.entry_id AND ap.decision_ts >= ?))""")
+            params.extend([changed_since, changed_since])
+
+        if after:
+            after_ts, after_id = after
+            op = "<" if sort_order == "DESC" else ">"
+            where.append(f"(te.updated_at {op} ? OR (te.updated_at = ? AND te.entry_id {op} ?))")
+            params.extend([after_ts, after_ts, after_id])
+
+        top_clause = ""
+        if page_size:
+            top_clause = "TOP (?)"
+            params.insert(0, int(page_size))
+
+        sql = f"""
+            SELECT {top_clause} te.entry_id, te.user_id, te.project_id,
+                   u.EmpName AS employee_name, p.project_name, t.task_name,
                    te.week_start_date, te.total_hours, te.status, te.updated_at
             FROM timesheet_entries te
             JOIN Employee u ON te.user_id = u.EmpId
             JOIN projects p ON te.project_id = p.project_id
             LEFT JOIN tasks t ON te.task_id = t.task_id
         """
-        
-        try:
-            role_id = int(role_id)
-        except (ValueError, TypeError):
-            role_id = 0
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        # entry_id breaks ties so the keyset cursor is stable
+        sql += f" ORDER BY te.updated_at {sort_order}, te.entry_id {sort_order}"
 
-        # Validate sort_order
-        if sort_order.upper() not in ["ASC", "DESC"]:
-            sort_order = "DESC"
-        
-        order_clause = f" ORDER BY te.updated_at {sort_order}, u.EmpName"
+        cur.execute(sql, params)
+        return dict_fetchall(cur)
 
-        if role_id == ROLE_ID_ADMIN:
-            sql = base_sql + order_clause
-            cur.execute(sql)
-            
-        elif role_id == ROLE_ID_DEPT_MANAGER:
-            sql = base_sql + """
-                WHERE p.project_id IN (SELECT project_id FROM project_approvers WHERE user_id = ?) 
-                AND (p.is_billable = 0 OR p.is_billable IS NULL)
-            """ + order_clause
-            cur.execute(sql, (approver_id,))
-            
-        elif role_id == ROLE_ID_PROJECT_MANAGER:
-            sql = base_sql + """
-                WHERE p.project_id IN (SELECT project_id FROM project_approvers WHERE user_id = ?) 
-                AND p.is_billable = 1
-            """ + order_clause
-            cur.execute(sql, (approver_id,))
-        
-        else:
-            sql = base_sql + " WHERE p.project_id IN (SELECT project_id FROM project_approvers WHERE user_id = ?) " + order_clause
-            cur.execute(sql, (approver_id,))
-            
+@catalog_cache.cached("timesheet_entries")
+def fetch_entry_employees(approver_id: int, role_id: int):
+    """
+    Employees who have timesheet entries this approver can see (for the approvals filter).
+    Cached, since the DISTINCT reads every visible entry; dropped by the entry write paths.
+    """
+    with get_connection() as conn:
+        cur = conn.cursor()
+        sql = """
+            SELECT DISTINCT u.EmpId, u.EmpName
+            FROM timesheet_entries te
+            JOIN Employee u ON te.user_id = u.EmpId
+            JOIN projects p ON te.project_id = p.project_id
+        """
+        scope_sql, params = _role_scope_clause(approver_id, role_id)
+        if scope_sql:
+            sql += " WHERE " + scope_sql
+        sql += " ORDER BY u.EmpName"
+        cur.execute(sql, params)
         return dict_fetchall(cur)
 
 def get_timesheet_entry_details(entry_id: int):
@@ -350,6 +402,11 @@ def update_timesheet_entry_full(data):
     with get_connection() as conn:
         cur = conn.cursor()
         try:
+            cur.execute(
+                "SELECT user_id, week_start_date FROM timesheet_entries WHERE entry_id = ?",
+                (data['entry_id'],)
+            )
+            owner = cur.fetchone()
             sql = """
                 UPDATE timesheet_entries
                 SET project_id=?, task_id=?, status=?, notes=?,
@@ -364,61 +421,101 @@ def update_timesheet_entry_full(data):
                 data['entry_id']
             )
             cur.execute(sql, params)
+            rollups.refresh_for_entries(cur, [data['entry_id']])
             conn.commit()
         except Exception as e:
             conn.rollback()
             raise e
+    catalog_cache.invalidate("timesheet_entries")
+    if owner:
+        week_prefetch.invalidate(owner[0], owner[1])
 
-def update_entry_status(entry_id: int, approver_id: int, new_status: str, comment: str = None):
+def _status_email(name, proj, week, new_status, comment):
+    """Builds the (subject, body) of the status notification sent to an employee."""
+    status_color = "green" if new_status == "approved" else "red"
+    
+    subject = f"Timesheet Update: {new_status.upper()} - {proj}"
+    body = f"""
+    <h3>Timesheet Status Update</h3>
+    <p>Hello <b>{name}</b>,</p>
+    <p>Your timesheet entry has been processed.</p>
+    <ul>
+        <li><b>Project:</b> {proj}</li>
+        <li><b>Week Starting:</b> {week}</li>
+        <li><b>Status:</b> <span style="color:{status_color}; font-weight:bold;">{new_status.upper()}</span></li>
+    </ul>
+    <p><b>Manager Comment:</b><br>{comment if comment else 'No comments provided.'}</p>
     """
-    Updates the status of a timesheet entry and logs the approval decision.
-    Triggers an email notification to the employee.
+    return subject, body
+
+# Keeps each IN (...) list well under SQL Server's 2100-parameter limit
+BULK_CHUNK_SIZE = 1000
+
+def bulk_update_entry_status(entry_ids, approver_id: int, new_status: str, comment: str = None):
     """
+    Updates the status of many timesheet entries in one transaction:
+    one UPDATE and one INSERT ... SELECT into approvals per 1000 ids.
+    Employee notifications are queued in email_outbox within the same
+    transaction and delivered by the background outbox worker.
+    Returns the number of entries processed.
+    """
+    entry_ids = list(dict.fromkeys(int(e) for e in entry_ids))
+    if not entry_ids:
+        return 0
+
+    decision = 'approved' if new_status == 'approved' else 'rejected'
+    weeks = set()  # (user_id, week_start_date) whose cached snapshots go stale
+
     with get_connection() as conn:
         cur = conn.cursor()
         try:
-            cur.execute("UPDATE timesheet_entries SET status = ? WHERE entry_id = ?", (new_status, entry_id))
-            decision = 'approved' if new_status == 'approved' else 'rejected'
-            cur.execute(
-                "INSERT INTO approvals (entry_id, approver_id, decision, comment, decision_ts) VALUES (?, ?, ?, ?, GETDATE())",
-                (entry_id, approver_id, decision, comment)
-            )
-            
-            # --- EMAIL NOTIFICATION: NOTIFY EMPLOYEE ---
-            cur.execute("""
-                SELECT e.EmpEmail, e.EmpName, p.project_name, te.week_start_date 
-                FROM timesheet_entries te
-                JOIN Employee e ON te.user_id = e.EmpId
-                JOIN projects p ON te.project_id = p.project_id
-                WHERE te.entry_id = ?
-            """, (entry_id,))
-            row = cur.fetchone()
-            
-            if row and row[0]: # If email exists
-                email, name, proj, week = row
-                
-                status_color = "green" if new_status == "approved" else "red"
-                
-                subject = f"Timesheet Update: {new_status.upper()} - {proj}"
-                body = f"""
-                <h3>Timesheet Status Update</h3>
-                <p>Hello <b>{name}</b>,</p>
-                <p>Your timesheet entry has been processed.</p>
-                <ul>
-                    <li><b>Project:</b> {proj}</li>
-                    <li><b>Week Starting:</b> {week}</li>
-                    <li><b>Status:</b> <span style="color:{status_color}; font-weight:bold;">{new_status.upper()}</span></li>
-                </ul>
-                <p><b>Manager Comment:</b><br>{comment if comment else 'No comments provided.'}</p>
-                """
-                send_email(email, subject, body)
-            # -------------------------------------------
+            for i in range(0, len(entry_ids), BULK_CHUNK_SIZE):
+                chunk = entry_ids[i:i + BULK_CHUNK_SIZE]
+                placeholders = ", ".join(["?"] * len(chunk))
+
+                cur.execute(
+                    f"UPDATE timesheet_entries SET status = ? WHERE entry_id IN ({placeholders})",
+                    [new_status, *chunk]
+                )
+                cur.execute(f"""
+                    INSERT INTO approvals (entry_id, approver_id, decision, comment, decision_ts)
+                    SELECT entry_id, ?, ?, ?, GETDATE()
+                    FROM timesheet_entries WHERE entry_id IN ({placeholders})
+                """, [approver_id, decision, comment, *chunk])
+
+                # --- EMAIL NOTIFICATION: queue for the outbox worker ---
+                cur.execute(f"""
+                    SELECT e.EmpEmail, e.EmpName, p.project_name, te.week_start_date, te.user_id
+                    FROM timesheet_entries te
+                    JOIN Employee e ON te.user_id = e.EmpId
+                    JOIN projects p ON te.project_id = p.project_id
+                    WHERE te.entry_id IN ({placeholders})
+                """, chunk)
+                recipients = cur.fetchall()
+                enqueue_emails(cur, [
+                    (email, *_status_email(name, proj, week, new_status, comment))
+                    for email, name, proj, week, _ in recipients
+                ])
+                weeks.update((user_id, week) for *_, week, user_id in recipients)
+
+                rollups.refresh_for_entries(cur, chunk)
 
             conn.commit()
         except Exception as e:
             conn.rollback()
             raise e
 
+    for user_id, week in weeks:
+        week_prefetch.invalidate(user_id, week)
+    return len(entry_ids)
+
+def update_entry_status(entry_id: int, approver_id: int, new_status: str, comment: str = None):
+    """
+    Updates the status of a timesheet entry and logs the approval decision.
+    Triggers an email notification to the employee.
+    """
+    bulk_update_entry_status([entry_id], approver_id, new_status, comment)
+
 # --- NEW: Admin Create Entry (FIXED) ---
 def create_admin_timesheet_entry(data, admin_id):
     """
@@ -429,12 +526,9 @@ def create_admin_timesheet_entry(data, admin_id):
         cur = conn.cursor()
         try:
             # 1. Attempt to resolve AssignmentID (Optional, but good for linking)
-            cur.execute("""
-                SELECT TOP 1 AssignmentId FROM Assignments 
-                WHERE EmpId = ? AND project_id = ? AND task_id = ?
-            """, (data['target_user_id'], data['project_id'], data['task_id']))
-            row = cur.fetchone()
-            assignment_id = row[0] if row else None
+            assignment_id = assignment_resolver.resolve_one(
+                cur, data['target_user_id'], data['project_id'], data['task_id'], data['week_start_date']
+            )
 
             # 2. Upsert Timesheet Entry
             cur.execute("""
@@ -486,7 +580,12 @@ def create_admin_timesheet_entry(data, admin_id):
                     VALUES (?, ?, 'approved', 'Admin Manual Entry', GETDATE())
                 """, (entry_id, admin_id))
 
+            # 4. Keep the hours rollup in step
+            rollups.refresh_user_weeks(cur, [(data['target_user_id'], data['week_start_date'])])
+
             conn.commit()
         except Exception as e:
             conn.rollback()
-            raise e
\ No newline at end of file
+            raise e
+    catalog_cache.invalidate("timesheet_entries")
+    week_prefetch.invalidate(data['target_user_id'], data['week_start_date'])
@@ -0,0 +1,128 @@
+# ./utils/migrate.py
+"""
+Versioned schema migrations for SQL Server.
+
+Scripts live in migrations/ as NNN_description.sql (SSMS style, batches
+separated by GO lines) and are applied in version order. Each applied
+version is recorded in schema_migrations, so `up` only runs what is new:
+
+    python -m utils.migrate status
+    python -m utils.migrate up
+    python -m utils.migrate baseline 002   # record 001..002 as applied without running them
+
+`USE [db]` batches are skipped; scripts run against the database lib.db
+connects to. The SQLite stand-in builds its whole schema (indexes
+included) from utils.sqlite_backend.SCHEMA_SQL and is not migrated.
+"""
+import re
+from pathlib import Path
+from utils.db import DB_BACKEND, get_connection
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[1] / "migrations"
+
+_GO = re.compile(r"^\s*GO\s*$", re.IGNORECASE | re.MULTILINE)
+_USE = re.compile(r"^\s*USE\s+\[?\w+\]?\s*$", re.IGNORECASE)
+_FILENAME = re.compile(r"^(\d+)_(.+)\.sql$")
+
+_CREATE_TABLE_SQL = """
+    IF OBJECT_ID('dbo.schema_migrations', 'U') IS NULL
+    CREATE TABLE dbo.schema_migrations (
+        version nvarchar(20) NOT NULL PRIMARY KEY,
+        name nvarchar(200) NOT NULL,
+        applied_at datetime NOT NULL DEFAULT GETDATE()
+    )
+"""
+
+
+def available():
+    """[(version, name, path)] for every script in migrations/, in version order."""
+    scripts = []
+    for path in MIGRATIONS_DIR.glob("*.sql"):
+        m = _FILENAME.match(path.name)
+        if m:
+            scripts.append((m.group(1), m.group(2), path))
+    return sorted(scripts)
+
+
+def batches(path):
+    """The script's GO-separated batches, minus empty and USE batches."""
+    text = path.read_text(encoding="utf-8-sig")
+    return [b.strip() for b in _GO.split(text) if b.strip() and not _USE.match(b.strip())]
+
+
+def applied():
+    """{version: applied_at} from schema_migrations (created on first use)."""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(_CREATE_TABLE_SQL)
+        cur.execute("SELECT version, applied_at FROM schema_migrations")
+        return {row[0]: row[1] for row in cur.fetchall()}
+
+
+def pending():
+    done = applied()
+    return [m for m in available() if m[0] not in done]
+
+
+def apply(version, name, path):
+    """Runs one script and records it, in one transaction."""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        try:
+            for batch in batches(path):
+                cur.execute(batch)
+            cur.execute("INSERT INTO schema_migrations (version, name) VALUES (?, ?)", (version, name))
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise e
+
+
+def upgrade():
+    """Applies every pending script in order; returns the versions applied."""
+    done = []
+    for version, name, path in pending():
+        print(f"Applying {path.name} ...", flush=True)
+        apply(version, name, path)
+        done.append(version)
+    return done
+
+
+def baseline(upto):
+    """Records scripts up to `upto` as applied without running them (databases set up by hand)."""
+    recorded = []
+    with get_connection() as conn:
+        cur = conn.cursor()
+        for version, name, _ in pending():
+            if version > upto:
+                break
+            cur.execute("INSERT INTO schema_migrations (version, name) VALUES (?, ?)", (version, name))
+            recorded.append(version)
+        conn.commit()
+    return recorded
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Apply migrations/*.sql to the SQL Server database.")
+    parser.add_argument("command", choices=["status", "up", "baseline"])
+    parser.add_argument("version", nargs="?", help="Last version to record (baseline only).")
+    args = parser.parse_args()
+
+    if DB_BACKEND == "sqlite":
+        sys.exit("The SQLite backend gets its schema from utils.sqlite_backend; nothing to migrate.")
+
+    if args.command == "status":
+        done = applied()
+        for version, name, _ in available():
+            print(f"{version}  {name:<40} {done.get(version, 'pending')}")
+    elif args.command == "up":
+        versions = upgrade()
+        print(f"Applied {', '.join(versions)}." if versions else "Already up to date.")
+    elif args.command == "baseline":
+        if not args.version:
+            parser.error("baseline needs a version, e.g. `baseline 002`")
+        versions = baseline(args.version)
+        print(f"Recorded {', '.join(versions)} as applied." if versions else "Nothing to record.")
@@ -0,0 +1,275 @@
+# ./utils/query_profiler.py
+"""
+Per-rerun SQL instrumentation.
+
+While a run is active on the current thread, every cursor handed out by
+utils.db.get_connection() records its statements: the calling function
+(e.g. utils.manager_queries.fetch_submitted_weekly_entries), duration,
+row count and an estimate of the bytes fetched.
+
+Runs are started by track_page_visit() when an admin has switched the
+profiler on in the sidebar, so each record is tagged with the page.
+Finished runs are aggregated per page and, if QUERY_PROFILE_LOG is set,
+appended to that file as one JSON line each.
+"""
+import datetime
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+QUERY_PROFILE_LOG = os.getenv("QUERY_PROFILE_LOG", "query_profile.jsonl")
+# The same statement shape repeated this often in one run is flagged as N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("QUERY_PROFILE_N_PLUS_ONE", "5"))
+SLOWEST_LIMIT = 5
+
+_local = threading.local()
+_lock = threading.Lock()
+_page_totals = {}  # page -> {"runs", "statements", "total_ms", "rows", "bytes"}
+
+# Frames from these modules are plumbing, not the caller we want to report
+_SKIP_MODULES = ("utils.db", "utils.query_profiler", "contextlib")
+
+
+# ========================================================
+# 1. Runs
+# ========================================================
+
+class QueryRun:
+    """Statements executed during one script run of one page."""
+
+    def __init__(self, page):
+        self.page = page
+        self.started_at = datetime.datetime.now()
+        self._started = time.perf_counter()
+        self.elapsed_ms = None
+        self.statements = []
+        self.finished = False
+
+    def record(self, caller, sql):
+        stmt = {"caller": caller, "sql": " ".join(sql.split())[:300], "ms": 0.0, "rows": 0, "bytes": 0}
+        self.statements.append(stmt)
+        return stmt
+
+    def summary(self):
+        by_caller = {}
+        by_shape = {}
+        for s in self.statements:
+            agg = by_caller.setdefault(s["caller"], {"count": 0, "ms": 0.0, "rows": 0, "bytes": 0})
+            agg["count"] += 1
+            agg["ms"] += s["ms"]
+            agg["rows"] += s["rows"]
+            agg["bytes"] += s["bytes"]
+            shape = (s["caller"], _normalise_sql(s["sql"]))
+            by_shape[shape] = by_shape.get(shape, 0) + 1
+
+        n_plus_one = [
+            {"caller": caller, "sql": sql, "count": count}
+            for (caller, sql), count in by_shape.items() if count >= N_PLUS_ONE_THRESHOLD
+        ]
+        slowest = sorted(self.statements, key=lambda s: s["ms"], reverse=True)[:SLOWEST_LIMIT]
+        return {
+            "page": self.page,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "elapsed_ms": self.elapsed_ms,
+            "statements": len(self.statements),
+            "db_ms": sum(s["ms"] for s in self.statements),
+            "rows": sum(s["rows"] for s in self.statements),
+            "bytes": sum(s["bytes"] for s in self.statements),
+            "by_caller": by_caller,
+            "n_plus_one": sorted(n_plus_one, key=lambda x: x["count"], reverse=True),
+            "slowest": slowest,
+        }
+
+
+def begin_run(page, previous=None):
+    """Starts recording on this thread. A previous run that never reached finish_run() is closed first."""
+    if previous is not None:
+        finish_run(previous)
+    run = QueryRun(page)
+    _local.run = run
+    return run
+
+
+def finish_run(run):
+    """Closes a run (idempotent): updates the per-page totals and writes the JSONL line."""
+    if run is None or run.finished:
+        return None
+    run.finished = True
+    run.elapsed_ms = (time.perf_counter() - run._started) * 1000
+    if getattr(_local, "run", None) is run:
+        _local.run = None
+
+    summary = run.summary()
+    with _lock:
+        totals = _page_totals.setdefault(
+            run.page, {"runs": 0, "statements": 0, "total_ms": 0.0, "rows": 0, "bytes": 0}
+        )
+        totals["runs"] += 1
+        totals["statements"] += summary["statements"]
+        totals["total_ms"] += summary["db_ms"]
+        totals["rows"] += summary["rows"]
+        totals["bytes"] += summary["bytes"]
+        if QUERY_PROFILE_LOG:
+            with open(QUERY_PROFILE_LOG, "a", encoding="utf-8") as f:
+                f.write(json.dumps(summary, default=str) + "\n")
+    return summary
+
+
+def current_run():
+    return getattr(_local, "run", None)
+
+
+def page_totals():
+    """Statement count, DB time, rows and bytes per page over every profiled run."""
+    with _lock:
+        return {page: dict(t) for page, t in _page_totals.items()}
+
+
+def _normalise_sql(sql):
+    """Collapses literals so repeats of the same statement shape group together."""
+    return re.sub(r"\b\d+\b|'[^']*'", "?", sql)
+
+
+def _caller():
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if not module.startswith(_SKIP_MODULES):
+            return f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return "?"
+
+
+def _row_bytes(row):
+    size = 0
+    for v in row:
+        if v is None:
+            continue
+        if isinstance(v, (str, bytes, bytearray)):
+            size += len(v)
+        else:
+            size += 8
+    return size
+
+
+# ========================================================
+# 2. Cursor / Connection Wrappers
+# ========================================================
+
+class ProfiledCursor:
+    """Times execute/fetch calls on a DB-API cursor and counts fetched rows and bytes."""
+
+    def __init__(self, cursor, run):
+        self._cursor = cursor
+        self._run = run
+        self._stmt = None
+
+    def execute(self, sql, *params):
+        return self._timed_execute(self._cursor.execute, sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self._timed_execute(self._cursor.executemany, sql, (seq_of_params,))
+
+    def _timed_execute(self, fn, sql, params):
+        self._stmt = self._run.record(_caller(), sql)
+        started = time.perf_counter()
+        try:
+            fn(sql, *params)
+        finally:
+            self._stmt["ms"] += (time.perf_counter() - started) * 1000
+        # pyodbc returns the cursor itself; keep the wrapper in the chain
+        return self
+
+    def _timed_fetch(self, fn, *args):
+        started = time.perf_counter()
+        result = fn(*args)
+        if self._stmt is not None:
+            self._stmt["ms"] += (time.perf_counter() - started) * 1000
+            rows = result if isinstance(result, list) else ([result] if result is not None else [])
+            self._stmt["rows"] += len(rows)
+            self._stmt["bytes"] += sum(_row_bytes(r) for r in rows)
+        return result
+
+    def fetchone(self):
+        return self._timed_fetch(self._cursor.fetchone)
+
+    def fetchall(self):
+        return self._timed_fetch(self._cursor.fetchall)
+
+    def fetchmany(self, size=None):
+        if size is None:
+            return self._timed_fetch(self._cursor.fetchmany)
+        return self._timed_fetch(self._cursor.fetchmany, size)
+
+    def __iter__(self):
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class ProfiledConnection:
+    """Hands out ProfiledCursors; everything else goes to the real connection."""
+
+    def __init__(self, conn, run):
+        self._conn = conn
+        self._run = run
+
+    def cursor(self):
+        return ProfiledCursor(self._conn.cursor(), self._run)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def wrap(conn):
+    """Returns `conn` instrumented for the current thread's run, or unchanged if none is active."""
+    run = getattr(_local, "run", None)
+    if run is None:
+        return conn
+    return ProfiledConnection(conn, run)
+
+
+# ========================================================
+# 3. Sidebar Panel
+# ========================================================
+
+def render_panel(run):
+    """Developer panel for the sidebar: this run's totals, N+1 suspects and slowest statements."""
+    import pandas as pd
+    import streamlit as st
+
+    if run is None:
+        st.sidebar.caption("No profiled run yet.")
+        return
+    summary = run.summary()
+    with st.sidebar.expander(f"🔍 Queries: {run.page}", expanded=True):
+        c1, c2 = st.columns(2)
+        c1.metric("Statements", summary["statements"])
+        c2.metric("DB time", f"{summary['db_ms']:.0f} ms")
+        st.caption(f"{summary['rows']} rows · {summary['bytes'] / 1024:.1f} KB fetched")
+
+        if summary["n_plus_one"]:
+            st.markdown("**Possible N+1**")
+            st.dataframe(pd.DataFrame(summary["n_plus_one"]), hide_index=True)
+
+        if summary["slowest"]:
+            st.markdown("**Slowest statements**")
+            st.dataframe(
+                pd.DataFrame(summary["slowest"])[["caller", "ms", "rows", "sql"]],
+                hide_index=True
+            )
+
+        totals = page_totals()
+        if totals:
+            st.markdown("**Per page (all profiled runs)**")
+            st.dataframe(
+                pd.DataFrame.from_dict(totals, orient="index").rename_axis("page").reset_index()
+            )
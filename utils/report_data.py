@@ -0,0 +1,131 @@
+# ./utils/report_data.py
+"""
+Detailed report data, read straight from the DB cursor in chunks.
+Used for on-demand CSV / Parquet exports so a year-long export never
+materialises as a DataFrame (plus copies) inside the Streamlit process,
+and for the typed DataFrame behind the on-screen report tabs.
+"""
+import csv
+import datetime
+import decimal
+import io
+import pyarrow as pa
+import pyarrow.parquet as pq
+from utils.db import get_connection, fetch_dataframe
+from utils import access_control
+
+EXPORT_CHUNK_ROWS = 5000
+
+# Columns of the detailed report, in display/export order
+DETAIL_COLUMNS = [
+    "EmpName", "project_name", "task_name", "TaskTypeName",
+    "week_start_date", "status", "total_hours", "notes"
+]
+
+DETAIL_SCHEMA = pa.schema([
+    ("EmpName", pa.string()),
+    ("project_name", pa.string()),
+    ("task_name", pa.string()),
+    ("TaskTypeName", pa.string()),
+    ("week_start_date", pa.date32()),
+    ("status", pa.string()),
+    ("total_hours", pa.float64()),
+    ("notes", pa.string()),
+])
+
+def _detailed_query(start_date, end_date, project_id, emp_id, user_id, is_admin, with_billable=False):
+    sql = f"""
+        SELECT e.EmpName, p.project_name, t.task_name, tt.TaskTypeName,
+               te.week_start_date, te.status, te.total_hours, te.notes
+               {", p.is_billable" if with_billable else ""}
+        FROM timesheet_entries te
+        JOIN Employee e ON te.user_id = e.EmpId
+        JOIN projects p ON te.project_id = p.project_id
+        LEFT JOIN tasks t ON te.task_id = t.task_id
+        LEFT JOIN TaskTypes tt ON t.TaskTypeId = tt.TaskTypeId
+        WHERE te.week_start_date >= ? AND te.week_start_date <= ?
+    """
+    params = [start_date, end_date]
+    if not is_admin:
+        scope_sql, scope_params = access_control.get_scope(user_id).clause("p.project_id", billable_scope=False)
+        if scope_sql:
+            sql += " AND " + scope_sql
+            params.extend(scope_params)
+    if project_id and project_id != "All":
+        sql += " AND te.project_id = ?"
+        params.append(project_id)
+    if emp_id and emp_id != "All":
+        sql += " AND te.user_id = ?"
+        params.append(emp_id)
+    sql += " ORDER BY te.week_start_date, e.EmpName, te.entry_id"
+    return sql, params
+
+def fetch_detailed_frame(start_date, end_date, project_id, emp_id, user_id, is_admin):
+    """
+    Detailed report as a typed DataFrame (DETAIL_COLUMNS + is_billable):
+    float64 hours, date week_start_date, categorical names and status.
+    """
+    sql, params = _detailed_query(
+        start_date, end_date, project_id, emp_id, user_id, is_admin, with_billable=True
+    )
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(sql, params)
+        return fetch_dataframe(cur, date_columns=["week_start_date"],
+                               categorical_columns=["EmpName", "project_name", "TaskTypeName", "status"])
+
+def iter_detailed_rows(start_date, end_date, project_id, emp_id, user_id, is_admin,
+                       chunk_size=EXPORT_CHUNK_ROWS):
+    """Yields lists of plain row tuples (DETAIL_COLUMNS order), chunk_size at a time."""
+    sql, params = _detailed_query(start_date, end_date, project_id, emp_id, user_id, is_admin)
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(sql, params)
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield [_normalise(r) for r in rows]
+
+def _normalise(row):
+    """Decimal -> float, datetime -> date, so CSV and Arrow see clean values."""
+    out = []
+    for v in row:
+        if isinstance(v, decimal.Decimal):
+            v = float(v)
+        elif isinstance(v, datetime.datetime):
+            v = v.date()
+        out.append(v)
+    return tuple(out)
+
+# ========================================================
+# Exports
+# ========================================================
+
+def export_detailed_csv(start_date, end_date, project_id, emp_id, user_id, is_admin):
+    """Streams the detailed report into CSV bytes, one cursor chunk at a time."""
+    buffer = io.BytesIO()
+    text = io.TextIOWrapper(buffer, encoding="utf-8", newline="")
+    writer = csv.writer(text, lineterminator="\n")
+    writer.writerow(DETAIL_COLUMNS)
+    for chunk in iter_detailed_rows(start_date, end_date, project_id, emp_id, user_id, is_admin):
+        writer.writerows(chunk)
+    text.flush()
+    text.detach()
+    return buffer.getvalue()
+
+def export_detailed_parquet(start_date, end_date, project_id, emp_id, user_id, is_admin):
+    """Streams the detailed report into a Parquet file, one row group per cursor chunk."""
+    buffer = io.BytesIO()
+    with pq.ParquetWriter(buffer, DETAIL_SCHEMA) as writer:
+        wrote_any = False
+        for chunk in iter_detailed_rows(start_date, end_date, project_id, emp_id, user_id, is_admin):
+            columns = list(zip(*chunk))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(col, type=field.type) for col, field in zip(columns, DETAIL_SCHEMA)],
+                schema=DETAIL_SCHEMA
+            ))
+            wrote_any = True
+        if not wrote_any:
+            writer.write_table(DETAIL_SCHEMA.empty_table())
+    return buffer.getvalue()
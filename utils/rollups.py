@@ -0,0 +1,184 @@
+# ./utils/rollups.py
+"""
+Pre-aggregated weekly hours (timesheet_rollup_weekly).
+
+Every write path that changes timesheet_entries calls one of the refresh_*
+helpers with its own cursor, inside its own transaction. The helpers
+recompute only the (employee, week) buckets that were touched, so the
+rollup stays exact without rescanning the whole table.
+
+Backfill / repair:
+    python -m utils.rollups rebuild
+"""
+from utils.db import get_connection, dict_fetchall
+from utils import access_control
+
+# Keeps each statement under SQL Server's 2100-parameter limit (2 params per bucket)
+REFRESH_CHUNK_SIZE = 500
+
+_ROLLUP_COLUMNS = """
+    week_start_date, project_id, user_id, TaskTypeId, status,
+    is_billable, total_hours, entry_count
+"""
+
+_ROLLUP_SELECT = """
+    SELECT te.week_start_date, te.project_id, te.user_id,
+           COALESCE(t.TaskTypeId, 0), te.status,
+           COALESCE(p.is_billable, 0), SUM(COALESCE(te.total_hours, 0)), COUNT(*)
+    FROM timesheet_entries te
+    JOIN projects p ON te.project_id = p.project_id
+    LEFT JOIN tasks t ON te.task_id = t.task_id
+"""
+
+_ROLLUP_GROUP_BY = """
+    GROUP BY te.week_start_date, te.project_id, te.user_id,
+             COALESCE(t.TaskTypeId, 0), te.status, COALESCE(p.is_billable, 0)
+"""
+
+# ========================================================
+# 1. Incremental Maintenance (caller's transaction)
+# ========================================================
+
+def refresh_user_weeks(cur, user_weeks):
+    """Recomputes the rollup rows of the given (user_id, week_start_date) buckets."""
+    buckets = list(dict.fromkeys((int(u), w) for u, w in user_weeks))
+    for i in range(0, len(buckets), REFRESH_CHUNK_SIZE):
+        chunk = buckets[i:i + REFRESH_CHUNK_SIZE]
+        params = [v for bucket in chunk for v in bucket]
+        match = " OR ".join(["(user_id = ? AND week_start_date = ?)"] * len(chunk))
+        match_te = " OR ".join(["(te.user_id = ? AND te.week_start_date = ?)"] * len(chunk))
+
+        cur.execute(f"DELETE FROM timesheet_rollup_weekly WHERE {match}", params)
+        cur.execute(
+            f"INSERT INTO timesheet_rollup_weekly ({_ROLLUP_COLUMNS}) "
+            f"{_ROLLUP_SELECT} WHERE {match_te} {_ROLLUP_GROUP_BY}",
+            params
+        )
+
+def user_weeks_for_entries(cur, entry_ids):
+    """The (user_id, week_start_date) buckets the given entries belong to."""
+    entry_ids = list(entry_ids)
+    buckets = []
+    for i in range(0, len(entry_ids), 1000):
+        chunk = entry_ids[i:i + 1000]
+        placeholders = ", ".join(["?"] * len(chunk))
+        cur.execute(
+            f"SELECT DISTINCT user_id, week_start_date FROM timesheet_entries WHERE entry_id IN ({placeholders})",
+            chunk
+        )
+        buckets.extend(tuple(r) for r in cur.fetchall())
+    return buckets
+
+def refresh_for_entries(cur, entry_ids):
+    refresh_user_weeks(cur, user_weeks_for_entries(cur, entry_ids))
+
+def refresh_for_task(cur, task_id):
+    """A task moved to another task type: re-bucket every week that logged it."""
+    cur.execute("SELECT DISTINCT user_id, week_start_date FROM timesheet_entries WHERE task_id = ?", (task_id,))
+    refresh_user_weeks(cur, [tuple(r) for r in cur.fetchall()])
+
+def refresh_project_billable(project_id):
+    """Copies a project's current billable flag onto its rollup rows (after a project edit)."""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute("""
+                UPDATE timesheet_rollup_weekly
+                SET is_billable = COALESCE((SELECT is_billable FROM projects WHERE project_id = ?), 0)
+                WHERE project_id = ?
+            """, (project_id, project_id))
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise e
+
+def rebuild():
+    """Recomputes the whole rollup table from timesheet_entries in one transaction."""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute("DELETE FROM timesheet_rollup_weekly")
+            cur.execute(
+                f"INSERT INTO timesheet_rollup_weekly ({_ROLLUP_COLUMNS}) {_ROLLUP_SELECT} {_ROLLUP_GROUP_BY}"
+            )
+            cur.execute("SELECT COUNT(*) FROM timesheet_rollup_weekly")
+            count = int(cur.fetchone()[0])
+            conn.commit()
+            return count
+        except Exception as e:
+            conn.rollback()
+            raise e
+
+# ========================================================
+# 2. Report Readers
+# ========================================================
+
+def _rollup_filters(start_date, end_date, user_id, is_admin, project_id=None, emp_id=None):
+    where = ["r.week_start_date >= ?", "r.week_start_date <= ?"]
+    params = [start_date, end_date]
+    if not is_admin:
+        scope_sql, scope_params = access_control.get_scope(user_id).clause("r.project_id", billable_scope=False)
+        if scope_sql:
+            where.append(scope_sql)
+            params.extend(scope_params)
+    if project_id and project_id != "All":
+        where.append("r.project_id = ?")
+        params.append(project_id)
+    if emp_id and emp_id != "All":
+        where.append("r.user_id = ?")
+        params.append(emp_id)
+    return " WHERE " + " AND ".join(where), params
+
+def fetch_rollup_totals(start_date, end_date, user_id, is_admin, project_id=None, emp_id=None):
+    """Headline metrics: total hours, billable hours and distinct employees."""
+    where, params = _rollup_filters(start_date, end_date, user_id, is_admin, project_id, emp_id)
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(f"""
+            SELECT CAST(COALESCE(SUM(r.total_hours), 0) AS float) AS total_hours,
+                   CAST(COALESCE(SUM(CASE WHEN r.is_billable = 1 THEN r.total_hours ELSE 0 END), 0) AS float) AS billable_hours,
+                   COUNT(DISTINCT r.user_id) AS active_employees
+            FROM timesheet_rollup_weekly r
+            {where}
+        """, params)
+        return dict_fetchall(cur)[0]
+
+def fetch_rollup_project_summary(start_date, end_date, user_id, is_admin):
+    """Hours per project for the executive summary chart."""
+    where, params = _rollup_filters(start_date, end_date, user_id, is_admin)
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(f"""
+            SELECT p.project_name, CAST(SUM(r.total_hours) AS float) AS total_hours
+            FROM timesheet_rollup_weekly r
+            JOIN projects p ON r.project_id = p.project_id
+            {where}
+            GROUP BY r.project_id, p.project_name
+            ORDER BY total_hours DESC
+        """, params)
+        return dict_fetchall(cur)
+
+def fetch_rollup_status_breakdown(start_date, end_date, user_id, is_admin):
+    """Entry count and hours per status for the executive summary chart."""
+    where, params = _rollup_filters(start_date, end_date, user_id, is_admin)
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(f"""
+            SELECT r.status, SUM(r.entry_count) AS entry_count, CAST(SUM(r.total_hours) AS float) AS total_hours
+            FROM timesheet_rollup_weekly r
+            {where}
+            GROUP BY r.status
+            ORDER BY r.status
+        """, params)
+        return dict_fetchall(cur)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Maintain the weekly hours rollup.")
+    parser.add_argument("command", choices=["rebuild"])
+    args = parser.parse_args()
+
+    if args.command == "rebuild":
+        print(f"Rebuilt timesheet_rollup_weekly: {rebuild()} rows.")
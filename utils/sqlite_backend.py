@@ -0,0 +1,432 @@
+# ./utils/sqlite_backend.py
+"""
+SQLite stand-in for the SQL Server database, for offline benchmarking and
+regression runs on a laptop.
+
+Enable it with:
+    TIMESHEET_DB_BACKEND=sqlite TIMESHEET_SQLITE_PATH=timesheet_local.db
+
+- SCHEMA_SQL mirrors the tables of DB_schema.sql and migrations/ that the
+  app touches. total_hours is a STORED generated column, like the
+  PERSISTED computed column in SQL Server.
+- Cursors translate the T-SQL idioms used by the query modules (GETDATE,
+  DATEADD, TOP, OUTPUT INSERTED, UPDATE TOP, table hints, SET NOCOUNT
+  batches read with nextset()) before handing them to sqlite3.
+MERGE has no SQLite equivalent; callers branch on utils.db.DB_BACKEND.
+
+Create an empty database:
+    python -m utils.sqlite_backend init timesheet_local.db
+"""
+import datetime
+import decimal
+import functools
+import os
+import re
+import sqlite3
+
+SQLITE_PATH = os.getenv("TIMESHEET_SQLITE_PATH", "timesheet_local.db")
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS Department (
+    DepId INTEGER PRIMARY KEY AUTOINCREMENT,
+    DepName TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS UserType (
+    UserTypeId INTEGER PRIMARY KEY,
+    UserTypeName TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS Employee (
+    EmpId INTEGER PRIMARY KEY AUTOINCREMENT,
+    EmpName TEXT NOT NULL,
+    DepId INTEGER REFERENCES Department (DepId),
+    EmpPositionId INTEGER,
+    EmpEmail TEXT NOT NULL,
+    Password TEXT NOT NULL,
+    ParentManager INTEGER REFERENCES Employee (EmpId),
+    ApprovalTypeId INTEGER NOT NULL,
+    SAP_ID INTEGER NOT NULL,
+    UserTypeId INTEGER REFERENCES UserType (UserTypeId),
+    IsFirstLogin INTEGER NOT NULL,
+    EmailCC INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS projects (
+    project_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    project_name TEXT NOT NULL,
+    client_name TEXT,
+    start_date DATETIME,
+    end_date DATETIME,
+    status TEXT,
+    project_number TEXT,
+    planned_hours INTEGER,
+    DepId INTEGER REFERENCES Department (DepId),
+    is_billable INTEGER NOT NULL DEFAULT 1
+);
+
+CREATE TABLE IF NOT EXISTS project_approvers (
+    project_id INTEGER NOT NULL REFERENCES projects (project_id) ON DELETE CASCADE,
+    user_id INTEGER NOT NULL REFERENCES Employee (EmpId),
+    PRIMARY KEY (project_id, user_id)
+);
+
+CREATE TABLE IF NOT EXISTS TaskTypes (
+    TaskTypeId INTEGER PRIMARY KEY AUTOINCREMENT,
+    TaskTypeName TEXT NOT NULL,
+    DepId INTEGER REFERENCES Department (DepId)
+);
+
+-- Tasks are global: upsert_task does not set project_id
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_name TEXT NOT NULL,
+    description TEXT,
+    created_by INTEGER REFERENCES Employee (EmpId),
+    project_id INTEGER REFERENCES projects (project_id) ON DELETE CASCADE,
+    created_at DATETIME NOT NULL,
+    TaskTypeId INTEGER NOT NULL REFERENCES TaskTypes (TaskTypeId)
+);
+
+CREATE TABLE IF NOT EXISTS Assignments (
+    AssignmentId INTEGER PRIMARY KEY AUTOINCREMENT,
+    project_id INTEGER REFERENCES projects (project_id),
+    task_id INTEGER NOT NULL REFERENCES tasks (task_id) ON DELETE CASCADE,
+    EmpId INTEGER NOT NULL REFERENCES Employee (EmpId),
+    assignment_name TEXT,
+    planned_hours INTEGER NOT NULL,
+    notes TEXT,
+    start_date DATETIME,
+    end_date DATETIME,
+    status TEXT DEFAULT 'active',
+    created_at DATETIME DEFAULT (datetime('now', 'localtime'))
+);
+
+CREATE TABLE IF NOT EXISTS timesheet_entries (
+    entry_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL REFERENCES Employee (EmpId),
+    project_id INTEGER NOT NULL REFERENCES projects (project_id),
+    task_id INTEGER REFERENCES tasks (task_id),
+    week_start_date DATETIME NOT NULL,
+    monday_hours REAL,
+    tuesday_hours REAL,
+    wednesday_hours REAL,
+    thursday_hours REAL,
+    friday_hours REAL,
+    saturday_hours REAL,
+    sunday_hours REAL,
+    status TEXT NOT NULL,
+    notes TEXT,
+    created_at DATETIME NOT NULL,
+    updated_at DATETIME NOT NULL,
+    total_hours REAL GENERATED ALWAYS AS (
+        coalesce(monday_hours, 0) + coalesce(tuesday_hours, 0) + coalesce(wednesday_hours, 0)
+        + coalesce(thursday_hours, 0) + coalesce(friday_hours, 0) + coalesce(saturday_hours, 0)
+        + coalesce(sunday_hours, 0)
+    ) STORED,
+    AssignmentId INTEGER REFERENCES Assignments (AssignmentId)
+);
+
+CREATE TABLE IF NOT EXISTS approvals (
+    approval_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    entry_id INTEGER NOT NULL REFERENCES timesheet_entries (entry_id) ON DELETE CASCADE,
+    approver_id INTEGER NOT NULL REFERENCES Employee (EmpId),
+    decision TEXT NOT NULL,
+    comment TEXT,
+    decision_ts DATETIME NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS Vacation (
+    VacationId INTEGER PRIMARY KEY AUTOINCREMENT,
+    VacationDesc TEXT,
+    VacationTypeId INTEGER NOT NULL,
+    EmpId INTEGER NOT NULL REFERENCES Employee (EmpId),
+    IsAccepted INTEGER,
+    [From] DATE NOT NULL,
+    [To] DATE NOT NULL,
+    DateOfRequestingVacation DATE NOT NULL,
+    IsMedical INTEGER,
+    IsCancel INTEGER,
+    Qouta REAL,
+    Attachment BLOB
+);
+
+CREATE TABLE IF NOT EXISTS email_outbox (
+    outbox_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    recipient TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    body TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at DATETIME NOT NULL DEFAULT (datetime('now', 'localtime')),
+    next_attempt_at DATETIME NOT NULL DEFAULT (datetime('now', 'localtime')),
+    claimed_at DATETIME,
+    sent_at DATETIME
+);
+CREATE INDEX IF NOT EXISTS IX_email_outbox_status_next_attempt ON email_outbox (status, next_attempt_at);
+
+CREATE TABLE IF NOT EXISTS timesheet_rollup_weekly (
+    week_start_date DATETIME NOT NULL,
+    project_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    TaskTypeId INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    is_billable INTEGER NOT NULL,
+    total_hours REAL NOT NULL,
+    entry_count INTEGER NOT NULL,
+    PRIMARY KEY (week_start_date, project_id, user_id, TaskTypeId, status)
+);
+CREATE INDEX IF NOT EXISTS IX_timesheet_rollup_weekly_user_week ON timesheet_rollup_weekly (user_id, week_start_date);
+CREATE INDEX IF NOT EXISTS IX_timesheet_rollup_weekly_project ON timesheet_rollup_weekly (project_id, is_billable);
+
+-- migrations/003_covering_indexes.sql (SQLite has no INCLUDE columns)
+CREATE INDEX IF NOT EXISTS IX_timesheet_entries_user_week ON timesheet_entries (user_id, week_start_date);
+CREATE INDEX IF NOT EXISTS IX_timesheet_entries_project_status_updated
+    ON timesheet_entries (project_id, status, updated_at DESC, entry_id DESC);
+CREATE INDEX IF NOT EXISTS IX_timesheet_entries_updated ON timesheet_entries (updated_at DESC, entry_id DESC);
+CREATE INDEX IF NOT EXISTS IX_timesheet_entries_week ON timesheet_entries (week_start_date);
+CREATE INDEX IF NOT EXISTS IX_Assignments_emp_dates ON Assignments (EmpId, start_date, end_date);
+CREATE INDEX IF NOT EXISTS IX_Assignments_project ON Assignments (project_id);
+CREATE INDEX IF NOT EXISTS IX_approvals_entry_decision ON approvals (entry_id, decision_ts);
+CREATE INDEX IF NOT EXISTS IX_Employee_DepId ON Employee (DepId);
+CREATE INDEX IF NOT EXISTS IX_project_approvers_user ON project_approvers (user_id, project_id);
+"""
+
+# ========================================================
+# 1. Type Adapters
+# ========================================================
+# DATETIME columns are stored as 'YYYY-MM-DD HH:MM:SS' text, so dates and
+# datetimes bound as parameters compare correctly against stored values.
+
+def _adapt_datetime(value):
+    return value.isoformat(sep=" ")
+
+def _adapt_date(value):
+    return f"{value.isoformat()} 00:00:00"
+
+def _convert_datetime(raw):
+    return datetime.datetime.fromisoformat(raw.decode())
+
+def _convert_date(raw):
+    return datetime.date.fromisoformat(raw.decode()[:10])
+
+sqlite3.register_adapter(datetime.datetime, _adapt_datetime)
+sqlite3.register_adapter(datetime.date, _adapt_date)
+sqlite3.register_adapter(decimal.Decimal, float)
+sqlite3.register_converter("DATETIME", _convert_datetime)
+sqlite3.register_converter("DATE", _convert_date)
+
+# ========================================================
+# 2. T-SQL Translation
+# ========================================================
+
+_NOW = "datetime('now', 'localtime')"
+_TABLE_HINT = re.compile(r"\bWITH\s*\(\s*(?:NOLOCK|HOLDLOCK|ROWLOCK|READPAST|UPDLOCK|XLOCK|PAGLOCK|TABLOCK)"
+                         r"(?:\s*,\s*(?:NOLOCK|HOLDLOCK|ROWLOCK|READPAST|UPDLOCK|XLOCK|PAGLOCK|TABLOCK))*\s*\)",
+                         re.IGNORECASE)
+_DATEADD = re.compile(r"DATEADD\(\s*(second|minute|hour|day)\s*,\s*([^,]+?)\s*,\s*GETDATE\(\)\s*\)", re.IGNORECASE)
+_GETDATE = re.compile(r"GETDATE\(\)", re.IGNORECASE)
+_SELECT_TOP = re.compile(r"^(\s*SELECT\s+(?:DISTINCT\s+)?)TOP\s*(?:\(\s*([^)]+?)\s*\)|(\d+))\s", re.IGNORECASE)
+_UPDATE_TOP = re.compile(
+    r"^\s*UPDATE\s+TOP\s*\(\s*([^)]+?)\s*\)\s+(\w+)\s+SET\s+(.*?)"
+    r"(?:\s+OUTPUT\s+(.*?))?\s+WHERE\s+(.*)$",
+    re.IGNORECASE | re.DOTALL
+)
+_INSERT_OUTPUT = re.compile(r"^(\s*INSERT\s+INTO\s+.*?\))\s*OUTPUT\s+(.*?)\s+((?:VALUES|SELECT)\b.*)$",
+                            re.IGNORECASE | re.DOTALL)
+_INSERTED_PREFIX = re.compile(r"\binserted\.", re.IGNORECASE)
+_NOCOUNT = re.compile(r"^\s*SET\s+NOCOUNT\s+(ON|OFF)\s*$", re.IGNORECASE)
+
+
+def _number_placeholders(statement):
+    """'? ... ?' -> '?1 ... ?2' so clauses can move (TOP -> LIMIT) without reordering params."""
+    counter = iter(range(1, statement.count("?") + 1))
+    return re.sub(r"\?", lambda _: f"?{next(counter)}", statement)
+
+
+def _translate_statement(statement):
+    if re.match(r"^\s*MERGE\b", statement, re.IGNORECASE):
+        raise NotImplementedError("MERGE is not supported by the SQLite backend; branch on utils.db.DB_BACKEND.")
+
+    sql = _number_placeholders(statement)
+    sql = _TABLE_HINT.sub("", sql)
+    sql = _DATEADD.sub(lambda m: f"datetime('now', 'localtime', ({m.group(2)}) || ' {m.group(1).lower()}')", sql)
+    sql = _GETDATE.sub(_NOW, sql)
+
+    m = _UPDATE_TOP.match(sql)
+    if m:
+        limit, table, set_clause, output, where = m.groups()
+        sql = (f"UPDATE {table} SET {set_clause} "
+               f"WHERE rowid IN (SELECT rowid FROM {table} WHERE {where} LIMIT {limit})")
+        if output:
+            sql += " RETURNING " + _INSERTED_PREFIX.sub("", output)
+        return sql
+
+    m = _SELECT_TOP.match(sql)
+    if m:
+        sql = m.group(1) + sql[m.end():] + f" LIMIT {m.group(2) or m.group(3)}"
+
+    m = _INSERT_OUTPUT.match(sql)
+    if m:
+        sql = f"{m.group(1)} {m.group(3)} RETURNING {_INSERTED_PREFIX.sub('', m.group(2))}"
+
+    return sql
+
+
+@functools.lru_cache(maxsize=512)
+def translate(sql):
+    """
+    Splits a T-SQL batch into statements and translates each one.
+    Returns a tuple of (sqlite_sql, param_count); SET NOCOUNT is dropped.
+    """
+    statements = []
+    for statement in re.split(r";\s*(?=\n|$)", sql):
+        if not statement.strip() or _NOCOUNT.match(statement):
+            continue
+        statements.append((_translate_statement(statement), statement.count("?")))
+    return tuple(statements)
+
+# ========================================================
+# 3. DB-API Wrappers
+# ========================================================
+
+class SqliteCursor:
+    """
+    sqlite3 cursor that accepts the app's T-SQL.
+    Multi-statement batches are run in order and their result sets buffered,
+    so nextset() behaves like pyodbc's.
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._sets = None  # [(description, rows)] for multi-statement batches
+
+    @staticmethod
+    def _params(params):
+        if len(params) == 1 and isinstance(params[0], (list, tuple)):
+            return list(params[0])
+        return list(params)
+
+    def execute(self, sql, *params):
+        params = self._params(params)
+        statements = translate(sql)
+        self._sets = None
+        if len(statements) == 1:
+            self._cursor.execute(statements[0][0], params)
+            return self
+
+        sets, offset = [], 0
+        for statement, count in statements:
+            self._cursor.execute(statement, params[offset:offset + count])
+            offset += count
+            if self._cursor.description is not None:
+                sets.append((self._cursor.description, self._cursor.fetchall()))
+        self._sets = sets or [(None, [])]
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        (statement, _), = translate(sql)
+        self._sets = None
+        self._cursor.executemany(statement, [list(p) for p in seq_of_params])
+        return self
+
+    @property
+    def description(self):
+        if self._sets is not None:
+            return self._sets[0][0]
+        return self._cursor.description
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def fetchone(self):
+        if self._sets is not None:
+            rows = self._sets[0][1]
+            return rows.pop(0) if rows else None
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=1):
+        if self._sets is not None:
+            rows = self._sets[0][1]
+            chunk, self._sets[0] = rows[:size], (self._sets[0][0], rows[size:])
+            return chunk
+        return self._cursor.fetchmany(size)
+
+    def fetchall(self):
+        if self._sets is not None:
+            rows = self._sets[0][1]
+            self._sets[0] = (self._sets[0][0], [])
+            return rows
+        return self._cursor.fetchall()
+
+    def nextset(self):
+        if self._sets is None or len(self._sets) <= 1:
+            return False
+        self._sets.pop(0)
+        return True
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def close(self):
+        self._cursor.close()
+
+
+class SqliteConnection:
+    """Connection wrapper handing out translating cursors."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self):
+        return SqliteCursor(self._conn.cursor())
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        self._conn.close()
+
+    def explain(self, sql, params=()):
+        """EXPLAIN QUERY PLAN detail lines for each statement of a T-SQL batch."""
+        params, details, offset = list(params), [], 0
+        for statement, count in translate(sql):
+            rows = self._conn.execute("EXPLAIN QUERY PLAN " + statement, params[offset:offset + count])
+            details.extend(row[3] for row in rows)
+            offset += count
+        return details
+
+
+def create_schema(conn):
+    conn.executescript(SCHEMA_SQL)
+    conn.commit()
+
+
+def connect(path=None):
+    """Opens (and if needed creates) the local database. Safe to share across threads via the pool."""
+    path = path or SQLITE_PATH
+    conn = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES,
+                           check_same_thread=False, timeout=30)
+    conn.execute("PRAGMA foreign_keys = ON")
+    if path != ":memory:":
+        conn.execute("PRAGMA journal_mode = WAL")
+    create_schema(conn)
+    return SqliteConnection(conn)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Local SQLite stand-in database.")
+    parser.add_argument("command", choices=["init"])
+    parser.add_argument("path", nargs="?", default=SQLITE_PATH)
+    args = parser.parse_args()
+
+    if args.command == "init":
+        connect(args.path).close()
+        print(f"Schema ready in {args.path}")
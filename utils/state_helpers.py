@@ -1,5 +1,10 @@
 # ./utils/state_helpers.py
+import time
 import streamlit as st
+from utils import query_profiler
+
+# Longest a tab's result is reused across reruns while the tab stays open
+TAB_RESULT_TTL_SECONDS = 30
 
 def get_dialog_keys():
     """Returns the list of all dialog keys used in the app."""
@@ -54,11 +59,49 @@ def track_page_visit(page_name):
     """
     Call this at the top of every page.
     If the page_name has changed (user navigated), it clears all dialog states.
+    Also starts a query profiling run for the page when the profiler is on.
     """
+    if st.session_state.get("query_profiler_enabled"):
+        st.session_state["query_profile_run"] = query_profiler.begin_run(
+            page_name, previous=st.session_state.get("query_profile_run")
+        )
+
     if "current_page" not in st.session_state:
         st.session_state["current_page"] = page_name
         return
 
     if st.session_state["current_page"] != page_name:
         reset_dialog_state()
-        st.session_state["current_page"] = page_name
\ No newline at end of file
+        drop_tab_results()
+        st.session_state["current_page"] = page_name
+
+def keep_widget_state(keys):
+    """
+    Streamlit forgets the state of widgets that are not drawn in a run.
+    Re-assigning their keys keeps filters of hidden (lazy) tabs intact
+    until the tab is opened again.
+    """
+    for key in keys:
+        if key in st.session_state:
+            st.session_state[key] = st.session_state[key]
+
+def tab_result(tab, loader, ttl=TAB_RESULT_TTL_SECONDS):
+    """
+    The last result `loader()` returned for the open dashboard tab, reused by
+    reruns while the tab stays open (button clicks, dialogs). The dashboard
+    drops it when another tab is opened, so opening a tab always reloads;
+    it is also reloaded after `ttl` seconds or once a write path calls
+    drop_tab_results().
+    """
+    key = f"tab_result_{tab}"
+    cached = st.session_state.get(key)
+    if cached is None or time.monotonic() - cached[0] > ttl:
+        cached = (time.monotonic(), loader())
+        st.session_state[key] = cached
+    return cached[1]
+
+def drop_tab_results(*tabs):
+    """Forgets the kept results of the given tabs (all tabs by default) after a write."""
+    for key in [k for k in st.session_state if str(k).startswith("tab_result_")]:
+        if not tabs or key[len("tab_result_"):] in tabs:
+            del st.session_state[key]
@@ -0,0 +1,307 @@
+# ./utils/timesheet_queries.py
+import datetime
+from dataclasses import dataclass, field
+from utils.db import get_connection, dict_fetchall, DB_BACKEND
+from utils import rollups
+from utils import catalog_cache
+
+DAYS = ["sunday", "monday", "tuesday", "wednesday", "thursday", "friday", "saturday"]
+
+# SQL Server caps a statement at 2100 parameters; each week row binds 10.
+MAX_WEEK_ROWS = 200
+
+# ========================================================
+# 1. Weekly Save (Batch)
+# ========================================================
+
+def _collapse_rows(rows):
+    """
+    Merges rows that point at the same (project, task) pair by summing their hours.
+    MERGE refuses to touch one target row twice, and the grid can contain duplicates.
+    """
+    merged = {}
+    for r in rows:
+        key = (r["project_id"], r["task_id"])
+        if key not in merged:
+            merged[key] = {
+                "project_id": r["project_id"],
+                "task_id": r["task_id"],
+                "AssignmentId": r.get("AssignmentId"),
+                **{d: float(r.get(d) or 0) for d in DAYS},
+            }
+        else:
+            for d in DAYS:
+                merged[key][d] += float(r.get(d) or 0)
+            merged[key]["AssignmentId"] = merged[key]["AssignmentId"] or r.get("AssignmentId")
+    return list(merged.values())
+
+def _merge_week(cur, user_id, week_start_date, status, collapsed, delete_missing=True):
+    """
+    SQL Server: one MERGE updates, inserts and (with delete_missing) deletes
+    the week. Returns ({(project, task): entry_id}, whether any row was inserted).
+    """
+    values_sql = ", ".join(["(?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"] * len(collapsed))
+    params = []
+    for r in collapsed:
+        params.extend([r["project_id"], r["task_id"], r["AssignmentId"]])
+        params.extend(r[d] for d in DAYS)
+
+    # The target is only this user's week, so NOT MATCHED BY SOURCE (and the
+    # HOLDLOCK range lock) covers that week instead of the whole table.
+    sql = f"""
+        WITH t AS (
+            SELECT * FROM timesheet_entries
+            WHERE user_id = ? AND week_start_date = ?
+        )
+        MERGE t WITH (HOLDLOCK)
+        USING (VALUES {values_sql}) AS s (
+            project_id, task_id, AssignmentId,
+            sunday_hours, monday_hours, tuesday_hours, wednesday_hours,
+            thursday_hours, friday_hours, saturday_hours
+        )
+        ON t.project_id = s.project_id AND t.task_id = s.task_id
+        WHEN MATCHED THEN UPDATE SET
+            AssignmentId = s.AssignmentId,
+            sunday_hours = s.sunday_hours, monday_hours = s.monday_hours,
+            tuesday_hours = s.tuesday_hours, wednesday_hours = s.wednesday_hours,
+            thursday_hours = s.thursday_hours, friday_hours = s.friday_hours,
+            saturday_hours = s.saturday_hours,
+            status = ?, updated_at = GETDATE()
+        WHEN NOT MATCHED BY TARGET THEN INSERT (
+            user_id, project_id, task_id, AssignmentId, week_start_date,
+            sunday_hours, monday_hours, tuesday_hours, wednesday_hours,
+            thursday_hours, friday_hours, saturday_hours,
+            status, created_at, updated_at
+        ) VALUES (
+            ?, s.project_id, s.task_id, s.AssignmentId, ?,
+            s.sunday_hours, s.monday_hours, s.tuesday_hours, s.wednesday_hours,
+            s.thursday_hours, s.friday_hours, s.saturday_hours,
+            ?, GETDATE(), GETDATE()
+        )
+        {"WHEN NOT MATCHED BY SOURCE THEN DELETE" if delete_missing else ""}
+        OUTPUT $action, inserted.entry_id, s.project_id, s.task_id;
+    """
+    params = [user_id, week_start_date] + params  # target CTE
+    params.extend([
+        status,                             # UPDATE
+        user_id, week_start_date, status,   # INSERT
+    ])
+    cur.execute(sql, params)
+
+    ids_by_key, inserted = {}, False
+    for action, entry_id, project_id, task_id in cur.fetchall():
+        if action != "DELETE":
+            ids_by_key[(project_id, task_id)] = int(entry_id)
+        inserted = inserted or action == "INSERT"
+    return ids_by_key, inserted
+
+def _upsert_week(cur, user_id, week_start_date, status, collapsed, delete_missing=True):
+    """
+    Backends without MERGE (utils.sqlite_backend): delete the rows that left
+    the week (with delete_missing), then update or insert each remaining row.
+    """
+    cur.execute(
+        "SELECT entry_id, project_id, task_id FROM timesheet_entries WHERE user_id = ? AND week_start_date = ?",
+        (user_id, week_start_date)
+    )
+    existing = {}
+    for entry_id, project_id, task_id in cur.fetchall():
+        existing.setdefault((project_id, task_id), []).append(int(entry_id))
+
+    keep = {(r["project_id"], r["task_id"]) for r in collapsed}
+    stale = [eid for key, ids in existing.items() if key not in keep for eid in ids] if delete_missing else []
+    if stale:
+        cur.execute(
+            f"DELETE FROM timesheet_entries WHERE entry_id IN ({', '.join(['?'] * len(stale))})",
+            stale
+        )
+
+    ids_by_key = {}
+    for r in collapsed:
+        key = (r["project_id"], r["task_id"])
+        hours = [r[d] for d in DAYS]
+        if key in existing:
+            cur.execute("""
+                UPDATE timesheet_entries SET
+                    AssignmentId = ?,
+                    sunday_hours = ?, monday_hours = ?, tuesday_hours = ?, wednesday_hours = ?,
+                    thursday_hours = ?, friday_hours = ?, saturday_hours = ?,
+                    status = ?, updated_at = GETDATE()
+                WHERE user_id = ? AND week_start_date = ? AND project_id = ? AND task_id = ?
+            """, [r["AssignmentId"], *hours, status, user_id, week_start_date, *key])
+            ids_by_key[key] = existing[key][0]
+        else:
+            cur.execute("""
+                INSERT INTO timesheet_entries (
+                    user_id, project_id, task_id, AssignmentId, week_start_date,
+                    sunday_hours, monday_hours, tuesday_hours, wednesday_hours,
+                    thursday_hours, friday_hours, saturday_hours,
+                    status, created_at, updated_at
+                )
+                OUTPUT INSERTED.entry_id
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, GETDATE(), GETDATE())
+            """, [user_id, *key, r["AssignmentId"], week_start_date, *hours, status])
+            ids_by_key[key] = int(cur.fetchone()[0])
+    return ids_by_key, any(key not in existing for key in ids_by_key)
+
+def _delete_keys(cur, user_id, week_start_date, keys):
+    """Deletes this week's entries for the given (project_id, task_id) pairs."""
+    pairs = " OR ".join(["(project_id = ? AND task_id = ?)"] * len(keys))
+    cur.execute(
+        f"DELETE FROM timesheet_entries WHERE user_id = ? AND week_start_date = ? AND ({pairs})",
+        [user_id, week_start_date, *(v for key in keys for v in key)]
+    )
+
+def save_week_entries(user_id: int, week_start_date, status: str, rows,
+                      delete_missing: bool = True, delete_keys=()):
+    """
+    Saves a whole week of timesheet rows in one transaction.
+    - Rows are matched on (project_id, task_id) and updated or inserted.
+    - Rows of this week that are no longer in `rows` are deleted, unless
+      delete_missing=False (partial saves such as the draft autosave), in
+      which case only the (project_id, task_id) pairs in delete_keys are.
+    Returns the entry_id of each input row, in the same order.
+    """
+    collapsed = _collapse_rows(rows)
+    if len(collapsed) > MAX_WEEK_ROWS:
+        raise ValueError(f"A week can hold at most {MAX_WEEK_ROWS} rows.")
+    keep = {(r["project_id"], r["task_id"]) for r in collapsed}
+    delete_keys = [tuple(k) for k in delete_keys if tuple(k) not in keep]
+
+    with get_connection() as conn:
+        cur = conn.cursor()
+        try:
+            if not collapsed and delete_missing:
+                cur.execute(
+                    "DELETE FROM timesheet_entries WHERE user_id = ? AND week_start_date = ?",
+                    (user_id, week_start_date)
+                )
+                rollups.refresh_user_weeks(cur, [(user_id, week_start_date)])
+                conn.commit()
+                return []
+
+            if delete_keys and not delete_missing:
+                _delete_keys(cur, user_id, week_start_date, delete_keys)
+
+            if not collapsed:
+                ids_by_key, inserted = {}, False
+            elif DB_BACKEND == "mssql":
+                ids_by_key, inserted = _merge_week(cur, user_id, week_start_date, status, collapsed, delete_missing)
+            else:
+                ids_by_key, inserted = _upsert_week(cur, user_id, week_start_date, status, collapsed, delete_missing)
+
+            rollups.refresh_user_weeks(cur, [(user_id, week_start_date)])
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise e
+
+    if inserted:
+        # A first entry for a project can add this employee to an approver's filter list
+        catalog_cache.invalidate("timesheet_entries")
+    return [ids_by_key.get((r["project_id"], r["task_id"])) for r in rows]
+
+# ========================================================
+# 2. Week Snapshot (Single Round Trip)
+# ========================================================
+
+@dataclass
+class WeekSnapshot:
+    """Everything the timesheet page needs for one week, loaded in one batch."""
+    user_id: int
+    week_start: datetime.date
+    assignments: list = field(default_factory=list)
+    entries: list = field(default_factory=list)
+    week_status: str = "draft"
+    rejection_reason: str = None
+    prev_week_status: str = "draft"
+    prev_week_has_entries: bool = False
+
+def _as_date(value):
+    return value.date() if isinstance(value, datetime.datetime) else value
+
+def derive_week_status(statuses):
+    """
+    Collapses the per-entry statuses of one week into a single week status.
+    An empty week counts as a draft.
+    """
+    statuses = {str(s).lower() for s in statuses if s}
+    if not statuses:
+        return "draft"
+    if "rejected" in statuses:
+        return "rejected"
+    if "draft" in statuses:
+        return "draft"
+    if statuses == {"approved"}:
+        return "approved"
+    return "submitted"
+
+def fetch_week_snapshot(user_id: int, week_start: datetime.date):
+    """
+    Loads assignments, entries, status and rejection reason for a week, plus
+    the previous week's state, as one batch of three result sets.
+    """
+    week_end = week_start + datetime.timedelta(days=6)
+    prev_week_start = week_start - datetime.timedelta(days=7)
+
+    sql = """
+        SET NOCOUNT ON;
+
+        SELECT a.AssignmentId, a.assignment_name, a.notes,
+               a.start_date AS assign_start, a.end_date AS assign_end,
+               p.project_id, p.project_name, t.task_id, t.task_name
+        FROM Assignments a
+        JOIN projects p ON a.project_id = p.project_id
+        JOIN tasks t ON a.task_id = t.task_id
+        WHERE a.EmpId = ?
+          AND (a.start_date IS NULL OR a.start_date <= ?)
+          AND (a.end_date IS NULL OR a.end_date >= ?)
+        ORDER BY p.project_name, t.task_name;
+
+        SELECT te.entry_id, te.AssignmentId, te.project_id, te.task_id, te.week_start_date, te.status,
+               te.sunday_hours, te.monday_hours, te.tuesday_hours, te.wednesday_hours,
+               te.thursday_hours, te.friday_hours, te.saturday_hours
+        FROM timesheet_entries te
+        WHERE te.user_id = ? AND te.week_start_date IN (?, ?)
+        ORDER BY te.entry_id;
+
+        SELECT TOP 1 ap.comment
+        FROM approvals ap
+        JOIN timesheet_entries te ON ap.entry_id = te.entry_id
+        WHERE te.user_id = ? AND te.week_start_date = ? AND ap.decision = 'rejected'
+        ORDER BY ap.decision_ts DESC;
+    """
+    params = (
+        user_id, week_end, week_start,
+        user_id, week_start, prev_week_start,
+        user_id, week_start,
+    )
+
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(sql, params)
+        assignments = dict_fetchall(cur)
+        cur.nextset()
+        all_entries = dict_fetchall(cur)
+        cur.nextset()
+        reason_row = cur.fetchone()
+
+    entries, prev_entries = [], []
+    for e in all_entries:
+        for d in DAYS:
+            e[f"{d}_hours"] = float(e[f"{d}_hours"] or 0.0)
+        if _as_date(e["week_start_date"]) == week_start:
+            entries.append(e)
+        else:
+            prev_entries.append(e)
+
+    return WeekSnapshot(
+        user_id=user_id,
+        week_start=week_start,
+        assignments=assignments,
+        entries=entries,
+        week_status=derive_week_status(e["status"] for e in entries),
+        rejection_reason=reason_row[0] if reason_row else None,
+        prev_week_status=derive_week_status(e["status"] for e in prev_entries),
+        prev_week_has_entries=bool(prev_entries),
+    )
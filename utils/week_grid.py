@@ -0,0 +1,165 @@
+# ./utils/week_grid.py
+"""
+Array-backed model of the rows on the weekly timesheet page.
+
+A WeekGrid holds one float32 row of 7 day values per timesheet row plus
+parallel id arrays (assignment, project, task; 0 = not chosen yet) and a
+dirty flag per row. Totals and limit checks are NumPy reductions, so a
+rerun does no per-row Python work beyond drawing the widgets.
+
+The grid also remembers which (project, task) pairs are persisted, so a
+partial save (the draft autosave) can write just the dirty rows and
+delete just the pairs that were removed since.
+"""
+import time
+import numpy as np
+from utils.timesheet_queries import DAYS
+
+DAY_CAP = 24.0
+WEEK_CAP = 40.0
+
+
+class WeekGrid:
+    def __init__(self, n=0):
+        self.hours = np.zeros((n, len(DAYS)), dtype=np.float32)
+        self.assignment_ids = np.zeros(n, dtype=np.int64)
+        self.project_ids = np.zeros(n, dtype=np.int64)
+        self.task_ids = np.zeros(n, dtype=np.int64)
+        self.dirty = np.zeros(n, dtype=bool)
+        self.saved_keys = set()  # (project_id, task_id) pairs stored in the database
+        self.edited_at = None  # time.monotonic() of the last change
+
+    @classmethod
+    def from_entries(cls, entries, resolve=None):
+        """
+        Builds the grid from saved entries (snapshot rows with *_hours columns).
+        `resolve(project_id, task_id)` supplies an AssignmentId for entries saved without one.
+        """
+        grid = cls(len(entries))
+        for i, e in enumerate(entries):
+            aid = e.get("AssignmentId")
+            if not aid and resolve is not None:
+                aid = resolve(e["project_id"], e["task_id"])
+            grid.assignment_ids[i] = aid or 0
+            grid.project_ids[i] = e["project_id"] or 0
+            grid.task_ids[i] = e["task_id"] or 0
+            grid.hours[i] = [float(e.get(f"{d}_hours") or 0.0) for d in DAYS]
+        # Counted exactly as keys() counts rows, so a fresh grid has nothing "removed"
+        grid.saved_keys = grid.keys()
+        return grid
+
+    def __len__(self):
+        return len(self.assignment_ids)
+
+    # --- Edits ---
+
+    def add_row(self):
+        self.hours = np.vstack([self.hours, np.zeros((1, len(DAYS)), dtype=np.float32)])
+        self.assignment_ids = np.append(self.assignment_ids, 0)
+        self.project_ids = np.append(self.project_ids, 0)
+        self.task_ids = np.append(self.task_ids, 0)
+        self.dirty = np.append(self.dirty, True)
+        self._touch()
+
+    def remove_row(self, i):
+        self.hours = np.delete(self.hours, i, axis=0)
+        self.assignment_ids = np.delete(self.assignment_ids, i)
+        self.project_ids = np.delete(self.project_ids, i)
+        self.task_ids = np.delete(self.task_ids, i)
+        self.dirty = np.delete(self.dirty, i)
+        self._touch()
+
+    def set_assignment(self, i, assignment_id, project_id, task_id):
+        self.assignment_ids[i] = assignment_id or 0
+        self.project_ids[i] = project_id or 0
+        self.task_ids[i] = task_id or 0
+        self.dirty[i] = True
+        self._touch()
+
+    def set_hours(self, i, day_index, value):
+        """Stores one cell; returns True if it changed."""
+        value = np.float32(value)
+        if self.hours[i, day_index] == value:
+            return False
+        self.hours[i, day_index] = value
+        self.dirty[i] = True
+        self._touch()
+        return True
+
+    def assignment_id(self, i):
+        return int(self.assignment_ids[i]) or None
+
+    def _touch(self):
+        self.edited_at = time.monotonic()
+
+    def _savable(self):
+        """Rows with an assignment, or stored with a project and task but no AssignmentId."""
+        return (self.assignment_ids > 0) | ((self.project_ids > 0) & (self.task_ids > 0))
+
+    def keys(self, mask=None):
+        """(project_id, task_id) of the savable rows (optionally within mask)."""
+        rows = self._savable()
+        if mask is not None:
+            rows &= mask
+        return {(int(p), int(t)) for p, t in zip(self.project_ids[rows], self.task_ids[rows])}
+
+    def removed_keys(self):
+        """Persisted pairs that no row holds any more (deleted or re-assigned rows)."""
+        return self.saved_keys - self.keys()
+
+    def has_unsaved_changes(self):
+        """Savable rows changed, or saved pairs removed; a new row without an assignment doesn't count."""
+        return bool((self.dirty & self._savable()).any()) or bool(self.removed_keys())
+
+    def mark_clean(self):
+        self.dirty[:] = False
+
+    def mark_saved(self, keys, removed=()):
+        """After a partial save: these pairs are stored, `removed` are gone, their rows are clean."""
+        keys = set(keys)
+        self.saved_keys = (self.saved_keys - set(removed)) | keys
+        saved_rows = np.array([
+            (int(p), int(t)) in keys for p, t in zip(self.project_ids, self.task_ids)
+        ], dtype=bool)
+        self.dirty &= ~saved_rows
+
+    # --- Totals & limits ---
+
+    def row_totals(self):
+        return self.hours.sum(axis=1, dtype=np.float64)
+
+    def day_totals(self):
+        return self.hours.sum(axis=0, dtype=np.float64)
+
+    def total(self):
+        return float(self.hours.sum(dtype=np.float64))
+
+    def days_over_cap(self, cap=DAY_CAP):
+        """Names of the days whose hours across all rows exceed `cap`."""
+        return [DAYS[d] for d in np.flatnonzero(self.day_totals() > cap)]
+
+    # --- Saving ---
+
+    def to_rows(self, only_dirty=False):
+        """
+        Savable rows, as save_week_entries expects them; entries stored without
+        an AssignmentId keep it NULL rather than being dropped. only_dirty
+        keeps the dirty rows plus any row sharing their (project, task) pair,
+        since save_week_entries sums duplicate pairs into one entry.
+        """
+        mask = self._savable()
+        if only_dirty:
+            dirty_keys = self.keys(self.dirty)
+            mask &= np.array([
+                (int(p), int(t)) in dirty_keys for p, t in zip(self.project_ids, self.task_ids)
+            ], dtype=bool)
+        rows = []
+        for i in np.flatnonzero(mask):
+            hours = self.hours[i].tolist()
+            rows.append({
+                "project_id": int(self.project_ids[i]),
+                "task_id": int(self.task_ids[i]),
+                "AssignmentId": int(self.assignment_ids[i]) or None,
+                **dict(zip(DAYS, hours)),
+            })
+        return rows
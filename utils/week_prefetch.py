@@ -0,0 +1,123 @@
+# ./utils/week_prefetch.py
+"""
+Background prefetch of the weeks around the one on screen.
+
+After the timesheet page renders week W, prefetch() loads the snapshots
+of W-1 and W+1 on a small shared thread pool. get() hands them to the
+page when the user clicks ◀ Prev / Next ▶, so week navigation is served
+from memory instead of running the week queries again.
+
+Snapshots live in a per-user LRU of PREFETCH_WEEKS_PER_USER weeks that
+expire after PREFETCH_TTL_SECONDS; every write to a week (employee saves
+and the manager write paths) must invalidate() the weeks it affects
+(W itself and W+1, whose previous-week status it changes).
+"""
+import datetime
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import LRUCache, TTLCache
+from utils import timesheet_queries as tq
+
+PREFETCH_ENABLED = os.getenv("WEEK_PREFETCH_ENABLED", "1") == "1"
+PREFETCH_WORKERS = int(os.getenv("WEEK_PREFETCH_WORKERS", "2"))
+PREFETCH_TTL_SECONDS = float(os.getenv("WEEK_PREFETCH_TTL_SECONDS", "120"))
+PREFETCH_WEEKS_PER_USER = 6
+PREFETCH_MAX_USERS = 1000
+
+_users = LRUCache(maxsize=PREFETCH_MAX_USERS)  # user_id -> TTLCache(week_start -> WeekSnapshot)
+_in_flight = set()  # (user_id, week_start) being loaded
+_generation = {}  # user_id -> bumped on every invalidation
+_lock = threading.Lock()
+_executor = None
+
+log = logging.getLogger(__name__)
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="week-prefetch")
+        return _executor
+
+
+def _weeks(user_id):
+    weeks = _users.get(user_id)
+    if weeks is None:
+        weeks = _users[user_id] = TTLCache(maxsize=PREFETCH_WEEKS_PER_USER, ttl=PREFETCH_TTL_SECONDS)
+    return weeks
+
+
+def get(user_id, week_start):
+    """The prefetched WeekSnapshot for this week, or None on a miss."""
+    with _lock:
+        weeks = _users.get(user_id)
+        return weeks.get(week_start) if weeks is not None else None
+
+
+def put(snapshot):
+    """Caches a snapshot the page loaded itself, so returning to the week is a hit too."""
+    with _lock:
+        _weeks(snapshot.user_id)[snapshot.week_start] = snapshot
+
+
+def _load(user_id, week_start, generation):
+    try:
+        snapshot = tq.fetch_week_snapshot(user_id, week_start)
+    except Exception as e:
+        # A failed prefetch only costs the page its normal load on navigation
+        log.warning("Week prefetch failed for user %s, %s: %s", user_id, week_start, e)
+        return
+    finally:
+        with _lock:
+            _in_flight.discard((user_id, week_start))
+    with _lock:
+        # Skip the store if a save invalidated this user's weeks while we were querying
+        if _generation.get(user_id, 0) == generation:
+            _weeks(user_id)[week_start] = snapshot
+
+
+def prefetch(user_id, week_starts):
+    """Queues a background load of each week not already cached or loading."""
+    if not PREFETCH_ENABLED:
+        return
+    executor = _get_executor()
+    with _lock:
+        weeks = _users.get(user_id)
+        generation = _generation.get(user_id, 0)
+        todo = [
+            w for w in week_starts
+            if (weeks is None or w not in weeks) and (user_id, w) not in _in_flight
+        ]
+        _in_flight.update((user_id, w) for w in todo)
+    for w in todo:
+        executor.submit(_load, user_id, w, generation)
+
+
+def adjacent_weeks(week_start):
+    return [week_start - datetime.timedelta(days=7), week_start + datetime.timedelta(days=7)]
+
+
+def invalidate(user_id, week_start=None):
+    """
+    Drops the weeks a write to week_start touches (it and the next week), or
+    all of the user's weeks. Called by the employee saves and by the manager
+    write paths (approve / reject, entry edits, admin inserts, and, for all
+    weeks, assignment changes).
+    """
+    if isinstance(week_start, datetime.datetime):
+        week_start = week_start.date()
+    elif isinstance(week_start, str):
+        week_start = datetime.date.fromisoformat(week_start[:10])
+    with _lock:
+        _generation[user_id] = _generation.get(user_id, 0) + 1
+        weeks = _users.get(user_id)
+        if weeks is None:
+            return
+        if week_start is None:
+            weeks.clear()
+        else:
+            weeks.pop(week_start, None)
+            weeks.pop(week_start + datetime.timedelta(days=7), None)
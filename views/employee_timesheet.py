@@ -1,10 +1,25 @@
 # ./views/employee_timesheet.py
 import streamlit as st
 import datetime
-from lib import employee_queries as eq
+import time
+import pandas as pd
 from lib import auth
+from utils import timesheet_queries as tq
+from utils.assignment_resolver import AssignmentIndex
+from utils.week_grid import WeekGrid, DAY_CAP, WEEK_CAP
+from utils import week_prefetch
 from utils.state_helpers import track_page_visit
 
+# Draft autosave: every AUTOSAVE_INTERVAL_SECONDS, rows changed since the last
+# save are written once the grid has been idle for AUTOSAVE_DEBOUNCE_SECONDS.
+AUTOSAVE_ENABLED = True
+AUTOSAVE_INTERVAL_SECONDS = 5
+AUTOSAVE_DEBOUNCE_SECONDS = 3
+
+# One st.data_editor for the whole week instead of ~10 widgets per row
+TIMESHEET_GRID_MODE = True
+DAY_LABELS = ["Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"]
+
 track_page_visit("employee_timesheet")
 user = auth.get_current_user()
 user_id = user["user_id"]
@@ -26,8 +41,25 @@ def show_assignment_details(data):
     st.info(data['notes'] or "No notes provided.")
 
 # --- Helpers ---
-def get_valid_assignments_map(user_id, start, end):
-    raw_list = eq.fetch_assigned_tasks_for_week(user_id, start, end)
+def load_week_snapshot(user_id, start_date):
+    """
+    Returns the cached WeekSnapshot for this week, loading it in one round trip if needed.
+    The cache is dropped on save and on week navigation; after navigation the
+    week usually comes from the background prefetch instead of the database.
+    """
+    snap = st.session_state.get("ts_snapshot")
+    if snap is None or snap.user_id != user_id or snap.week_start != start_date:
+        snap = week_prefetch.get(user_id, start_date)
+        if snap is None:
+            snap = tq.fetch_week_snapshot(user_id, start_date)
+            week_prefetch.put(snap)
+        st.session_state.ts_snapshot = snap
+    return snap
+
+def invalidate_week_snapshot():
+    st.session_state.pop("ts_snapshot", None)
+
+def get_valid_assignments_map(raw_list):
     assignments_map = {}
     for a in raw_list:
         label = f"{a['project_name']} - {a['task_name']}"
@@ -46,85 +78,162 @@ def get_valid_assignments_map(user_id, start, end):
         }
     return assignments_map
 
-def init_rows(user_id, start_date, valid_map):
-    if "ts_rows" not in st.session_state:
-        entries = eq.fetch_entries_for_week(user_id, start_date)
-        rows = []
-        for e in entries:
-            aid = e.get("AssignmentId")
-            pid = e["project_id"]
-            tid = e["task_id"]
-            if not aid:
-                for valid_aid, details in valid_map.items():
-                    if details["project_id"] == pid and details["task_id"] == tid:
-                        aid = valid_aid
-                        break
-            rows.append({
-                "assignment_id": aid, "project_id": pid, "task_id": tid,
-                "sunday": e.get("sunday_hours", 0.0), "monday": e.get("monday_hours", 0.0),
-                "tuesday": e.get("tuesday_hours", 0.0), "wednesday": e.get("wednesday_hours", 0.0),
-                "thursday": e.get("thursday_hours", 0.0), "friday": e.get("friday_hours", 0.0),
-                "saturday": e.get("saturday_hours", 0.0),
-            })
-        if not rows:
-            rows.append(create_empty_row())
-        st.session_state.ts_rows = rows
-
-def create_empty_row():
-    return {
-        "assignment_id": None, "project_id": None, "task_id": None,
-        "sunday": 0.0, "monday": 0.0, "tuesday": 0.0, "wednesday": 0.0,
-        "thursday": 0.0, "friday": 0.0, "saturday": 0.0
-    }
-
-def add_row():
-    st.session_state.ts_rows.append(create_empty_row())
-
-def remove_row(index):
-    st.session_state.ts_rows.pop(index)
-
-def update_row_value(index, key, value):
-    st.session_state.ts_rows[index][key] = value
+def init_grid(entries, assignments, week_start):
+    if "ts_grid" not in st.session_state:
+        # Entries saved without an AssignmentId are matched by (project, task) in O(1)
+        index = AssignmentIndex.from_rows(assignments, emp_id=user_id)
+        grid = WeekGrid.from_entries(
+            entries, resolve=lambda pid, tid: index.resolve(user_id, pid, tid, week_start)
+        )
+        if not len(grid):
+            grid.add_row()
+        st.session_state.ts_grid = grid
 
 def save_timesheet(status, user_id, start_date):
-    days = ["sunday", "monday", "tuesday", "wednesday", "thursday", "friday", "saturday"]
-    total_hours = 0
-    clean_data = []
-    
-    for r in st.session_state.ts_rows:
-        if not r.get('assignment_id'):
-            continue
-        row_sum = sum([r[d] for d in days])
-        total_hours += row_sum
-        entry = {
-            "user_id": user_id,
-            "week_start_date": start_date,
-            "status": status,
-            "project_id": r['project_id'],
-            "task_id": r['task_id'],
-            "AssignmentId": r['assignment_id'],
-            "sunday": r['sunday'], "monday": r['monday'], "tuesday": r['tuesday'],
-            "wednesday": r['wednesday'], "thursday": r['thursday'], "friday": r['friday'],
-            "saturday": r['saturday']
-        }
-        clean_data.append(entry)
+    grid = st.session_state.ts_grid
+    clean_data = grid.to_rows()
+    total_hours = sum(sum(r[d] for d in tq.DAYS) for r in clean_data)
 
-    if total_hours > 40.0:
-        st.error(f"❌ Limit Exceeded: {total_hours} hours logged. Max 40 allowed.")
+    if total_hours > WEEK_CAP:
+        st.error(f"❌ Limit Exceeded: {total_hours} hours logged. Max {WEEK_CAP:.0f} allowed.")
+        return
+    over = grid.days_over_cap()
+    if over:
+        st.error(f"❌ More than {DAY_CAP:.0f} hours logged on {', '.join(d.capitalize() for d in over)}.")
         return
 
     try:
         if not clean_data and status == 'submitted':
              st.error("Cannot submit empty timesheet.")
              return
-        for data in clean_data:
-            eq.upsert_weekly_entry(data)
+        # One transaction for the whole week; only pairs removed from the grid are deleted,
+        # so stored entries the grid can't show (e.g. without a task) are left alone.
+        tq.save_week_entries(user_id, start_date, status, clean_data,
+                             delete_missing=False, delete_keys=grid.removed_keys())
+        week_prefetch.invalidate(user_id, start_date)
         st.success(f"✅ Timesheet {status} successfully.")
         del st.session_state[f"loaded_{user_id}_{start_date}"]
+        invalidate_week_snapshot()
         st.rerun()
     except Exception as e:
         st.error(f"Error saving: {e}")
 
+@st.fragment(run_every=AUTOSAVE_INTERVAL_SECONDS)
+def autosave_draft(user_id, start_date):
+    """
+    Writes the dirty rows of a draft week without touching the rest of it.
+    Runs as a fragment so only this caption reruns on the timer.
+    """
+    grid = st.session_state.get("ts_grid")
+    if grid is None or not grid.has_unsaved_changes():
+        if st.session_state.get("ts_autosaved_at"):
+            st.caption(f"Draft autosaved at {st.session_state.ts_autosaved_at:%H:%M:%S}")
+        return
+    if time.monotonic() - (grid.edited_at or 0) < AUTOSAVE_DEBOUNCE_SECONDS:
+        st.caption("Unsaved changes…")
+        return
+    # Over the limits the manual save reports the error; don't persist a draft it would refuse
+    if grid.total() > WEEK_CAP or grid.days_over_cap():
+        st.caption("Unsaved changes (over the hour limits).")
+        return
+
+    rows = grid.to_rows(only_dirty=True)
+    removed = grid.removed_keys()
+    if not rows and not removed:
+        return
+    try:
+        tq.save_week_entries(user_id, start_date, "draft", rows,
+                             delete_missing=False, delete_keys=removed)
+    except Exception as e:
+        st.caption(f"⚠️ Autosave failed: {e}")
+        return
+    grid.mark_saved({(r["project_id"], r["task_id"]) for r in rows}, removed)
+    week_prefetch.invalidate(user_id, start_date)
+    invalidate_week_snapshot()
+    st.session_state.ts_autosaved_at = datetime.datetime.now()
+    st.caption(f"Draft autosaved at {st.session_state.ts_autosaved_at:%H:%M:%S}")
+
+def editor_key():
+    return f"ts_editor_{st.session_state.get('ts_editor_version', 0)}"
+
+def assignment_labels(grid, assignments_map):
+    """
+    label -> AssignmentId for the select column; saved assignments no longer active stay selectable.
+    Labels carry the AssignmentId, since two assignments can share project and task names.
+    """
+    labels = {f"{a['label']} #{aid}": aid for aid, a in assignments_map.items()}
+    for aid in grid.assignment_ids[grid.assignment_ids > 0].tolist():
+        if aid not in assignments_map:
+            labels[f"(Inactive) #{aid}"] = aid
+    return labels
+
+def apply_editor_diff(grid, labels, assignments_map):
+    """
+    on_change callback: applies the editor's edited/added/deleted rows to
+    the WeekGrid, then starts a fresh editor over the updated grid.
+    """
+    diff = st.session_state.get(editor_key()) or {}
+
+    def apply_row(i, changes):
+        if "Assignment" in changes:
+            aid = labels.get(changes["Assignment"])
+            details = assignments_map.get(aid, {})
+            grid.set_assignment(i, aid, details.get("project_id"), details.get("task_id"))
+        for d_idx, label in enumerate(DAY_LABELS):
+            if label in changes:
+                value = changes[label] or 0.0
+                grid.set_hours(i, d_idx, min(max(float(value), 0.0), DAY_CAP))
+
+    # Edited and deleted rows are indexed against the frame the editor was drawn with
+    for i, changes in diff.get("edited_rows", {}).items():
+        apply_row(int(i), changes)
+    for i in sorted(diff.get("deleted_rows", []), reverse=True):
+        grid.remove_row(i)
+    for changes in diff.get("added_rows", []):
+        grid.add_row()
+        apply_row(len(grid) - 1, changes)
+
+    st.session_state["ts_editor_version"] = st.session_state.get("ts_editor_version", 0) + 1
+
+def render_editor(grid, assignments_map, is_editable):
+    """The week as one editable table: an assignment column, seven day columns and a row total."""
+    labels = assignment_labels(grid, assignments_map)
+    label_by_aid = {aid: label for label, aid in labels.items()}
+    view = pd.DataFrame(grid.hours, columns=DAY_LABELS).astype(float)
+    view.insert(0, "Assignment", [label_by_aid.get(aid) for aid in grid.assignment_ids.tolist()])
+    view["Total"] = grid.row_totals()
+
+    day_columns = {
+        label: st.column_config.NumberColumn(label, min_value=0.0, max_value=DAY_CAP, step=0.5, format="%.1f")
+        for label in DAY_LABELS
+    }
+    st.data_editor(
+        view,
+        key=editor_key(),
+        on_change=apply_editor_diff,
+        args=(grid, labels, assignments_map),
+        num_rows="dynamic" if is_editable else "fixed",
+        disabled=["Total"] if is_editable else True,
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            "Assignment": st.column_config.SelectboxColumn("Assignment", options=list(labels), width="large"),
+            **day_columns,
+            "Total": st.column_config.NumberColumn("Total", format="%.1f"),
+        },
+    )
+
+    # Details of one assignment on the grid (the per-row ℹ️ button in row mode)
+    assigned = [aid for aid in dict.fromkeys(grid.assignment_ids.tolist()) if aid in assignments_map]
+    if assigned:
+        ic1, ic2, _ = st.columns([3, 1, 3])
+        info_aid = ic1.selectbox(
+            "Assignment details", options=assigned, format_func=lambda x: assignments_map[x]["label"],
+            key="ts_info_aid", label_visibility="collapsed"
+        )
+        if ic2.button("ℹ️ Details", key="ts_info_btn"):
+            show_assignment_details(assignments_map[info_aid])
+
 # --- Logic ---
 
 if "ts_week_start" not in st.session_state:
@@ -134,14 +243,20 @@ if "ts_week_start" not in st.session_state:
 start_date = st.session_state["ts_week_start"]
 end_date = start_date + datetime.timedelta(days=6)
 
-valid_assignments_map = get_valid_assignments_map(user_id, start_date, end_date)
-
 state_key = f"loaded_{user_id}_{start_date}"
 if state_key not in st.session_state:
-    if "ts_rows" in st.session_state: del st.session_state.ts_rows
+    st.session_state.pop("ts_grid", None)
+    st.session_state.pop("ts_autosaved_at", None)
+    st.session_state["ts_editor_version"] = st.session_state.get("ts_editor_version", 0) + 1
+    invalidate_week_snapshot()
     st.session_state[state_key] = True
 
-init_rows(user_id, start_date, valid_assignments_map)
+# One batched query per week load instead of five or six per rerun
+snapshot = load_week_snapshot(user_id, start_date)
+valid_assignments_map = get_valid_assignments_map(snapshot.assignments)
+
+init_grid(snapshot.entries, snapshot.assignments, start_date)
+grid = st.session_state.ts_grid
 
 st.title("📅 Weekly Timesheet")
 
@@ -149,6 +264,7 @@ c1, c2, c3 = st.columns([1, 4, 1])
 if c1.button("◀ Prev"):
     st.session_state["ts_week_start"] -= datetime.timedelta(days=7)
     del st.session_state[state_key]
+    invalidate_week_snapshot()
     st.rerun()
 
 c2.markdown(f"<h3 style='text-align: center'>{start_date.strftime('%d %b')} - {end_date.strftime('%d %b %Y')}</h3>", unsafe_allow_html=True)
@@ -156,89 +272,90 @@ c2.markdown(f"<h3 style='text-align: center'>{start_date.strftime('%d %b')} - {e
 if c3.button("Next ▶"):
     st.session_state["ts_week_start"] += datetime.timedelta(days=7)
     del st.session_state[state_key]
+    invalidate_week_snapshot()
     st.rerun()
 
-week_status = eq.get_week_status(user_id, start_date)
+week_status = snapshot.week_status
 status_colors = {"draft": "grey", "submitted": "blue", "approved": "green", "rejected": "red"}
 st.markdown(f"**Status:** <span style='color:{status_colors.get(week_status, 'black')}'>**{week_status.upper()}**</span>", unsafe_allow_html=True)
 
 if week_status == "rejected":
-    reason = eq.get_latest_rejection_reason(user_id, start_date)
+    reason = snapshot.rejection_reason
     st.error(f"🚫 **Action Required: Timesheet Rejected**\n\n**Reason:** {reason}")
 
 is_editable = week_status in ["draft", "rejected"]
 
 st.markdown("---")
 
-# Headers - UPDATED LAYOUT
-# Removing Project/Task columns, Adding 'Info' column
-# Grid: Assignment (3.5), Info (0.5), 7 Days (0.8 each), Delete (0.5)
-h_cols = st.columns([3.5, 0.5, 0.8, 0.8, 0.8, 0.8, 0.8, 0.8, 0.8, 0.5])
-headers = ["Assignment", "Info", "Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat", ""]
-for col, h in zip(h_cols, headers):
-    col.write(f"**{h}**")
+if TIMESHEET_GRID_MODE:
+    render_editor(grid, valid_assignments_map, is_editable)
+else:
+    # Headers - UPDATED LAYOUT
+    # Removing Project/Task columns, Adding 'Info' column
+    # Grid: Assignment (3.5), Info (0.5), 7 Days (0.8 each), Delete (0.5)
+    h_cols = st.columns([3.5, 0.5, 0.8, 0.8, 0.8, 0.8, 0.8, 0.8, 0.8, 0.5])
+    headers = ["Assignment", "Info", "Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat", ""]
+    for col, h in zip(h_cols, headers):
+        col.write(f"**{h}**")
+
+    for i in range(len(grid)):
+        cols = st.columns([3.5, 0.5, 0.8, 0.8, 0.8, 0.8, 0.8, 0.8, 0.8, 0.5])
+
+        curr_aid = grid.assignment_id(i)
+        assign_opts = valid_assignments_map
+        if curr_aid and curr_aid not in assign_opts:
+            assign_opts = {**valid_assignments_map, curr_aid: {"label": "(Inactive)", "project_name": "Unknown", "task_name": "Unknown"}}
+
+        selected_aid = cols[0].selectbox(
+            f"assign_{i}", options=list(assign_opts.keys()), 
+            format_func=lambda x: assign_opts[x]["label"],
+            key=f"assign_dd_{i}",
+            index=list(assign_opts.keys()).index(curr_aid) if curr_aid in assign_opts else None,
+            label_visibility="collapsed", disabled=not is_editable
+        )
 
-days = ["sunday", "monday", "tuesday", "wednesday", "thursday", "friday", "saturday"]
+        if selected_aid != curr_aid:
+            details = assign_opts[selected_aid] if selected_aid else {}
+            grid.set_assignment(i, selected_aid, details.get("project_id"), details.get("task_id"))
+            st.rerun()
 
-for i, row in enumerate(st.session_state.ts_rows):
-    cols = st.columns([3.5, 0.5, 0.8, 0.8, 0.8, 0.8, 0.8, 0.8, 0.8, 0.5])
-    
-    curr_aid = row.get("assignment_id")
-    assign_opts = valid_assignments_map.copy()
-    if curr_aid and curr_aid not in assign_opts:
-        assign_opts[curr_aid] = {"label": "(Inactive)", "project_name": "Unknown", "task_name": "Unknown"}
-
-    selected_aid = cols[0].selectbox(
-        f"assign_{i}", options=list(assign_opts.keys()), 
-        format_func=lambda x: assign_opts[x]["label"],
-        key=f"assign_dd_{i}",
-        index=list(assign_opts.keys()).index(curr_aid) if curr_aid in assign_opts else None,
-        label_visibility="collapsed", disabled=not is_editable
-    )
-    
-    if selected_aid != curr_aid:
-        update_row_value(i, "assignment_id", selected_aid)
+        # 2. View Info Button
+        # Only enabled if assignment is selected
         if selected_aid:
-            details = assign_opts[selected_aid]
-            update_row_value(i, "project_id", details.get("project_id"))
-            update_row_value(i, "task_id", details.get("task_id"))
-        st.rerun()
-
-    # 2. View Info Button
-    # Only enabled if assignment is selected
-    if selected_aid:
-        if cols[1].button("ℹ️", key=f"inf_{i}", help="View Project/Task Details"):
-            show_assignment_details(assign_opts[selected_aid])
-    else:
-         cols[1].write("") # Spacer
-
-    # 3. Days Inputs
-    for d_idx, day in enumerate(days):
-        val = cols[d_idx + 2].number_input(
-            f"{day}_{i}", min_value=0.0, max_value=24.0, step=0.5,
-            value=float(row.get(day, 0.0)), key=f"{day}_num_{i}",
-            label_visibility="collapsed", disabled=not is_editable
-        )
-        if val != row.get(day):
-            update_row_value(i, day, val)
+            if cols[1].button("ℹ️", key=f"inf_{i}", help="View Project/Task Details"):
+                show_assignment_details(assign_opts[selected_aid])
+        else:
+             cols[1].write("") # Spacer
+
+        # 3. Days Inputs
+        row_hours = grid.hours[i].tolist()
+        for d_idx, day in enumerate(tq.DAYS):
+            val = cols[d_idx + 2].number_input(
+                f"{day}_{i}", min_value=0.0, max_value=DAY_CAP, step=0.5,
+                value=row_hours[d_idx], key=f"{day}_num_{i}",
+                label_visibility="collapsed", disabled=not is_editable
+            )
+            grid.set_hours(i, d_idx, val)
+
+        if is_editable:
+            if cols[9].button("🗑️", key=f"del_{i}"):
+                grid.remove_row(i)
+                st.rerun()
 
     if is_editable:
-        if cols[9].button("🗑️", key=f"del_{i}"):
-            remove_row(i)
+        if st.button("➕ Add Row"):
+            grid.add_row()
             st.rerun()
 
-if is_editable:
-    if st.button("➕ Add Row"):
-        add_row()
-        st.rerun()
-
 st.write("---")
-grand_total = sum([sum([row[d] for d in days]) for row in st.session_state.ts_rows])
-st.caption(f"**Total Weekly Hours:** {grand_total:.2f}")
+st.caption(f"**Total Weekly Hours:** {grid.total():.2f}")
+
+if AUTOSAVE_ENABLED and is_editable and week_status == "draft":
+    autosave_draft(user_id, start_date)
 
 # Check previous week status
 prev_week_start = start_date - datetime.timedelta(days=7)
-prev_week_status = eq.get_week_status(user_id, prev_week_start)
+prev_week_status = snapshot.prev_week_status
 can_submit = True
 
 # Logic: Only block if previous week is Rejected OR (Draft AND has actual saved entries)
@@ -248,8 +365,7 @@ if prev_week_status == "rejected":
     can_submit = False
 elif prev_week_status == "draft":
     # Check if this is a "real" draft (has data) or just empty history
-    prev_week_entries = eq.fetch_entries_for_week(user_id, prev_week_start)
-    if prev_week_entries:
+    if snapshot.prev_week_has_entries:
         st.warning(f"⚠️ You cannot submit this week until the previous week ({prev_week_start.strftime('%d %b')}) is submitted.")
         can_submit = False
 
@@ -264,4 +380,7 @@ if is_editable:
 elif week_status == "submitted":
     st.info("Submitted - Waiting for approval.")
 
-    
\ No newline at end of file
+    
+
+# Warm the weeks either side while the user works on this one
+week_prefetch.prefetch(user_id, week_prefetch.adjacent_weeks(start_date))
@@ -1,13 +1,20 @@
 import streamlit as st
 from lib import auth
 from tabs import tab_approvals, tab_assignments, tab_tasks, tab_projects, tab_task_types
-from utils.state_helpers import track_page_visit
+from utils.state_helpers import track_page_visit, keep_widget_state, drop_tab_results
 
 track_page_visit("manager_approvals")
 
 st.title("🎛️ Manager Dashboard")
 
 user = auth.get_current_user()
+
+# Lazy mode runs only the selected tab's queries and widgets on each rerun;
+# hidden tabs keep their widget state, and the open tab reuses its result
+# across its own reruns (state_helpers.tab_result).
+# Set to False to fall back to st.tabs, which renders every tab every time.
+LAZY_TABS = True
+
 IS_ADMIN = user.get('role') == 'admin'
 IS_DEPT_MANAGER = user.get('role') == 'dept_manager'
 
@@ -17,7 +24,8 @@ dashboard_tabs = [
     {
         "name": "Approvals",
         "render": lambda: tab_approvals.render(user, IS_ADMIN),
-        "visible": True  # All managers/admins/directors need this
+        "visible": True,  # All managers/admins/directors need this
+        "state_keys": tab_approvals.STATE_KEYS
     },
     {
         "name": "Projects",
@@ -46,6 +54,30 @@ visible_tabs = [t for t in dashboard_tabs if t["visible"]]
 
 if not visible_tabs:
     st.error("Access Denied: You do not have permission to view any dashboard tabs.")
+elif LAZY_TABS:
+    tab_names = [t["name"] for t in visible_tabs]
+    if st.session_state.get("dashboard_active_tab") not in tab_names:
+        # First visit, or the active segment was clicked again (which deselects it):
+        # stay on the last tab shown
+        last_tab = st.session_state.get("dashboard_last_tab")
+        st.session_state["dashboard_active_tab"] = last_tab if last_tab in tab_names else tab_names[0]
+
+    active_name = st.segmented_control(
+        "Section",
+        tab_names,
+        key="dashboard_active_tab",
+        label_visibility="collapsed"
+    )
+    if active_name != st.session_state.get("dashboard_last_tab"):
+        # Opening a tab reloads it; hidden tabs run nothing, so nothing is kept for them
+        drop_tab_results()
+    st.session_state["dashboard_last_tab"] = active_name
+
+    for tab_config in visible_tabs:
+        if tab_config["name"] == active_name:
+            tab_config["render"]()
+        else:
+            keep_widget_state(tab_config.get("state_keys", []))
 else:
     # Create the tabs
     tab_labels = [f"**{t['name']}**" for t in visible_tabs]
@@ -5,8 +5,36 @@ import datetime
 import altair as alt
 from lib import report_queries as rq
 from lib import auth
+from utils import rollups
+from utils import report_data
 from utils.state_helpers import track_page_visit
 
+EXPORT_FORMATS = {
+    "CSV": (report_data.export_detailed_csv, "csv", "text/csv"),
+    "Parquet": (report_data.export_detailed_parquet, "parquet", "application/vnd.apache.parquet"),
+}
+
+@st.fragment
+def render_export(start_date, end_date, selected_proj_id, selected_emp_id, user_id, is_admin):
+    """
+    On-demand export. The file is streamed from the DB cursor only when
+    'Prepare Export' is clicked, and only this fragment reruns.
+    """
+    ec1, ec2, _ = st.columns([1, 1, 3])
+    fmt = ec1.selectbox("Export Format", list(EXPORT_FORMATS.keys()), key="report_export_format", label_visibility="collapsed")
+    if ec2.button("📦 Prepare Export", key="report_export_prepare"):
+        export_fn, ext, mime = EXPORT_FORMATS[fmt]
+        with st.spinner("Building export..."):
+            data = export_fn(start_date, end_date, selected_proj_id, selected_emp_id, user_id, is_admin)
+        st.download_button(
+            f"⬇️ Download {fmt}",
+            data,
+            f"timesheet_report_{start_date}_{end_date}.{ext}",
+            mime,
+            key='download-report',
+            on_click="ignore"
+        )
+
 def render(user):
     track_page_visit("reports_dashboard")
     st.title("📈 Reports & Analytics")
@@ -59,17 +87,21 @@ def render(user):
     # =========================================================
     
     # 1. Detailed Data
-    details_data = rq.fetch_detailed_timesheet_data(
+    df_details = report_data.fetch_detailed_frame(
         start_date, end_date, selected_proj_id, selected_emp_id, user_id, IS_ADMIN
     )
-    df_details = pd.DataFrame(details_data)
 
-    # 2. Project Summary Data (For Charts)
-    proj_summary = rq.fetch_project_summary(start_date, end_date, user_id, IS_ADMIN)
+    # 2. Executive Summary (read from the pre-aggregated weekly rollup)
+    totals = rollups.fetch_rollup_totals(
+        start_date, end_date, user_id, IS_ADMIN, selected_proj_id, selected_emp_id
+    )
+
+    # 3. Project Summary Data (For Charts)
+    proj_summary = rollups.fetch_rollup_project_summary(start_date, end_date, user_id, IS_ADMIN)
     df_proj_summary = pd.DataFrame(proj_summary)
 
-    # 3. Status Breakdown
-    status_breakdown = rq.fetch_status_breakdown(start_date, end_date, user_id, IS_ADMIN)
+    # 4. Status Breakdown
+    status_breakdown = rollups.fetch_rollup_status_breakdown(start_date, end_date, user_id, IS_ADMIN)
     df_status = pd.DataFrame(status_breakdown)
 
     # =========================================================
@@ -81,9 +113,9 @@ def render(user):
     # --- TAB 1: EXECUTIVE SUMMARY ---
     with tab1:
         # Metrics Row
-        total_hours = df_details['total_hours'].sum() if not df_details.empty else 0
-        billable_hours = df_details[df_details['is_billable'] == True]['total_hours'].sum() if not df_details.empty else 0
-        unique_emps = df_details['EmpName'].nunique() if not df_details.empty else 0
+        total_hours = totals['total_hours']
+        billable_hours = totals['billable_hours']
+        unique_emps = totals['active_employees']
         
         c1, c2, c3, c4 = st.columns(4)
         c1.metric("Total Hours", f"{total_hours:.1f}")
@@ -128,31 +160,18 @@ def render(user):
             st.info("No records found for the selected criteria.")
         else:
             # Display Config
-            grid_df = df_details[[
-                "EmpName", "project_name", "task_name", "TaskTypeName", 
-                "week_start_date", "status", "total_hours", "notes"
-            ]].copy()
-            
-            grid_df["week_start_date"] = pd.to_datetime(grid_df["week_start_date"]).dt.date
+            grid_df = df_details[report_data.DETAIL_COLUMNS]
 
             st.dataframe(grid_df, use_container_width=True, hide_index=True)
             
-            # CSV Download
-            csv = grid_df.to_csv(index=False).encode('utf-8')
-            st.download_button(
-                "⬇️ Download CSV",
-                csv,
-                f"timesheet_report_{start_date}_{end_date}.csv",
-                "text/csv",
-                key='download-csv'
-            )
+            render_export(start_date, end_date, selected_proj_id, selected_emp_id, user_id, IS_ADMIN)
 
     # --- TAB 3: UTILIZATION (Task Types) ---
     with tab3:
         st.subheader("Task Type Analysis")
         if not df_details.empty:
             # Group by Task Type
-            type_group = df_details.groupby("TaskTypeName")['total_hours'].sum().reset_index()
+            type_group = df_details.groupby("TaskTypeName", observed=True)['total_hours'].sum().reset_index()
             
             chart_t = alt.Chart(type_group).mark_bar().encode(
                 x=alt.X('total_hours', title='Total Hours'),
@@ -163,7 +182,7 @@ def render(user):
             st.altair_chart(chart_t, use_container_width=True)
             
             st.write("### Billable vs Non-Billable")
-            bill_group = df_details.groupby("is_billable")['total_hours'].sum().reset_index()
+            bill_group = df_details.groupby("is_billable", observed=True)['total_hours'].sum().reset_index()
             bill_group['Type'] = bill_group['is_billable'].map({True: 'Billable', False: 'Non-Billable'})
             
             chart_b = alt.Chart(bill_group).mark_arc().encode(